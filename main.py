@@ -1,25 +1,34 @@
-from fastapi import FastAPI, Form, UploadFile, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from llama_cpp import Llama
+from llama_cpp import Llama, llama_supports_gpu_offload
 from dotenv import load_dotenv
 import os
-import requests
 import json
 import re
-from typing import Optional, List, Dict, Any, Union
-import openai
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Union, Tuple
+from datetime import datetime, timedelta
 import tempfile
 import uuid
 import httpx
 import time
 import asyncio
 import threading
+import hashlib
+import codecs
+import sqlite3
+import zipfile
+import bisect
+import base64
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 # Load environment variables
 load_dotenv()
@@ -41,27 +50,120 @@ class RestAssuredResponse(BaseModel):
     statusCode: int
     response: str
 
+class DownloadReportRequest(RestAssuredRequest):
+    rerun: Optional[bool] = False
+    format: Optional[str] = "xlsx"
+
 # Initialize FastAPI app
 app = FastAPI()
 
 # Task tracking for cancellation
 active_tasks = {}
-task_executor = ThreadPoolExecutor(max_workers=5)
+FINISHED_TASK_STATUSES = ("completed", "failed", "cancelled")
+TASK_RESULT_TTL_SECONDS = int(os.getenv("TASK_RESULT_TTL_SECONDS", "3600"))
+
+# Background generation job queue - the queue itself is created lazily inside the running event loop
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "5"))
+GENERATION_QUEUE_LIMIT = int(os.getenv("GENERATION_QUEUE_LIMIT", "500"))
+TASK_STREAM_POLL_SECONDS = 0.25
+generation_queue: Optional[asyncio.Queue] = None
+generation_loop: Optional[asyncio.AbstractEventLoop] = None
+generation_workers: List[asyncio.Task] = []
+generation_waiters: Dict[str, asyncio.Future] = {}
+# Per-task event queues feeding Server-Sent Event responses
+task_event_subscribers: Dict[str, List[asyncio.Queue]] = {}
+# Batch generation: running batch tasks and the zip written for each finished batch
+batch_runs: Dict[str, asyncio.Task] = {}
+batch_archives: Dict[str, str] = {}
+# Artificial delay before generation starts, handy for exercising cancellation from the UI
+GENERATION_TEST_DELAY_SECONDS = int(os.getenv("GENERATION_TEST_DELAY_SECONDS", "0"))
+
+task_executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS)
+
+def is_task_cancelled(task_id: str) -> bool:
+    """Check whether a tracked task has been flagged for cancellation"""
+    return active_tasks.get(task_id, {}).get("cancelled", False)
+
+def update_task(task_id: str, **fields):
+    """Merge progress fields into a tracked task record, if it still exists"""
+    task = active_tasks.get(task_id)
+    if task is not None:
+        task.update(fields)
+
+def prune_finished_tasks():
+    """Forget finished tasks whose results have been kept longer than TASK_RESULT_TTL_SECONDS"""
+    cutoff = datetime.now() - timedelta(seconds=TASK_RESULT_TTL_SECONDS)
+    expired = [
+        task_id for task_id, task in active_tasks.items()
+        if task.get("status") in FINISHED_TASK_STATUSES and task.get("finished_at", task["start_time"]) < cutoff
+    ]
+    for task_id in expired:
+        active_tasks.pop(task_id, None)
+        archive_path = batch_archives.pop(task_id, None)
+        if archive_path and os.path.exists(archive_path):
+            os.remove(archive_path)
+
+def serialize_task_info(task: dict) -> dict:
+    """Copy a task record with datetime values converted to strings for JSON serialization"""
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in task.items()}
+
+def format_sse_event(event: Optional[str], data: dict) -> str:
+    """Encode one Server-Sent Event frame"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def subscribe_task_events(task_id: str) -> asyncio.Queue:
+    """Register a queue that receives (event, data) tuples published for a task"""
+    events = asyncio.Queue()
+    task_event_subscribers.setdefault(task_id, []).append(events)
+    return events
+
+def unsubscribe_task_events(task_id: str, events: asyncio.Queue):
+    subscribers = task_event_subscribers.get(task_id, [])
+    if events in subscribers:
+        subscribers.remove(events)
+    if not subscribers:
+        task_event_subscribers.pop(task_id, None)
+
+def publish_task_event(task_id: str, event: str, data: dict):
+    for events in task_event_subscribers.get(task_id, []):
+        events.put_nowait((event, data))
+
+def publish_generated_text(task_id: str, text: str):
+    """Append sanitized generated text to a task's partial output and notify stream subscribers"""
+    task = active_tasks.get(task_id)
+    if not text or task is None:
+        return
+    task["partial_output"] = task.get("partial_output", "") + text
+    task["scenario_count"] = task.get("scenario_count", 0) + count_new_scenarios(text)
+    publish_task_event(task_id, "chunk", {"text": text, "scenario_count": task["scenario_count"]})
 
 class CancelTaskRequest(BaseModel):
     task_id: str
 
 @app.post("/cancel-task")
 async def cancel_task(request: CancelTaskRequest):
-    """Cancel a running task by task ID"""
+    """Cancel a queued or running task by task ID"""
     task_id = request.task_id
     print(f">>> Cancel request received for task ID: {task_id}")
     
-    if task_id in active_tasks:
+    if task_id in active_tasks and active_tasks[task_id].get("status") not in FINISHED_TASK_STATUSES:
         # Mark task as cancelled
-        active_tasks[task_id]["cancelled"] = True
-        active_tasks[task_id]["status"] = "cancelled"
-        active_tasks[task_id]["cancelled_at"] = datetime.now()
+        task = active_tasks[task_id]
+        task["cancelled"] = True
+        task["cancelled_at"] = datetime.now()
+        if task.get("type") == "test-generation-batch":
+            # Cancel the batch's documents; the batch finishes once the zip of what completed is written
+            task["stage"] = "Cancelling"
+            for item in task["items"]:
+                child = active_tasks.get(item["task_id"])
+                if child is not None and child.get("status") not in FINISHED_TASK_STATUSES:
+                    child.update(cancelled=True, status="cancelled", cancelled_at=task["cancelled_at"],
+                                 finished_at=task["cancelled_at"])
+        else:
+            # A queued task is finished as of now, so its record expires after TASK_RESULT_TTL_SECONDS
+            task["status"] = "cancelled"
+            task["finished_at"] = task["cancelled_at"]
         
         print(f">>> Task {task_id} marked as cancelled")
         return JSONResponse({
@@ -79,14 +181,12 @@ async def cancel_task(request: CancelTaskRequest):
 
 @app.get("/task-status/{task_id}")
 async def get_task_status(task_id: str):
-    """Get the status of a task by task ID"""
+    """Get the status, progress and (once finished) the result of a task by task ID"""
+    prune_finished_tasks()
     if task_id in active_tasks:
-        task_info = active_tasks[task_id].copy()
-        # Convert datetime objects to strings for JSON serialization
-        if "start_time" in task_info:
-            task_info["start_time"] = task_info["start_time"].isoformat()
-        if "cancelled_at" in task_info:
-            task_info["cancelled_at"] = task_info["cancelled_at"].isoformat()
+        task_info = serialize_task_info(active_tasks[task_id])
+        if generation_queue is not None and task_info.get("status") == "queued":
+            task_info["queue_depth"] = generation_queue.qsize()
         
         return JSONResponse({
             "task_id": task_id,
@@ -99,6 +199,33 @@ async def get_task_status(task_id: str):
             "message": "Task not found or already completed"
         }, status_code=404)
 
+@app.get("/task-stream/{task_id}")
+async def stream_task_status(task_id: str):
+    """Stream task status snapshots as Server-Sent Events until the task finishes"""
+    if task_id not in active_tasks:
+        return JSONResponse({
+            "task_id": task_id,
+            "task_info": None,
+            "message": "Task not found or already completed"
+        }, status_code=404)
+
+    async def event_stream():
+        last_snapshot = None
+        while True:
+            task = active_tasks.get(task_id)
+            if task is None:
+                yield format_sse_event("error", {"task_id": task_id, "message": "Task no longer tracked"})
+                return
+            snapshot = {"task_id": task_id, "task_info": serialize_task_info(task)}
+            if snapshot != last_snapshot:
+                yield format_sse_event(None, snapshot)
+                last_snapshot = snapshot
+            if task.get("status") in FINISHED_TASK_STATUSES:
+                return
+            await asyncio.sleep(TASK_STREAM_POLL_SECONDS)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -111,33 +238,383 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load Llama model
+# Llama model - loaded in the background after startup so the server binds immediately
 model_path = os.getenv("MODEL_PATH")
 llm = None
-use_mock_llm = False  # Changed to False to use OpenAI or enhanced mock
+llama_status = "not_configured"  # Status: not_configured, warming, loaded, error
+llama_error = None
 
 if model_path and os.path.exists(model_path):
-    try:
-        llm = Llama(model_path=model_path, n_ctx=2048, n_threads=8)
-        use_mock_llm = False
-        print("Local Llama model loaded successfully")
-    except Exception as e:
-        print(f"Failed to load LLM model: {e}")
-        use_mock_llm = True
+    llama_status = "warming"
+    print("Local Llama model will be loaded in the background after startup")
 else:
     print("No local model path provided - will use OpenAI or enhanced mock")
 
+def detect_physical_cores() -> int:
+    """Physical cores available to this process; hyper-threads do not speed up llama_cpp matrix work"""
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    cores = set()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            physical_id = None
+            for line in cpuinfo:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    cores.add((physical_id, value.strip()))
+    except OSError:
+        pass
+    return max(1, min(len(cores), logical) if cores else logical)
+
+def env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default).lower()).lower() in ("1", "true", "yes")
+
+# Tier 2 runtime profile - every setting can be overridden from .env
+PHYSICAL_CORES = detect_physical_cores()
+LLAMA_MIN_OUTPUT_TOKENS = int(os.getenv("LLAMA_MIN_OUTPUT_TOKENS", "768"))  # context left for the generated scenarios
+LLAMA_PROMPT_TOKEN_BUDGET = int(os.getenv("LLAMA_PROMPT_TOKEN_BUDGET", "1280"))
+
+@dataclass(frozen=True)
+class LlamaRuntimeProfile:
+    name: str
+    n_ctx: int
+    n_threads: int
+    n_batch: int
+    use_mmap: bool
+    use_mlock: bool
+    n_gpu_layers: int
+    verbose: bool
+
+    def model_kwargs(self) -> dict:
+        return {
+            "n_ctx": self.n_ctx,
+            "n_threads": self.n_threads,
+            "n_threads_batch": self.n_threads,
+            "n_batch": self.n_batch,
+            "use_mmap": self.use_mmap,
+            "use_mlock": self.use_mlock,
+            "n_gpu_layers": self.n_gpu_layers,
+            "verbose": self.verbose
+        }
+
+    def describe(self) -> str:
+        accel = f"{self.n_gpu_layers} GPU layers" if self.n_gpu_layers else "CPU only"
+        return f"{self.name}: n_ctx={self.n_ctx}, {self.n_threads} threads, n_batch={self.n_batch}, {accel}"
+
+def load_runtime_profile() -> LlamaRuntimeProfile:
+    # Context sized to the prompt budget plus room for the answer, rounded up to a multiple of 256
+    default_ctx = -(-(LLAMA_PROMPT_TOKEN_BUDGET + LLAMA_MIN_OUTPUT_TOKENS) // 256) * 256
+    return LlamaRuntimeProfile(
+        name=os.getenv("LLAMA_PROFILE", "default"),
+        n_ctx=int(os.getenv("LLAMA_N_CTX", str(default_ctx))),
+        n_threads=int(os.getenv("LLAMA_THREADS_PER_INSTANCE", str(min(8, PHYSICAL_CORES)))),
+        n_batch=int(os.getenv("LLAMA_N_BATCH", "512")),
+        use_mmap=env_flag("LLAMA_USE_MMAP", True),
+        use_mlock=env_flag("LLAMA_USE_MLOCK", False),
+        n_gpu_layers=int(os.getenv("LLAMA_N_GPU_LAYERS", "0")),
+        verbose=env_flag("LLAMA_VERBOSE", True)
+    )
+
+llama_profile = load_runtime_profile()
+LLAMA_THREADS_PER_INSTANCE = llama_profile.n_threads
+# Local model pool: each instance is its own llama_cpp context over the same mmap'd weights
+LLAMA_POOL_SIZE = int(os.getenv("LLAMA_POOL_SIZE", str(max(1, PHYSICAL_CORES // LLAMA_THREADS_PER_INSTANCE))))
+LLAMA_STARTUP_BENCHMARK = env_flag("LLAMA_STARTUP_BENCHMARK", False)
+llama_benchmark: Optional[dict] = None
+
+def load_local_model():
+    """Load one instance of the local GGUF model (runs on the instance's executor during warm-up)"""
+    load_started = time.time()
+    model = Llama(model_path=model_path, **llama_profile.model_kwargs())
+    print(f"Local Llama model loaded successfully in {time.time() - load_started:.1f}s ({llama_profile.describe()})")
+    return model
+
+BENCHMARK_PROMPT = (
+    "Feature: Orders API. The user must be able to create, read, update and delete orders. "
+    "Each order requires a customer id, at least one line item and a valid currency code. "
+) * 8
+
+def benchmark_local_model(model, profile: LlamaRuntimeProfile, generate_tokens: int = 32) -> dict:
+    """Measure prompt evaluation and generation speed of a model loaded with `profile`"""
+    tokens = model.tokenize(BENCHMARK_PROMPT.encode("utf-8"))
+    model.reset()
+    started = time.time()
+    model.eval(tokens)
+    prompt_seconds = time.time() - started
+    started = time.time()
+    output = model.create_completion(prompt=BENCHMARK_PROMPT, max_tokens=generate_tokens, temperature=0.0)
+    generation_seconds = time.time() - started
+    generated = output["usage"]["completion_tokens"]
+    model.reset()
+    result = {
+        "profile": profile.describe(),
+        "prompt_tokens_per_second": round(len(tokens) / prompt_seconds, 1) if prompt_seconds else None,
+        "generation_tokens_per_second": round(generated / generation_seconds, 1) if generation_seconds else None,
+        "measured_at": datetime.now().isoformat()
+    }
+    print(f">>> Llama benchmark ({result['profile']}): prompt {result['prompt_tokens_per_second']} tok/s, "
+          f"generation {result['generation_tokens_per_second']} tok/s")
+    return result
+
+LLAMA_BENCHMARK_KEYS = ("n_threads", "n_batch", "n_gpu_layers")
+
+def llama_benchmark_candidates() -> List[LlamaRuntimeProfile]:
+    """
+    The active profile plus the variants to compare with it. LLAMA_BENCHMARK_PROFILES lists them as
+    "name=small,n_threads=4,n_batch=256;n_gpu_layers=-1"; by default half and all physical cores,
+    half and double n_batch, and full GPU offload when llama_cpp was built with GPU support.
+    """
+    base = replace(llama_profile, verbose=False)
+    candidates = [base]
+    spec = os.getenv("LLAMA_BENCHMARK_PROFILES", "")
+    if spec:
+        for entry in filter(None, (entry.strip() for entry in spec.split(";"))):
+            fields = dict(part.strip().split("=", 1) for part in entry.split(",") if "=" in part)
+            name = fields.pop("name", entry)
+            unknown = set(fields) - set(LLAMA_BENCHMARK_KEYS)
+            if unknown:
+                raise ValueError(f"Unknown LLAMA_BENCHMARK_PROFILES setting(s): {', '.join(sorted(unknown))}")
+            candidates.append(replace(base, name=name, **{key: int(value) for key, value in fields.items()}))
+    else:
+        for threads in (max(1, PHYSICAL_CORES // 2), PHYSICAL_CORES):
+            candidates.append(replace(base, name=f"{threads} threads", n_threads=threads))
+        for n_batch in (max(32, base.n_batch // 2), base.n_batch * 2):
+            candidates.append(replace(base, name=f"n_batch {n_batch}", n_batch=n_batch))
+        if not base.n_gpu_layers and llama_supports_gpu_offload():
+            candidates.append(replace(base, name="GPU offload", n_gpu_layers=-1))
+    unique = {}
+    for candidate in candidates:
+        unique.setdefault(tuple(candidate.model_kwargs().items()), candidate)
+    return list(unique.values())
+
+def benchmark_runtime_profiles() -> dict:
+    """Load the model once per candidate profile and measure each; runs before the pool loads so nothing competes"""
+    results = []
+    for profile in llama_benchmark_candidates():
+        try:
+            model = Llama(model_path=model_path, **profile.model_kwargs())
+            try:
+                results.append(benchmark_local_model(model, profile))
+            finally:
+                model.close()
+        except Exception as e:
+            print(f">>> Llama benchmark failed for {profile.describe()}: {e}")
+            results.append({"profile": profile.describe(), "error": str(e)})
+    measured = [result for result in results if result.get("generation_tokens_per_second")]
+    fastest = max(measured, key=lambda result: result["generation_tokens_per_second"], default=None)
+    return {
+        "active": llama_profile.describe(),
+        "fastest": fastest["profile"] if fastest else None,
+        "profiles": results
+    }
+
+LLAMA_PREFIX_CACHE_ENABLED = env_flag("LLAMA_PREFIX_CACHE_ENABLED", True)
+
+class LlamaPrefixCache:
+    """
+    The system prompt that starts every Tier 2 prompt, kept in an instance's KV cache.
+    llama_cpp already skips the tokens that match what is in its KV cache, so the prefix is
+    evaluated once at warm-up and normally stays there. Only an instance that has seen another
+    prompt replace the prefix saves a llama_cpp state snapshot, and restores it from then on,
+    so instances that never lose the prefix hold no snapshot memory.
+    All methods run on the llama executor thread.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.state = None
+        self.tokens: List[int] = []
+        self.prime_seconds = None
+        self.stats = {"hits": 0, "restores": 0, "misses": 0, "snapshots": 0}
+
+    def prime(self, model, prefix_text: str):
+        if not self.enabled:
+            return
+        started = time.time()
+        # Keep only the tokens that stay the same once the user prompt is appended
+        alone = model.tokenize(prefix_text.encode("utf-8"), special=True)
+        joined = model.tokenize(f"{prefix_text}\n\nX".encode("utf-8"), special=True)
+        shared = 0
+        for a, b in zip(alone, joined):
+            if a != b:
+                break
+            shared += 1
+        self.tokens = list(alone[:shared])
+        model.reset()
+        model.eval(self.tokens)
+        self.prime_seconds = time.time() - started
+        print(f">>> Llama prompt prefix evaluated: {shared} tokens in {self.prime_seconds:.1f}s")
+
+    def prepare(self, model, prompt_tokens: List[int]):
+        """Make sure the KV cache starts with the prefix before a completion for `prompt_tokens`"""
+        if not self.tokens:
+            return
+        n = len(self.tokens)
+        if list(prompt_tokens[:n]) != self.tokens:
+            self.stats["misses"] += 1
+            return
+        if model.n_tokens >= n and list(model.input_ids[:n]) == self.tokens:
+            self.stats["hits"] += 1
+            return
+        if self.state is None:
+            # First eviction on this instance: evaluate the prefix again and keep a snapshot for next time
+            model.reset()
+            model.eval(self.tokens)
+            self.state = model.save_state()
+            self.stats["snapshots"] += 1
+            return
+        model.load_state(self.state)
+        self.stats["restores"] += 1
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": bool(self.tokens),
+            "prefix_tokens": len(self.tokens),
+            "prime_seconds": round(self.prime_seconds, 2) if self.prime_seconds is not None else None,
+            "snapshot_bytes": self.state.llama_state_size if self.state is not None else 0,
+            **self.stats
+        }
+
+class LocalModelInstance:
+    """One llama_cpp context; its calls run on a dedicated thread because contexts are not thread safe"""
+
+    def __init__(self, index: int, model):
+        self.index = index
+        self.model = model
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"llama-{index}")
+        # The KV cache belongs to the context, so every instance keeps its own saved prefix
+        self.prefix_cache = LlamaPrefixCache(LLAMA_PREFIX_CACHE_ENABLED)
+        self.requests = 0
+
+class LocalModelPool:
+    """
+    Hands out local model instances one request at a time. Requests wait in FIFO order for a
+    free instance; an instance is only handed out again once its llama thread has finished.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.instances: List[LocalModelInstance] = []
+        self.idle: Optional[asyncio.Queue] = None
+        self.idle_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waiting = 0
+        self.stats = {"requests": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _idle_queue(self) -> asyncio.Queue:
+        # Bound to the running loop, like the generation queue
+        loop = asyncio.get_running_loop()
+        if self.idle is None or self.idle_loop is not loop:
+            self.idle = asyncio.Queue()
+            self.idle_loop = loop
+            for instance in self.instances:
+                self.idle.put_nowait(instance)
+        return self.idle
+
+    def add(self, instance: LocalModelInstance):
+        idle = self._idle_queue()
+        self.instances.append(instance)
+        idle.put_nowait(instance)
+
+    async def acquire(self, task_id: Optional[str] = None) -> LocalModelInstance:
+        idle = self._idle_queue()
+        wait_started = time.time()
+        if idle.empty():
+            update_task(task_id, stage=f"Waiting for a local model instance ({self.waiting} ahead)")
+        self.waiting += 1
+        try:
+            instance = await idle.get()
+        finally:
+            self.waiting -= 1
+        waited = time.time() - wait_started
+        self.stats["requests"] += 1
+        self.stats["wait_seconds"] += waited
+        self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        if waited >= 0.01:
+            self.stats["waited"] += 1
+            print(f">>> Waited {waited:.2f}s for local model instance {instance.index}")
+        instance.requests += 1
+        return instance
+
+    def release(self, instance: LocalModelInstance, work: Optional[asyncio.Future] = None):
+        """Return an instance to the pool once `work` (its running llama call) is done"""
+        idle = self._idle_queue()
+        if work is not None and not work.done():
+            work.add_done_callback(lambda _: idle.put_nowait(instance))
+        else:
+            idle.put_nowait(instance)
+
+    def status(self) -> dict:
+        requests = self.stats["requests"]
+        return {
+            "size": self.size,
+            "loaded": len(self.instances),
+            "idle": self.idle.qsize() if self.idle is not None else len(self.instances),
+            "queue_depth": self.waiting,
+            "requests": requests,
+            "waited": self.stats["waited"],
+            "avg_wait_seconds": round(self.stats["wait_seconds"] / requests, 3) if requests else 0.0,
+            "max_wait_seconds": round(self.stats["max_wait_seconds"], 3),
+            "per_instance_requests": [instance.requests for instance in self.instances]
+        }
+
+    def prefix_cache_status(self) -> dict:
+        if not self.instances:
+            return LlamaPrefixCache(LLAMA_PREFIX_CACHE_ENABLED).status()
+        status = self.instances[0].prefix_cache.status()
+        for instance in self.instances[1:]:
+            for key in ("hits", "restores", "misses", "snapshots"):
+                status[key] += instance.prefix_cache.stats[key]
+            status["snapshot_bytes"] += instance.prefix_cache.status()["snapshot_bytes"]
+        return status
+
+local_model_pool = LocalModelPool(LLAMA_POOL_SIZE)
+
 # Initialize OpenAI client
 openai_api_key = os.getenv("OPENAI_API_KEY")
-openai_client = None
-use_openai = False
-openai_status = "not_configured"  # Status: not_configured, active, inactive, error
+async_openai_client = None
+
+# Tier 1 health checks and circuit breaker settings
+OPENAI_HEALTH_INTERVAL_SECONDS = int(os.getenv("OPENAI_HEALTH_INTERVAL_SECONDS", "60"))
+OPENAI_HEALTH_WINDOW_SECONDS = int(os.getenv("OPENAI_HEALTH_WINDOW_SECONDS", "300"))
+OPENAI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("OPENAI_BREAKER_FAILURE_THRESHOLD", "3"))
+OPENAI_BREAKER_RESET_SECONDS = int(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "60"))
+
+def classify_openai_error(error: Exception) -> dict:
+    """Map an OpenAI client exception onto the status values reported by /api-status"""
+    error_msg = str(error).lower()
+    if "api key" in error_msg or "unauthorized" in error_msg or "invalid" in error_msg:
+        return {
+            "status": "inactive",
+            "message": f"OpenAI API key is invalid or inactive: {str(error)}",
+            "model": None
+        }
+    elif "quota" in error_msg or "billing" in error_msg:
+        return {
+            "status": "quota_exceeded",
+            "message": f"OpenAI API quota exceeded: {str(error)}",
+            "model": None
+        }
+    elif "timeout" in error_msg or "timed out" in error_msg:
+        return {
+            "status": "timeout",
+            "message": f"OpenAI API timeout - may be slow or unavailable: {str(error)}",
+            "model": None
+        }
+    else:
+        return {
+            "status": "error",
+            "message": f"OpenAI API error: {str(error)}",
+            "model": None
+        }
 
-def test_openai_api_status(client) -> dict:
+async def test_openai_api_status(client: AsyncOpenAI) -> dict:
     """Test if OpenAI API key is active and working with timeout"""
     try:
         # Simple test call to check API status with timeout
-        response = client.chat.completions.create(
+        await client.chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "user", "content": "Hello"}],
             max_tokens=5,
@@ -150,73 +627,377 @@ def test_openai_api_status(client) -> dict:
             "model": "gpt-4o"
         }
     except Exception as e:
-        error_msg = str(e).lower()
-        if "api key" in error_msg or "unauthorized" in error_msg or "invalid" in error_msg:
-            return {
-                "status": "inactive",
-                "message": f"OpenAI API key is invalid or inactive: {str(e)}",
-                "model": None
-            }
-        elif "quota" in error_msg or "billing" in error_msg:
-            return {
-                "status": "quota_exceeded",
-                "message": f"OpenAI API quota exceeded: {str(e)}",
-                "model": None
-            }
-        elif "timeout" in error_msg:
-            return {
-                "status": "timeout",
-                "message": f"OpenAI API timeout - may be slow or unavailable: {str(e)}",
-                "model": None
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"OpenAI API error: {str(e)}",
-                "model": None
-            }
+        return classify_openai_error(e)
+
+class OpenAIHealthMonitor:
+    """
+    Tracks Tier 1 gateway health from scheduled probes and real generation calls.
+
+    The circuit breaker is "closed" while the gateway behaves, "open" after
+    OPENAI_BREAKER_FAILURE_THRESHOLD consecutive failures (or immediately on an
+    auth/quota failure, which will not fix itself), and "half_open" once
+    OPENAI_BREAKER_RESET_SECONDS have passed, letting a single trial request through.
+    """
+
+    # Failures that retrying will not fix - trip the breaker straight away
+    FATAL_STATUSES = ("inactive", "quota_exceeded")
+
+    def __init__(self, configured: bool, failure_threshold: int, reset_seconds: int, window_seconds: int):
+        self.status = "warming" if configured else "not_configured"
+        self.message = ""
+        self.state = "closed"
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.window_seconds = window_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.last_checked_at = None
+        self.outcomes = deque()  # (timestamp, succeeded, latency_seconds)
+
+    def _refresh_state(self):
+        if self.state == "open" and time.time() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self.trial_in_flight = False
+            print(">>> OpenAI circuit breaker half-open - next request is a trial")
+
+    def is_available(self) -> bool:
+        """Whether Tier 1 would be tried right now (does not reserve the half-open trial)"""
+        if self.status in ("warming", "not_configured"):
+            return False
+        self._refresh_state()
+        if self.state == "closed":
+            return True
+        return self.state == "half_open" and not self.trial_in_flight
+
+    def allow_request(self) -> bool:
+        """Reserve permission to call Tier 1; in half-open state only one trial call is let through"""
+        if not self.is_available():
+            return False
+        if self.state == "half_open":
+            self.trial_in_flight = True
+        return True
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was reserved but never used"""
+        self.trial_in_flight = False
+
+    def _record(self, succeeded: bool, latency: Optional[float]):
+        now = time.time()
+        self.last_checked_at = datetime.now()
+        self.outcomes.append((now, succeeded, latency))
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+
+    def record_success(self, latency: Optional[float] = None, message: str = "OpenAI API is working correctly"):
+        self._record(True, latency)
+        if self.state != "closed":
+            print(">>> OpenAI circuit breaker closed - gateway recovered")
+        self.status = "active"
+        self.message = message
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self, status: str, message: str, latency: Optional[float] = None):
+        self._record(False, latency)
+        self.status = status
+        self.message = message
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        should_open = (
+            self.state == "half_open"
+            or self.consecutive_failures >= self.failure_threshold
+            or status in self.FATAL_STATUSES
+        )
+        if should_open:
+            if self.state != "open":
+                print(f">>> OpenAI circuit breaker opened after {self.consecutive_failures} consecutive failure(s): {status}")
+            self.state = "open"
+            self.opened_at = time.time()
+
+    def snapshot(self) -> dict:
+        """Rolling error rate, latency and breaker details for /api-status"""
+        self._refresh_state()
+        latencies = sorted(latency for _, _, latency in self.outcomes if latency is not None)
+        failures = sum(1 for _, succeeded, _ in self.outcomes if not succeeded)
+        return {
+            "circuit_state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "window_seconds": self.window_seconds,
+            "window_calls": len(self.outcomes),
+            "error_rate": round(failures / len(self.outcomes), 3) if self.outcomes else 0.0,
+            "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000) if latencies else None,
+            "p95_latency_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000) if latencies else None,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None
+        }
 
 if openai_api_key:
     try:
-        # Use Comcast internal OpenAI gateway
-        openai_client = openai.OpenAI(
+        # Use Comcast internal OpenAI gateway - async client so probes and generation never block the event loop
+        async_openai_client = AsyncOpenAI(
             api_key=openai_api_key,
             base_url="https://gw.api-dev.de.comcast.com/openai/v1"
         )
-        print("OpenAI API client initialized with Comcast gateway, testing API status...")
-        
-        # Test the API status to determine actual availability
-        api_status = test_openai_api_status(openai_client)
-        openai_status = api_status["status"]
-        
-        if openai_status == "active":
-            use_openai = True
-            print(f"✅ OpenAI API is active and working: {api_status['message']}")
-        else:
-            use_openai = False
-            print(f"⚠️ OpenAI API is not working: {api_status['message']}")
-            print("🔄 Will fall back to local Llama or enhanced mock generation")
+        # The API status probe runs in the background after startup
+        print("OpenAI API client initialized with Comcast gateway, API status probe scheduled...")
             
     except Exception as e:
         print(f"❌ Failed to initialize OpenAI client: {e}")
         print("🔄 Will fall back to local/enhanced mock generation")
-        openai_status = "error"
-        use_openai = False
 else:
     print("ℹ️ No OpenAI API key provided. Using local/enhanced mock generation.")
-    openai_status = "not_configured"
 
-def save_response_to_file(response_text: str, requirement_text: str, api_context: str, operation: str):
+openai_health = OpenAIHealthMonitor(
+    configured=async_openai_client is not None,
+    failure_threshold=OPENAI_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=OPENAI_BREAKER_RESET_SECONDS,
+    window_seconds=OPENAI_HEALTH_WINDOW_SECONDS
+)
+if openai_api_key and async_openai_client is None:
+    openai_health.status = "error"
+    openai_health.message = "Failed to initialize OpenAI client"
+
+async def probe_openai_gateway():
+    """Test the API status to determine actual availability and feed the result to the health monitor"""
+    probe_started = time.time()
+    api_status = await test_openai_api_status(async_openai_client)
+    latency = time.time() - probe_started
+    
+    if api_status["status"] == "active":
+        was_healthy = openai_health.status == "active"
+        openai_health.record_success(latency, api_status["message"])
+        if not was_healthy:
+            print(f"✅ OpenAI API is active and working: {api_status['message']}")
+    else:
+        was_failing = openai_health.status == api_status["status"]
+        openai_health.record_failure(api_status["status"], api_status["message"], latency)
+        if not was_failing:
+            print(f"⚠️ OpenAI API is not working: {api_status['message']}")
+            print("🔄 Will fall back to local Llama or enhanced mock generation")
+
+async def run_openai_health_checks():
+    """Re-probe the gateway every OPENAI_HEALTH_INTERVAL_SECONDS for the lifetime of the app"""
+    while True:
+        try:
+            await probe_openai_gateway()
+        except Exception as e:
+            print(f">>> OpenAI health probe failed unexpectedly: {e}")
+        await asyncio.sleep(OPENAI_HEALTH_INTERVAL_SECONDS)
+
+warm_up_task: Optional[asyncio.Task] = None
+openai_health_task: Optional[asyncio.Task] = None
+
+async def warm_up_generation_tiers():
+    """
+    Load the local model in the background; until it finishes Tier 2 reports "warming"
+    and requests use the next available tier. Tier 1 warms up through its first health probe.
+    """
+    global llm, llama_status, llama_error, llama_benchmark
+    if llama_status == "warming":
+        loop = asyncio.get_running_loop()
+        warm_up_started = time.time()
+        if LLAMA_STARTUP_BENCHMARK:
+            try:
+                llama_benchmark = await loop.run_in_executor(None, benchmark_runtime_profiles)
+            except Exception as e:
+                print(f">>> Llama benchmark failed: {e}")
+        # Instances load one after another; Tier 2 is available as soon as the first one is ready
+        for index in range(local_model_pool.size):
+            try:
+                instance = LocalModelInstance(index, None)
+                instance.model = await loop.run_in_executor(instance.executor, load_local_model)
+                await loop.run_in_executor(instance.executor, instance.prefix_cache.prime, instance.model, KARATE_SYSTEM_PROMPT)
+                local_model_pool.add(instance)
+                if llm is None:
+                    llm = instance.model
+                    llama_status = "loaded"
+            except Exception as e:
+                print(f"Failed to load LLM model instance {index}: {e}")
+                if llm is None:
+                    llama_status = "error"
+                    llama_error = str(e)
+                break
+        print(f">>> Warm-up finished in {time.time() - warm_up_started:.1f}s - Local Llama: {llama_status} "
+              f"({len(local_model_pool.instances)}/{local_model_pool.size} instances)")
+
+@app.on_event("startup")
+async def start_background_warm_up():
+    """Let the server start accepting requests while Tier 1 and Tier 2 warm up"""
+    global warm_up_task, openai_health_task
+    warm_up_task = asyncio.create_task(warm_up_generation_tiers())
+    if async_openai_client is not None:
+        openai_health_task = asyncio.create_task(run_openai_health_checks())
+
+@app.on_event("shutdown")
+async def stop_openai_health_checks():
+    """Stop the periodic OpenAI probe when the server shuts down"""
+    if openai_health_task is not None:
+        openai_health_task.cancel()
+
+# Content-addressed cache for generated feature files
+GENERATION_CACHE_ENABLED = env_flag("GENERATION_CACHE_ENABLED", True)
+GENERATION_CACHE_MEMORY_ENTRIES = int(os.getenv("GENERATION_CACHE_MEMORY_ENTRIES", "256"))
+GENERATION_CACHE_DB_PATH = os.getenv("GENERATION_CACHE_DB_PATH", os.path.join(".cache", "generation_cache.sqlite3"))
+GENERATION_CACHE_TTL_SECONDS = int(os.getenv("GENERATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+GENERATION_CACHE_MAX_DISK_MB = int(os.getenv("GENERATION_CACHE_MAX_DISK_MB", "256"))
+
+class GenerationCache:
+    """
+    Two-level cache of generated feature files keyed by a hash of the normalized requirement,
+    operation, API context and generation tier. An in-memory LRU sits in front of a SQLite
+    store; both honour the TTL and the SQLite store is trimmed to a byte budget.
+    All methods are thread safe so disk access can run on an executor.
+    """
+
+    def __init__(self, memory_entries: int, db_path: Optional[str], ttl_seconds: int, max_disk_bytes: int):
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.db = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self.db = sqlite3.connect(db_path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS generation_cache ("
+                    "cache_key TEXT PRIMARY KEY, output TEXT NOT NULL, generation_method TEXT NOT NULL, "
+                    "size_bytes INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                self.db.execute("CREATE INDEX IF NOT EXISTS idx_generation_cache_access ON generation_cache(last_access)")
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f">>> Generation cache disk layer disabled: {e}")
+                self.db = None
+
+    @staticmethod
+    def make_key(requirement_text: str, operation: str, api_context: str, tier: str) -> str:
+        """Hash the generation inputs; whitespace-only differences in the requirement map to the same key"""
+        normalized_requirement = "\n".join(" ".join(line.split()) for line in requirement_text.strip().splitlines())
+        material = json.dumps([normalized_requirement, (operation or "").strip().lower(), (api_context or "").strip(), tier])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if now - entry["created_at"] <= self.ttl_seconds:
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry
+                del self.memory[key]
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT output, generation_method, created_at FROM generation_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row and now - row[2] <= self.ttl_seconds:
+                    self.db.execute("UPDATE generation_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                    self.db.commit()
+                    entry = {"output": row[0], "generation_method": row[1], "created_at": row[2]}
+                    self._remember(key, entry)
+                    self.stats["disk_hits"] += 1
+                    return entry
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, output: str, generation_method: str):
+        now = time.time()
+        entry = {"output": output, "generation_method": generation_method, "created_at": now}
+        with self.lock:
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO generation_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, output, generation_method, len(output.encode("utf-8")), now, now)
+                )
+                self._evict_disk(now)
+                self.db.commit()
+
+    def _remember(self, key: str, entry: dict):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        expired = self.db.execute("DELETE FROM generation_cache WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        self.stats["evictions"] += max(expired, 0)
+        total_bytes = self.db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM generation_cache").fetchone()[0]
+        if total_bytes <= self.max_disk_bytes:
+            return
+        # Drop least recently used entries until the store is back under budget
+        for cache_key, size_bytes in self.db.execute(
+            "SELECT cache_key, size_bytes FROM generation_cache ORDER BY last_access"
+        ).fetchall():
+            if total_bytes <= self.max_disk_bytes:
+                break
+            self.db.execute("DELETE FROM generation_cache WHERE cache_key = ?", (cache_key,))
+            total_bytes -= size_bytes
+            self.stats["evictions"] += 1
+
+    def status(self) -> dict:
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+            if self.db is not None:
+                count, size = self.db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM generation_cache"
+                ).fetchone()
+                stats["disk_entries"] = count
+                stats["disk_bytes"] = size
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = f"{(hits / lookups) * 100:.1f}%" if lookups else "0%"
+        stats["enabled"] = True
+        return stats
+
+generation_cache = None
+if GENERATION_CACHE_ENABLED:
+    generation_cache = GenerationCache(
+        memory_entries=GENERATION_CACHE_MEMORY_ENTRIES,
+        db_path=GENERATION_CACHE_DB_PATH,
+        ttl_seconds=GENERATION_CACHE_TTL_SECONDS,
+        max_disk_bytes=GENERATION_CACHE_MAX_DISK_MB * 1024 * 1024
+    )
+
+def primary_generation_tier() -> str:
+    """Name the tier the fallback chain will try first for a new request"""
+    if async_openai_client is not None and openai_health.is_available():
+        return "openai"
+    if llm is not None:
+        return "llama"
+    return "mock"
+
+def generation_tier_key(tier: str) -> str:
+    """Identify the model behind a tier so cached output from one model is never served for another"""
+    if tier == "openai":
+        return "openai:gpt-4o"
+    if tier == "llama":
+        return f"llama:{os.path.basename(model_path or '')}"
+    return "enhanced-mock"
+
+# Generation jobs run concurrently on task_executor; one write to latest_test_cases.md at a time
+latest_test_cases_lock = threading.Lock()
+
+def save_response_to_file(response_text: str, requirement_text: str, api_context: str, operation: str,
+                          analysis: Optional["RequirementAnalysis"] = None, validation_result: Optional[dict] = None):
     """Save the generated test cases to a file in the workspace with enhanced analysis"""
     try:
-        # Create a filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = "latest_test_cases.md"
         filepath = os.path.join(os.getcwd(), filename)
         
         # Analyze requirements for the report
-        analysis = analyze_requirements(requirement_text)
-        validation_result = validate_karate_syntax(response_text)
+        if analysis is None:
+            analysis = analyze_requirements(requirement_text)
+        if validation_result is None:
+            validation_result = validate_karate_syntax(response_text)
+        feature = parse_karate_feature(response_text)
         
         # Create comprehensive header with metadata and analysis
         header = f"""# AI-Generated Karate Test Cases - Comprehensive Analysis Report
@@ -227,13 +1008,14 @@ def save_response_to_file(response_text: str, requirement_text: str, api_context
 **Analysis Engine:** Enhanced Requirement Analysis with 100% Coverage Focus
 
 ## Requirement Analysis Summary
-**Functional Requirements Identified:** {len(analysis['functional_requirements'])}
-**Validation Points Identified:** {len(analysis['validation_points'])}
-**Business Rules Identified:** {len(analysis['business_rules'])}
-**Error Conditions Identified:** {len(analysis['error_conditions'])}
-**Integration Points Identified:** {len(analysis['integration_points'])}
+**Functional Requirements Identified:** {analysis.count_label('functional_requirements')}
+**Validation Points Identified:** {analysis.count_label('validation_points')}
+**Business Rules Identified:** {analysis.count_label('business_rules')}
+**Error Conditions Identified:** {analysis.count_label('error_conditions')}
+**Integration Points Identified:** {analysis.count_label('integration_points')}
 
 ## Test Case Validation Results
+**Executable Scenarios:** {feature.scenario_count()} ({sum(1 for scenario in feature.scenarios if scenario.outline)} outlines)
 **Syntax Validation:** {'✅ PASSED' if validation_result['is_valid'] else '❌ FAILED'}
 **Errors Found:** {len(validation_result['errors'])}
 **Warnings:** {len(validation_result['warnings'])}
@@ -262,8 +1044,8 @@ def save_response_to_file(response_text: str, requirement_text: str, api_context
 ```karate
 """
         
-        # Write to file (replace existing content)
-        with open(filepath, 'w', encoding='utf-8') as f:
+        # Write to file (replace existing content), one job at a time so two results never mix
+        with latest_test_cases_lock, open(filepath, 'w', encoding='utf-8') as f:
             f.write(header)
             f.write(response_text)
             f.write("\n```\n")
@@ -299,23 +1081,45 @@ def read_root():
 @app.get("/api-status")
 def get_api_status():
     """Get the current status of different AI generation methods"""
+    openai_status = openai_health.status
     status_info = {
         "openai": {
             "status": openai_status,
-            "available": use_openai,
-            "message": ""
+            "available": async_openai_client is not None and openai_health.is_available(),
+            "message": "",
+            "health": openai_health.snapshot()
         },
         "local_llama": {
-            "status": "available" if llm is not None else "not_available",
+            "status": "available" if llm is not None else llama_status if llama_status in ("warming", "error") else "not_available",
             "available": llm is not None,
-            "message": "Local Llama model loaded" if llm is not None else "No local model configured"
+            "message": (
+                "Local Llama model loaded" if llm is not None
+                else "⏳ Local Llama model is loading in the background" if llama_status == "warming"
+                else f"Local Llama model failed to load: {llama_error}" if llama_status == "error"
+                else "No local model configured"
+            ),
+            "prefix_cache": local_model_pool.prefix_cache_status(),
+            "pool": local_model_pool.status(),
+            "runtime_profile": {**llama_profile.model_kwargs(), "name": llama_profile.name, "physical_cores": PHYSICAL_CORES},
+            "benchmark": llama_benchmark
         },
         "enhanced_mock": {
             "status": "available",
             "available": True,
             "message": "Enhanced local generation with requirement analysis always available"
         },
-        "primary_method": ""
+        "primary_method": "",
+        "warming": openai_status == "warming" or llama_status == "warming",
+        "generation_cache": generation_cache.status() if generation_cache is not None else {"enabled": False},
+        "target_http_pool": target_http_pool.status() if target_http_pool is not None else None,
+        "token_usage": {
+            tier: {
+                **totals,
+                "budget": prompt_token_budget(tier) if tier == "openai" or llm is not None else None,
+                "counting": token_counting_method(tier)
+            }
+            for tier, totals in token_usage_totals.items()
+        }
     }
     
     # Set appropriate messages based on smart three-tier fallback system
@@ -324,6 +1128,15 @@ def get_api_status():
         status_info["primary_method"] = "Tier 1: OpenAI API (Primary)"
         status_info["fallback_info"] = "Fallback: Local Llama → Enhanced Local Generation"
         status_info["token_warning"] = None
+    elif openai_status == "warming":
+        status_info["openai"]["message"] = "⏳ OpenAI API status check in progress"
+        if llm is not None:
+            status_info["primary_method"] = "Tier 2: Local Llama Model (Primary while OpenAI warms up)"
+            status_info["fallback_info"] = "Fallback: Enhanced Local Generation"
+        else:
+            status_info["primary_method"] = "Tier 3: Enhanced Local Generation (Primary while warming up)"
+            status_info["fallback_info"] = "OpenAI API and Local Llama will be used once warm-up finishes"
+        status_info["token_warning"] = None
     elif openai_status == "inactive":
         status_info["openai"]["message"] = "❌ OpenAI API key is inactive/expired"
         if llm is not None:
@@ -372,36 +1185,100 @@ def get_api_status():
     
     return JSONResponse(status_info)
 
-@app.post("/generate-test-cases")
-async def generate_test_cases(
-    requirement: str = Form(None),
-    operation: str = Form(...),
-    file: UploadFile = None,
-    apiEndpoint: str = Form(None),
-    apiMethod: str = Form(None),
-    authType: str = Form('none'),
-    username: str = Form(None),
-    password: str = Form(None),
-    token: str = Form(None),
-    payload: str = Form(None),
-    resourceId: str = Form(None),
-    acceptHeader: str = Form(None),
-    customHeaders: str = Form(None),
-    task_id: str = Form(None)
+# Uploaded requirement files are read in chunks and analyzed while they stream in
+REQUIREMENT_UPLOAD_MAX_BYTES = int(os.getenv("REQUIREMENT_UPLOAD_MAX_MB", "20")) * 1024 * 1024
+REQUIREMENT_UPLOAD_CHUNK_BYTES = 64 * 1024
+
+def detect_upload_encoding(prefix: bytes) -> str:
+    """Pick the encoding from the first chunk: a BOM if present, else UTF-8 if the sample decodes, else Latin-1"""
+    if prefix.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # A multi-byte character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+class RequirementUploadReader:
+    """Decodes an upload chunk by chunk and feeds each complete line to a RequirementAnalyzer"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.analyzer = RequirementAnalyzer()
+        self.parts = []
+        self.partial_line = ""
+
+    def feed(self, chunk: bytes, final: bool = False):
+        try:
+            text = self.decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            # Invalid UTF-8 after a clean prefix: decode the rest of the upload as Latin-1
+            pending = self.decoder.getstate()[0]
+            print(f">>> Upload is not valid {self.encoding} past the first chunk, continuing with latin-1")
+            self.encoding = "latin-1"
+            self.decoder = codecs.getincrementaldecoder("latin-1")()
+            text = self.decoder.decode(pending + chunk, final=final)
+        self.parts.append(text)
+        lines = (self.partial_line + text).split('\n')
+        self.partial_line = lines.pop()
+        for line in lines:
+            self.analyzer.feed_line(line)
+        if final:
+            self.analyzer.feed_line(self.partial_line)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+async def ingest_requirement_upload(file: UploadFile):
+    """
+    Read an uploaded requirement file without holding more than one decoded copy in memory.
+    Returns (requirement_text, analysis, error_response); error_response is set on failure.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        chunk = await file.read(REQUIREMENT_UPLOAD_CHUNK_BYTES)
+        reader = RequirementUploadReader(detect_upload_encoding(chunk))
+        total_bytes = 0
+        while chunk:
+            total_bytes += len(chunk)
+            if total_bytes > REQUIREMENT_UPLOAD_MAX_BYTES:
+                return None, None, JSONResponse(
+                    {"error": f"Requirement file is larger than the {REQUIREMENT_UPLOAD_MAX_BYTES / (1024 * 1024):g} MB upload limit"},
+                    status_code=413
+                )
+            await loop.run_in_executor(task_executor, reader.feed, chunk)
+            chunk = await file.read(REQUIREMENT_UPLOAD_CHUNK_BYTES)
+        reader.feed(b"", final=True)
+        requirement_text = reader.text()
+        print(f">>> File decoded with {reader.encoding} encoding")
+        print(f">>> File content loaded: {len(requirement_text)} characters")
+        return requirement_text, reader.analyzer.result(), None
+    except Exception as e:
+        return None, None, JSONResponse({"error": f"Failed to read file: {str(e)}"}, status_code=400)
+
+async def prepare_generation_job(
+    requirement: Optional[str],
+    operation: str,
+    file: Optional[UploadFile],
+    apiEndpoint: Optional[str],
+    apiMethod: Optional[str],
+    authType: str,
+    username: Optional[str],
+    password: Optional[str],
+    token: Optional[str],
+    payload: Optional[str],
+    acceptHeader: Optional[str],
+    customHeaders: Optional[str]
 ):
-    # Use provided task ID or generate one if not provided
-    if not task_id:
-        task_id = str(uuid.uuid4())
-    print(f">>> generate-test-cases called with task ID: {task_id}")
+    """
+    Validate the generation form fields and read any uploaded requirement file.
+    Returns a (job, error_response) tuple; exactly one of them is set.
+    """
     print(f">>> Request details: {requirement[:30] if requirement else 'file upload'}, {operation}, authType={authType}")
-    
-    # Initialize task tracking
-    active_tasks[task_id] = {
-        "status": "processing",
-        "start_time": datetime.now(),
-        "cancelled": False,
-        "type": "test-generation"
-    }
     if file:
         print(f">>> file uploaded: {file.filename}")
     if authType == 'basic':
@@ -413,42 +1290,21 @@ async def generate_test_cases(
     if apiMethod and apiMethod.upper() in ['POST', 'PUT']:
         if not payload or payload.strip() == "":
             method_name = "POST Payload (JSON)" if apiMethod.upper() == 'POST' else "PUT Payload (JSON)"
-            return JSONResponse(
+            return None, JSONResponse(
                 {"error": f"{method_name} is mandatory when {apiMethod.upper()} method is selected"}, 
                 status_code=400
             )
 
-    if llm is None and not use_mock_llm:
-        return JSONResponse({"error": "Model still loading, please retry in a few seconds."}, status_code=503)
-
-    # Handle file upload if provided
+    # Handle file upload if provided - the upload must be consumed before the request returns
     requirement_text = requirement
+    analysis = None
     if file and not requirement:
-        try:
-            content = await file.read()
-            # Try different encodings
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-            requirement_text = None
-            
-            for encoding in encodings:
-                try:
-                    requirement_text = content.decode(encoding)
-                    print(f">>> File decoded successfully with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if requirement_text is None:
-                # If all encodings fail, try with errors='ignore'
-                requirement_text = content.decode('utf-8', errors='ignore')
-                print(">>> File decoded with UTF-8 ignoring errors")
-            
-            print(f">>> File content loaded: {len(requirement_text)} characters")
-        except Exception as e:
-            return JSONResponse({"error": f"Failed to read file: {str(e)}"}, status_code=400)
+        requirement_text, analysis, error_response = await ingest_requirement_upload(file)
+        if error_response is not None:
+            return None, error_response
 
     if not requirement_text:
-        return JSONResponse({"error": "Either requirement text or file must be provided"}, status_code=400)
+        return None, JSONResponse({"error": "Either requirement text or file must be provided"}, status_code=400)
 
     # Enhanced prompt with API context if provided
     api_context = ""
@@ -461,6 +1317,571 @@ async def generate_test_cases(
         if customHeaders:
             api_context += f"- Custom Headers: {customHeaders[:100]}...\n"
 
+    job = {
+        "requirement_text": requirement_text,
+        "operation": operation,
+        "api_context": api_context,
+        "analysis": analysis
+    }
+    return job, None
+
+def ensure_generation_workers():
+    """Create the generation queue and start its worker pool on first use"""
+    global generation_queue, generation_loop
+    loop = asyncio.get_running_loop()
+    if generation_queue is None or generation_loop is not loop:
+        # First use, or the app is now served by a new event loop (e.g. test clients)
+        generation_queue = asyncio.Queue(maxsize=GENERATION_QUEUE_LIMIT)
+        generation_loop = loop
+        generation_workers.clear()
+    generation_workers[:] = [worker for worker in generation_workers if not worker.done()]
+    while len(generation_workers) < GENERATION_WORKERS:
+        worker_id = len(generation_workers) + 1
+        generation_workers.append(asyncio.create_task(generation_worker(worker_id)))
+        print(f">>> Started generation worker {worker_id}/{GENERATION_WORKERS}")
+
+def submit_generation_job(task_id: str, job: dict) -> asyncio.Future:
+    """
+    Register a task record and queue the job for the worker pool.
+    Returns a future that resolves with the final task record.
+    Raises asyncio.QueueFull when GENERATION_QUEUE_LIMIT jobs are already waiting.
+    """
+    ensure_generation_workers()
+    prune_finished_tasks()
+    generation_queue.put_nowait((task_id, job))
+
+    active_tasks[task_id] = {
+        "status": "queued",
+        "start_time": datetime.now(),
+        "cancelled": False,
+        "type": "test-generation",
+        "progress": 0,
+        "stage": "Waiting for a free generation worker",
+        "partial_output": "",
+        "scenario_count": 0,
+        "output": None,
+        "generation_method": None,
+        "error": None
+    }
+    waiter = asyncio.get_running_loop().create_future()
+    generation_waiters[task_id] = waiter
+    print(f">>> Task {task_id} queued for generation (queue depth: {generation_queue.qsize()})")
+    return waiter
+
+def finish_generation_task(task_id: str, status: str, **fields):
+    """Record the terminal state of a generation task and wake up anyone awaiting it"""
+    task = active_tasks.get(task_id)
+    if task is not None:
+        task.update(fields)
+        task["status"] = status
+        task["finished_at"] = datetime.now()
+        if status == "completed":
+            task["progress"] = 100
+    publish_task_event(task_id, status, {
+        "task_id": task_id,
+        "output": fields.get("output"),
+        "generation_method": fields.get("generation_method"),
+        "scenario_count": (task or {}).get("scenario_count", 0),
+        "error": fields.get("error")
+    })
+    waiter = generation_waiters.pop(task_id, None)
+    if waiter is not None and not waiter.done():
+        waiter.set_result(task or {"status": status, **fields})
+
+async def generation_worker(worker_id: int):
+    """Pull queued generation jobs and run them one at a time"""
+    while True:
+        task_id, job = await generation_queue.get()
+        try:
+            if is_task_cancelled(task_id):
+                print(f">>> Worker {worker_id}: task {task_id} was cancelled while queued")
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled before generation started")
+            else:
+                print(f">>> Worker {worker_id}: starting task {task_id}")
+                await run_generation_job(task_id, job)
+        except Exception as e:
+            print(f">>> Worker {worker_id}: error from LLM: {str(e)}")
+            finish_generation_task(task_id, "failed", error=str(e))
+        finally:
+            generation_queue.task_done()
+
+def generation_task_response(task_id: str, task: dict) -> JSONResponse:
+    """Translate a finished generation task record into the /generate-test-cases response"""
+    if task.get("status") == "completed":
+        return JSONResponse({
+            "output": task["output"],
+            "task_id": task_id,
+            "generation_method": task["generation_method"]
+        })
+    if task.get("status") == "cancelled":
+        return JSONResponse({"error": task.get("error") or "Task was cancelled", "task_id": task_id}, status_code=499)
+    return JSONResponse({"error": task.get("error") or "Generation failed", "task_id": task_id}, status_code=500)
+
+@app.post("/generate-test-cases")
+async def generate_test_cases(
+    requirement: str = Form(None),
+    operation: str = Form(...),
+    file: UploadFile = None,
+    apiEndpoint: str = Form(None),
+    apiMethod: str = Form(None),
+    authType: str = Form('none'),
+    username: str = Form(None),
+    password: str = Form(None),
+    token: str = Form(None),
+    payload: str = Form(None),
+    resourceId: str = Form(None),
+    acceptHeader: str = Form(None),
+    customHeaders: str = Form(None),
+    task_id: str = Form(None)
+):
+    """Generate test cases and wait for the result (runs through the background job queue)"""
+    # Use provided task ID or generate one if not provided
+    if not task_id:
+        task_id = str(uuid.uuid4())
+    print(f">>> generate-test-cases called with task ID: {task_id}")
+
+    job, error_response = await prepare_generation_job(
+        requirement, operation, file, apiEndpoint, apiMethod, authType,
+        username, password, token, payload, acceptHeader, customHeaders
+    )
+    if error_response:
+        return error_response
+
+    try:
+        waiter = submit_generation_job(task_id, job)
+    except asyncio.QueueFull:
+        return JSONResponse({"error": "Generation queue is full, please retry shortly", "task_id": task_id}, status_code=503)
+
+    task = await waiter
+    return generation_task_response(task_id, task)
+
+@app.post("/generate-test-cases/submit")
+async def submit_test_case_generation(
+    requirement: str = Form(None),
+    operation: str = Form(...),
+    file: UploadFile = None,
+    apiEndpoint: str = Form(None),
+    apiMethod: str = Form(None),
+    authType: str = Form('none'),
+    username: str = Form(None),
+    password: str = Form(None),
+    token: str = Form(None),
+    payload: str = Form(None),
+    resourceId: str = Form(None),
+    acceptHeader: str = Form(None),
+    customHeaders: str = Form(None),
+    task_id: str = Form(None)
+):
+    """Queue a test generation job and return its task ID immediately; poll /task-status for the result"""
+    if not task_id:
+        task_id = str(uuid.uuid4())
+    print(f">>> generate-test-cases/submit called with task ID: {task_id}")
+
+    job, error_response = await prepare_generation_job(
+        requirement, operation, file, apiEndpoint, apiMethod, authType,
+        username, password, token, payload, acceptHeader, customHeaders
+    )
+    if error_response:
+        return error_response
+
+    try:
+        submit_generation_job(task_id, job)
+    except asyncio.QueueFull:
+        return JSONResponse({"error": "Generation queue is full, please retry shortly", "task_id": task_id}, status_code=503)
+
+    return JSONResponse({
+        "task_id": task_id,
+        "status": "queued",
+        "queue_depth": generation_queue.qsize(),
+        "status_url": f"/task-status/{task_id}",
+        "stream_url": f"/task-stream/{task_id}"
+    }, status_code=202)
+
+@app.post("/generate-test-cases/stream")
+async def stream_test_case_generation(
+    requirement: str = Form(None),
+    operation: str = Form(...),
+    file: UploadFile = None,
+    apiEndpoint: str = Form(None),
+    apiMethod: str = Form(None),
+    authType: str = Form('none'),
+    username: str = Form(None),
+    password: str = Form(None),
+    token: str = Form(None),
+    payload: str = Form(None),
+    resourceId: str = Form(None),
+    acceptHeader: str = Form(None),
+    customHeaders: str = Form(None),
+    task_id: str = Form(None)
+):
+    """
+    Generate test cases and stream them back as Server-Sent Events while the model produces tokens.
+    Events: `queued`, `chunk` (sanitized lines plus running scenario count), `reset` (a tier failed
+    mid-stream and the next tier starts over), and a terminal `completed`, `failed` or `cancelled`.
+    """
+    if not task_id:
+        task_id = str(uuid.uuid4())
+    print(f">>> generate-test-cases/stream called with task ID: {task_id}")
+
+    job, error_response = await prepare_generation_job(
+        requirement, operation, file, apiEndpoint, apiMethod, authType,
+        username, password, token, payload, acceptHeader, customHeaders
+    )
+    if error_response:
+        return error_response
+
+    events = subscribe_task_events(task_id)
+    try:
+        submit_generation_job(task_id, job)
+    except asyncio.QueueFull:
+        unsubscribe_task_events(task_id, events)
+        return JSONResponse({"error": "Generation queue is full, please retry shortly", "task_id": task_id}, status_code=503)
+
+    async def event_stream():
+        try:
+            yield format_sse_event("queued", {"task_id": task_id, "queue_depth": generation_queue.qsize()})
+            while True:
+                event, data = await events.get()
+                yield format_sse_event(event, data)
+                if event in FINISHED_TASK_STATUSES:
+                    return
+        finally:
+            unsubscribe_task_events(task_id, events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Bulk generation: many requirement documents in one request, fanned out over the generation worker pool
+GENERATION_BATCH_MAX_ITEMS = int(os.getenv("GENERATION_BATCH_MAX_ITEMS", "500"))
+GENERATION_BATCH_CONCURRENCY = int(os.getenv("GENERATION_BATCH_CONCURRENCY", str(GENERATION_WORKERS)))
+REQUIREMENT_FILE_EXTENSIONS = (".txt", ".md", ".text", ".csv", ".json", ".yaml", ".yml", ".feature", ".doc", ".rtf")
+
+def decode_requirement_file(stream) -> Tuple[str, "RequirementAnalysis"]:
+    """Blocking counterpart of ingest_requirement_upload for file objects such as zip members"""
+    chunk = stream.read(REQUIREMENT_UPLOAD_CHUNK_BYTES)
+    reader = RequirementUploadReader(detect_upload_encoding(chunk))
+    total_bytes = 0
+    while chunk:
+        total_bytes += len(chunk)
+        if total_bytes > REQUIREMENT_UPLOAD_MAX_BYTES:
+            raise ValueError(f"larger than the {REQUIREMENT_UPLOAD_MAX_BYTES / (1024 * 1024):g} MB upload limit")
+        reader.feed(chunk)
+        chunk = stream.read(REQUIREMENT_UPLOAD_CHUNK_BYTES)
+    reader.feed(b"", final=True)
+    return reader.text(), reader.analyzer.result()
+
+def read_requirement_zip(upload_file) -> List[dict]:
+    """One batch item per requirement document in a zip archive (runs on the task executor)"""
+    items = []
+    with zipfile.ZipFile(upload_file) as archive:
+        for member in archive.infolist():
+            name = member.filename
+            if member.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            if not name.lower().endswith(REQUIREMENT_FILE_EXTENSIONS):
+                continue
+            try:
+                with archive.open(member) as stream:
+                    text, analysis = decode_requirement_file(stream)
+                items.append({"name": name, "requirement_text": text, "analysis": analysis})
+            except Exception as e:
+                items.append({"name": name, "error": f"Failed to read file: {str(e)}"})
+    return items
+
+def read_requirement_jsonl(upload_file, source_name: str) -> List[dict]:
+    """
+    One batch item per line of a JSONL file: {"name": ..., "requirement": ..., "operation": ..., "apiMethod": ...}.
+    Only "requirement" is required; the other fields default to the form values.
+    """
+    text, _ = decode_requirement_file(upload_file)
+    items = []
+    for line_number, line in enumerate(text.split("\n"), 1):
+        if not line.strip():
+            continue
+        name = f"{source_name}:{line_number}"
+        try:
+            entry = json.loads(line)
+            requirement = entry.get("requirement")
+            if not isinstance(requirement, str) or not requirement.strip():
+                raise ValueError('"requirement" must be a non-empty string')
+        except Exception as e:
+            items.append({"name": name, "error": f"Invalid JSONL entry: {str(e)}"})
+            continue
+        items.append({
+            "name": str(entry.get("name") or name),
+            "requirement_text": requirement,
+            "analysis": None,
+            "operation": entry.get("operation"),
+            "apiEndpoint": entry.get("apiEndpoint"),
+            "apiMethod": entry.get("apiMethod")
+        })
+    return items
+
+async def collect_batch_items(files: List[UploadFile]) -> List[dict]:
+    """Expand the uploaded zips, JSONL files and plain documents into batch items"""
+    loop = asyncio.get_running_loop()
+    items = []
+    for upload in files:
+        filename = upload.filename or "requirement.txt"
+        lowered = filename.lower()
+        if lowered.endswith(".zip"):
+            try:
+                items.extend(await loop.run_in_executor(task_executor, read_requirement_zip, upload.file))
+            except zipfile.BadZipFile:
+                items.append({"name": filename, "error": "Not a valid zip archive"})
+        elif lowered.endswith(".jsonl"):
+            try:
+                items.extend(await loop.run_in_executor(task_executor, read_requirement_jsonl, upload.file, filename))
+            except Exception as e:
+                items.append({"name": filename, "error": f"Failed to read file: {str(e)}"})
+        else:
+            text, analysis, error_response = await ingest_requirement_upload(upload)
+            if error_response is not None:
+                items.append({"name": filename, "error": json.loads(error_response.body)["error"]})
+            else:
+                items.append({"name": filename, "requirement_text": text, "analysis": analysis})
+    return items
+
+def build_batch_api_context(api_endpoint: Optional[str], api_method: Optional[str], accept_header: Optional[str]) -> str:
+    """Same API context block as prepare_generation_job, for batch items (batches carry no credentials)"""
+    if not api_endpoint:
+        return ""
+    api_context = f"\nAPI Context:\n- Endpoint: {api_endpoint}\n- Method: {api_method or 'GET'}\n- Authentication: None\n"
+    if accept_header:
+        api_context += f"- Accept Header: {accept_header}\n"
+    return api_context
+
+def batch_feature_filename(name: str, index: int, used: set) -> str:
+    """features/<document name>.feature, made unique within the archive"""
+    stem = re.sub(r'[^A-Za-z0-9._-]+', '_', os.path.splitext(name.replace("\\", "/").split("/")[-1].split(":")[0])[0]).strip("._")
+    stem = stem or f"requirement_{index + 1}"
+    filename = f"features/{stem}.feature"
+    suffix = 2
+    while filename in used:
+        filename = f"features/{stem}_{suffix}.feature"
+        suffix += 1
+    used.add(filename)
+    return filename
+
+def summarize_batch_output(output: str, validation: Optional[dict]) -> Tuple[int, dict]:
+    """Scenario count and Karate validation for a batch item (runs on the task executor)"""
+    return parse_karate_feature(output).scenario_count(), validation or validate_karate_syntax(output)
+
+async def run_batch_item(batch_id: str, index: int, item: dict, defaults: dict, semaphore: asyncio.Semaphore,
+                         shared_results: Dict[str, asyncio.Future], entry: dict) -> Optional[str]:
+    """
+    Generate one batch document through the job queue; identical documents share one generation.
+    Progress is recorded on entry (the item's status record in the batch task); returns the feature text.
+    """
+    if item.get("error"):
+        entry.update(status="failed", error=item["error"])
+        return None
+    operation = item.get("operation") or defaults["operation"]
+    api_context = build_batch_api_context(
+        item.get("apiEndpoint") or defaults["apiEndpoint"],
+        item.get("apiMethod") or defaults["apiMethod"],
+        defaults["acceptHeader"]
+    )
+    job = {
+        "requirement_text": item["requirement_text"],
+        "operation": operation,
+        "api_context": api_context,
+        "analysis": item.get("analysis"),
+        "batch_id": batch_id
+    }
+
+    started = time.time()
+    key = GenerationCache.make_key(job["requirement_text"], operation, api_context, "batch")
+    shared = shared_results.get(key)
+    if shared is not None:
+        task = await shared
+        entry["duplicate_of"] = task.get("batch_task_id")
+    else:
+        shared = asyncio.get_running_loop().create_future()
+        shared_results[key] = shared
+        try:
+            async with semaphore:
+                waiter = None
+                while not is_task_cancelled(batch_id):
+                    try:
+                        waiter = submit_generation_job(entry["task_id"], job)
+                        break
+                    except asyncio.QueueFull:
+                        # Other clients filled the queue - wait for room rather than failing the item
+                        await asyncio.sleep(1)
+                if waiter is None:
+                    task = {"status": "cancelled", "error": "Batch was cancelled before this document was queued"}
+                else:
+                    entry["status"] = "processing"
+                    task = await waiter
+            task = {**task, "batch_task_id": entry["task_id"]}
+        except BaseException as e:
+            task = {"status": "failed", "error": str(e), "batch_task_id": entry["task_id"]}
+            shared.set_result(task)
+            raise
+        shared.set_result(task)
+
+    output = None
+    if task.get("status") == "completed":
+        output = task["output"]
+        entry["scenario_count"], entry["validation"] = await asyncio.get_running_loop().run_in_executor(
+            task_executor, summarize_batch_output, output, task.get("validation")
+        )
+        entry["generation_method"] = task.get("generation_method")
+        entry["token_usage"] = task.get("token_usage")
+    else:
+        entry["error"] = task.get("error") or "Generation failed"
+    entry["seconds"] = round(time.time() - started, 2)
+    entry["status"] = task.get("status") or "failed"
+    return output
+
+def write_batch_archive(batch_id: str, entries: List[dict], outputs: List[Optional[str]], started: datetime) -> str:
+    """Write the .feature files and manifest.json to a temporary zip file and return its path"""
+    used = set()
+    manifest_items = []
+    fd, path = tempfile.mkstemp(prefix=f"batch_{batch_id}_", suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, (entry, output) in enumerate(zip(entries, outputs)):
+            if output is not None:
+                entry["file"] = batch_feature_filename(entry["name"], index, used)
+                archive.writestr(entry["file"], output)
+            manifest_items.append(entry)
+        manifest = {
+            "batch_id": batch_id,
+            "started_at": started.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "total": len(entries),
+            "completed": sum(1 for entry in entries if entry["status"] == "completed"),
+            "failed": sum(1 for entry in entries if entry["status"] != "completed"),
+            "items": manifest_items
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return path
+
+async def run_generation_batch(batch_id: str, items: List[dict], defaults: dict):
+    """Generate every batch item, keep the batch task's per-item status current, then write the zip"""
+    batch = active_tasks[batch_id]
+    entries = batch["items"]
+    semaphore = asyncio.Semaphore(max(1, GENERATION_BATCH_CONCURRENCY))
+    shared_results: Dict[str, asyncio.Future] = {}
+
+    async def run_item(index: int, item: dict) -> Optional[str]:
+        try:
+            return await run_batch_item(batch_id, index, item, defaults, semaphore, shared_results, entries[index])
+        except Exception as e:
+            entries[index].update(status="failed", error=str(e))
+            return None
+        finally:
+            batch["finished"] = sum(1 for entry in entries if entry["status"] in FINISHED_TASK_STATUSES)
+            batch["completed"] = sum(1 for entry in entries if entry["status"] == "completed")
+            batch["progress"] = int(batch["finished"] * 100 / len(entries))
+            batch["stage"] = f"{batch['finished']}/{len(entries)} documents finished"
+
+    outputs = await asyncio.gather(*[run_item(index, item) for index, item in enumerate(items)])
+    print(f">>> Batch {batch_id} finished: {batch['completed']}/{len(entries)} documents generated "
+          f"in {(datetime.now() - batch['start_time']).total_seconds():.1f}s")
+
+    try:
+        batch_archives[batch_id] = await asyncio.get_running_loop().run_in_executor(
+            task_executor, write_batch_archive, batch_id, [dict(entry) for entry in entries], outputs, batch["start_time"]
+        )
+    except Exception as e:
+        print(f">>> Batch {batch_id}: failed to write archive: {str(e)}")
+        batch.update(status="failed", error=f"Failed to write archive: {str(e)}", finished_at=datetime.now())
+        return
+    batch["status"] = "cancelled" if batch.get("cancelled") else "completed"
+    batch["finished_at"] = datetime.now()
+    batch["download_url"] = f"/generate-test-cases/batch/{batch_id}/download"
+
+@app.post("/generate-test-cases/batch")
+async def generate_test_cases_batch(
+    files: List[UploadFile] = File(...),
+    operation: str = Form(...),
+    apiEndpoint: str = Form(None),
+    apiMethod: str = Form(None),
+    acceptHeader: str = Form(None),
+    batch_id: str = Form(None)
+):
+    """
+    Queue feature generation for many requirement documents. Accepts plain documents, zip archives
+    and JSONL files; returns the batch task ID immediately. Poll /task-status for per-document status,
+    then fetch the zip (one .feature file per document and a manifest.json) from the download URL.
+    """
+    if not batch_id:
+        batch_id = str(uuid.uuid4())
+    print(f">>> generate-test-cases/batch called with batch ID: {batch_id} ({len(files)} upload(s))")
+
+    items = await collect_batch_items(files)
+    if not items:
+        return JSONResponse({"error": "No requirement documents found in the upload"}, status_code=400)
+    if len(items) > GENERATION_BATCH_MAX_ITEMS:
+        return JSONResponse(
+            {"error": f"Batch has {len(items)} documents; the limit is {GENERATION_BATCH_MAX_ITEMS}"},
+            status_code=413
+        )
+
+    defaults = {"operation": operation, "apiEndpoint": apiEndpoint, "apiMethod": apiMethod, "acceptHeader": acceptHeader}
+    prune_finished_tasks()
+    active_tasks[batch_id] = {
+        "status": "processing",
+        "start_time": datetime.now(),
+        "cancelled": False,
+        "type": "test-generation-batch",
+        "progress": 0,
+        "stage": f"0/{len(items)} documents finished",
+        "total": len(items),
+        "finished": 0,
+        "completed": 0,
+        "items": [{"name": item["name"], "task_id": f"{batch_id}-{index + 1}", "status": "queued"}
+                  for index, item in enumerate(items)],
+        "download_url": None,
+        "error": None
+    }
+    batch_runs[batch_id] = asyncio.create_task(run_generation_batch(batch_id, items, defaults))
+    batch_runs[batch_id].add_done_callback(lambda _: batch_runs.pop(batch_id, None))
+
+    return JSONResponse({
+        "task_id": batch_id,
+        "status": "processing",
+        "total": len(items),
+        "status_url": f"/task-status/{batch_id}",
+        "stream_url": f"/task-stream/{batch_id}",
+        "download_url": f"/generate-test-cases/batch/{batch_id}/download"
+    }, status_code=202)
+
+@app.get("/generate-test-cases/batch/{batch_id}/download")
+async def download_batch_archive(batch_id: str):
+    """Return the zip for a finished batch; 409 while documents are still generating"""
+    prune_finished_tasks()
+    batch = active_tasks.get(batch_id)
+    if batch is None or batch.get("type") != "test-generation-batch":
+        return JSONResponse({"error": "Batch not found or expired", "task_id": batch_id}, status_code=404)
+    path = batch_archives.get(batch_id)
+    if path is None:
+        return JSONResponse({
+            "error": batch.get("error") or "Batch is still generating",
+            "task_id": batch_id,
+            "status": batch["status"],
+            "progress": batch["progress"]
+        }, status_code=500 if batch["status"] == "failed" else 409)
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"feature_batch_{batch['start_time'].strftime('%Y%m%d_%H%M%S')}.zip",
+        headers={"X-Batch-Id": batch_id}
+    )
+
+async def run_generation_job(task_id: str, job: dict):
+    """Run the three-tier generation pipeline for a queued job and record the outcome on its task"""
+    requirement_text = job["requirement_text"]
+    operation = job["operation"]
+    api_context = job["api_context"]
+    update_task(task_id, status="processing", progress=5, stage="Analyzing requirements")
+
     # Build prompt for Karate DSL test cases
     prompt = (
         "You are a professional Karate DSL test case generator specializing in API testing. "
@@ -491,84 +1912,151 @@ async def generate_test_cases(
     )
     print(">>> Sending prompt to LLM (first 100 chars):", prompt[:100])
     
-    # Enhanced requirement analysis for better test generation
+    # Enhanced requirement analysis for better test generation - analyzed once and shared by every stage
     print(">>> Analyzing requirements for comprehensive coverage...")
-    enhanced_requirements = enhance_requirement_analysis(requirement_text, api_context)
+    loop = asyncio.get_running_loop()
+    analysis = job.get("analysis")
+    if analysis is None:
+        analysis = await loop.run_in_executor(task_executor, analyze_requirements, requirement_text)
     
     # Build a structured context for the model with enhanced analysis
-    model_context = build_model_context(enhanced_requirements, api_context, operation)
+    model_context = build_generation_context(requirement_text, api_context, operation, analysis)
     print(">>> Enhanced model context prepared")
     print(">>> Sending enhanced prompt to LLM (first 100 chars):", model_context["user_prompt"][:100])
+    update_task(task_id, progress=10, stage="Model context prepared")
 
     try:
-        # Add a test delay to allow time for cancellation testing
-        print(">>> Starting generation process - 5 second delay for cancellation testing...")
-        for i in range(5):
-            time.sleep(1)
-            print(f">>> Generation progress: {i+1}/5 seconds...")
-            if active_tasks.get(task_id, {}).get("cancelled", False):
-                active_tasks.pop(task_id, None)
-                return JSONResponse({"error": "Task was cancelled during initial delay", "task_id": task_id}, status_code=499)
+        # Optional test delay to allow time for cancellation testing
+        if GENERATION_TEST_DELAY_SECONDS:
+            print(f">>> Starting generation process - {GENERATION_TEST_DELAY_SECONDS} second delay for cancellation testing...")
+        for i in range(GENERATION_TEST_DELAY_SECONDS):
+            await asyncio.sleep(1)
+            print(f">>> Generation progress: {i+1}/{GENERATION_TEST_DELAY_SECONDS} seconds...")
+            update_task(task_id, progress=10 + (i + 1) * 25 // GENERATION_TEST_DELAY_SECONDS,
+                        stage=f"Preparing generation ({i+1}/{GENERATION_TEST_DELAY_SECONDS})")
+            if is_task_cancelled(task_id):
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled during initial delay")
+                return
         
         # Check if task was cancelled before starting generation
-        if active_tasks.get(task_id, {}).get("cancelled", False):
-            active_tasks.pop(task_id, None)
-            return JSONResponse({"error": "Task was cancelled", "task_id": task_id}, status_code=499)
+        if is_task_cancelled(task_id):
+            finish_generation_task(task_id, "cancelled", error="Task was cancelled")
+            return
             
         response_text = ""
         generation_method = ""
+        generation_tier = None
+        update_task(task_id, progress=40, stage="Generating test cases")
+
+        # Identical requests for the same model are answered from the generation cache
+        cached = None
+        if generation_cache is not None:
+            cache_key = generation_cache.make_key(
+                requirement_text, operation, api_context, generation_tier_key(primary_generation_tier())
+            )
+            cached = await loop.run_in_executor(task_executor, generation_cache.get, cache_key)
+
+        # Stream sanitized lines to pollers and SSE subscribers as the selected tier produces tokens
+        stream_sanitizer = StreamingSanitizer()
+
+        async def on_token(text: str):
+            # Nothing more is published once /cancel-task has flagged the task
+            if not is_task_cancelled(task_id):
+                publish_generated_text(task_id, stream_sanitizer.feed(text))
+
+        def restart_stream(reason: str):
+            """Discard text streamed by a tier that failed part-way through"""
+            nonlocal stream_sanitizer
+            stream_sanitizer = StreamingSanitizer()
+            update_task(task_id, partial_output="", scenario_count=0)
+            publish_task_event(task_id, "reset", {"reason": reason})
         
         # Smart three-tier fallback system: OpenAI API → Local Llama → Enhanced Local Generation
+        # Tier 1 is skipped while the OpenAI circuit breaker is open
+        openai_status = openai_health.status
+        
+        # Documents too large for one prompt of the primary LLM tier are generated section by section
+        sections = []
+        primary_tier = primary_generation_tier()
+        if not cached and primary_tier != "mock":
+            sections = await loop.run_in_executor(
+                task_executor, plan_requirement_sections, requirement_text, api_context, operation, analysis, primary_tier
+            )
         
-        if use_openai and openai_client and openai_status == "active":
+        if cached:
+            print(f">>> ♻️ Generation cache hit - reusing output from {cached['generation_method']}")
+            response_text = cached["output"]
+            generation_method = f"{cached['generation_method']} - Cached"
+
+        elif len(sections) > 1:
+            print(f">>> 🧩 Requirement document split into {len(sections)} sections for {primary_tier} generation")
+            update_task(task_id, stage=f"Generating {len(sections)} sections")
+            sectioned = await generate_sectioned_test_cases(task_id, sections, operation, api_context)
+            if sectioned is None:
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled during sectioned generation")
+                return
+            response_text, generation_method, generation_tier = sectioned
+            print(f">>> ✅ Merged {len(sections)} sections into {len(response_text)} characters ({generation_method})")
+
+        elif async_openai_client is not None and openai_health.allow_request():
             print(">>> 🔥 Tier 1: Using OpenAI API for test case generation...")
             
             # Check if task was cancelled before OpenAI call
-            if active_tasks.get(task_id, {}).get("cancelled", False):
-                active_tasks.pop(task_id, None)
-                return JSONResponse({"error": "Task was cancelled during OpenAI generation", "task_id": task_id}, status_code=499)
+            if is_task_cancelled(task_id):
+                openai_health.release_trial()
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled during OpenAI generation")
+                return
                 
             try:
-                response_text = generate_test_cases_with_openai(model_context, openai_client)
+                openai_started = time.time()
+                try:
+                    response_text = await generate_test_cases_with_openai(model_context, async_openai_client, on_token, task_id)
+                except Exception as openai_call_error:
+                    failure = classify_openai_error(openai_call_error)
+                    openai_health.record_failure(failure["status"], failure["message"], time.time() - openai_started)
+                    raise
+                openai_health.record_success(time.time() - openai_started)
                 # Sanitize the response from OpenAI
                 if response_text:
                     print(">>> Sanitizing OpenAI response...")
                     response_text = sanitize_ai_response(response_text)
 
                 generation_method = "OpenAI API (Tier 1)"
+                generation_tier = "openai"
                 print(f">>> ✅ OpenAI API successfully generated {len(response_text)} characters")
             except Exception as openai_error:
                 print(f">>> ❌ OpenAI API failed during generation: {openai_error}")
+                restart_stream("OpenAI API failed, falling back")
                 print(">>> 🔄 Falling back to Tier 2: Local Llama model...")
                 
                 if llm is not None:
                     # Check if task was cancelled before Llama generation
-                    if active_tasks.get(task_id, {}).get("cancelled", False):
-                        active_tasks.pop(task_id, None)
-                        return JSONResponse({"error": "Task was cancelled during Llama generation", "task_id": task_id}, status_code=499)
+                    if is_task_cancelled(task_id):
+                        finish_generation_task(task_id, "cancelled", error="Task was cancelled during Llama generation")
+                        return
                         
                     try:
-                        prompt = f"{model_context['system_prompt']}\n\n{model_context['user_prompt']}"
-                        response = llm.create_completion(
-                            prompt=prompt,
-                            max_tokens=2048,
-                            temperature=0.7,
-                            top_p=0.9
-                        )
-                        raw_response = response["choices"][0]["text"]
-                        response_text = sanitize_ai_response(raw_response) # Sanitize here
+                        response_text = await generate_test_cases_with_llama(model_context, on_token, task_id)
                         generation_method = "Local Llama Model (Tier 2 - OpenAI Fallback)"
+                        generation_tier = "llama"
                         print(f">>> ✅ Local Llama model generated {len(response_text)} characters")
                     except Exception as llama_error:
                         print(f">>> ❌ Local Llama model failed: {llama_error}")
+                        restart_stream("Local Llama model failed, falling back")
                         print(">>> 🔄 Falling back to Tier 3: Enhanced local generation...")
-                        response_text = generate_mock_test_cases(requirement_text, operation, api_context)
+                        response_text = await loop.run_in_executor(
+                            task_executor, generate_mock_test_cases, requirement_text, operation, api_context, analysis
+                        )
                         generation_method = "Enhanced Local Generation (Tier 3 - Full Fallback)"
+                        generation_tier = "mock"
                         print(f">>> ✅ Enhanced local generation completed: {len(response_text)} characters")
                 else:
                     print(">>> 🔄 Local Llama not available, falling back to Tier 3: Enhanced local generation...")
-                    response_text = generate_mock_test_cases(requirement_text, operation, api_context)
+                    response_text = await loop.run_in_executor(
+                        task_executor, generate_mock_test_cases, requirement_text, operation, api_context, analysis
+                    )
                     generation_method = "Enhanced Local Generation (Tier 3 - No Llama)"
+                    generation_tier = "mock"
                     print(f">>> ✅ Enhanced local generation completed: {len(response_text)} characters")
                 
         elif llm is not None:
@@ -576,36 +2064,48 @@ async def generate_test_cases(
             print(f">>> ℹ️ OpenAI API status: {openai_status} - using Local Llama as primary")
             
             # Check if task was cancelled before primary Llama generation
-            if active_tasks.get(task_id, {}).get("cancelled", False):
-                active_tasks.pop(task_id, None)
-                return JSONResponse({"error": "Task was cancelled during primary Llama generation", "task_id": task_id}, status_code=499)
+            if is_task_cancelled(task_id):
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled during primary Llama generation")
+                return
                 
             try:
-                prompt = f"{model_context['system_prompt']}\n\n{model_context['user_prompt']}"
-                response = llm.create_completion(
-                    prompt=prompt,
-                    max_tokens=2048,
-                    temperature=0.7,
-                    top_p=0.9
-                )
-                raw_response = response["choices"][0]["text"]
-                response_text = sanitize_ai_response(raw_response) # Sanitize here
+                response_text = await generate_test_cases_with_llama(model_context, on_token, task_id)
                 generation_method = f"Local Llama Model (Tier 2 - OpenAI {openai_status})"
+                generation_tier = "llama"
                 print(f">>> ✅ Local Llama model generated {len(response_text)} characters")
             except Exception as llama_error:
                 print(f">>> ❌ Local Llama model failed: {llama_error}")
+                restart_stream("Local Llama model failed, falling back")
                 print(">>> 🔄 Falling back to Tier 3: Enhanced local generation...")
-                response_text = generate_mock_test_cases(requirement_text, operation, api_context)
+                response_text = await loop.run_in_executor(
+                    task_executor, generate_mock_test_cases, requirement_text, operation, api_context, analysis
+                )
                 generation_method = "Enhanced Local Generation (Tier 3 - Llama Fallback)"
+                generation_tier = "mock"
                 print(f">>> ✅ Enhanced local generation completed: {len(response_text)} characters")
             
         else:
             print(">>> 🔥 Tier 3: Using Enhanced Local Generation...")
             print(f">>> ℹ️ OpenAI API status: {openai_status}, Local Llama: {'Available' if llm else 'Not Available'}")
-            response_text = generate_mock_test_cases(requirement_text, operation, api_context)
+            response_text = await loop.run_in_executor(
+                task_executor, generate_mock_test_cases, requirement_text, operation, api_context, analysis
+            )
             generation_method = "Enhanced Local Generation (Tier 3 - Primary)"
+            generation_tier = "mock"
             print(f">>> ✅ Enhanced local generation completed: {len(response_text)} characters")
-        
+
+        # The task may have been cancelled while the selected tier was running - publish nothing more
+        if is_task_cancelled(task_id):
+            finish_generation_task(task_id, "cancelled", error="Task was cancelled during generation")
+            return
+
+        # Emit the last buffered line of a streamed tier; Tier 3 output arrives in one piece
+        publish_generated_text(task_id, stream_sanitizer.flush())
+        if not active_tasks.get(task_id, {}).get("partial_output"):
+            publish_generated_text(task_id, response_text)
+        update_task(task_id, progress=80, stage="Validating generated test cases",
+                    partial_output=response_text, generation_method=generation_method)
+
         # Add generation method info to response
         response_header = f"# Generated using: {generation_method}\n"
         if openai_status != "active" and openai_status != "not_configured":
@@ -616,10 +2116,29 @@ async def generate_test_cases(
         
         # Validate generated test cases for proper Karate DSL syntax
         print(">>> Validating generated test cases...")
-        validation_result = validate_karate_syntax(response_text)
+        validation_result = await loop.run_in_executor(task_executor, validate_karate_syntax, response_text)
+        
+        # Fix what can be fixed before returning, instead of making the user regenerate everything
+        repairs = []
+        if not validation_result["is_valid"] and KARATE_REPAIR_ENABLED:
+            update_task(task_id, progress=85, stage="Repairing invalid scenarios")
+            response_text, validation_result, repairs = await repair_generated_feature(
+                response_text, validation_result, generation_tier, api_context, task_id
+            )
+            if is_task_cancelled(task_id):
+                finish_generation_task(task_id, "cancelled", error="Task was cancelled during repair")
+                return
+        
+        # The header lines are never touched by the repair, so the cache keeps the repaired body
+        if generation_cache is not None and generation_tier and len(response_text) > len(response_header):
+            await loop.run_in_executor(
+                task_executor, generation_cache.put,
+                generation_cache.make_key(requirement_text, operation, api_context, generation_tier_key(generation_tier)),
+                response_text[len(response_header):], generation_method
+            )
         
         if not validation_result["is_valid"]:
-            print(f">>> Warning: Generated test cases have syntax issues:")
+            print(">>> Warning: Generated test cases have syntax issues:")
             for error in validation_result["errors"]:
                 print(f"    ERROR: {error}")
         
@@ -633,43 +2152,46 @@ async def generate_test_cases(
             for suggestion in validation_result["suggestions"]:
                 print(f"    SUGGESTION: {suggestion}")
         
-        # Save the response to a file in the workspace
-        save_response_to_file(response_text, requirement_text, api_context, operation)
-        
-        # Mark task as completed and clean up
-        active_tasks.pop(task_id, None)
+        # Save the response to a file in the workspace (file I/O stays off the event loop);
+        # batch documents go into the batch zip instead
+        if not job.get("batch_id"):
+            update_task(task_id, progress=90, stage="Saving generated feature file")
+            await loop.run_in_executor(
+                task_executor, save_response_to_file, response_text, requirement_text, api_context, operation, analysis,
+                validation_result
+            )
         
-        return JSONResponse({
-            "output": response_text,
-            "task_id": task_id,
-            "generation_method": generation_method
-        })
+        # Mark task as completed; the record stays pollable until TASK_RESULT_TTL_SECONDS
+        finish_generation_task(task_id, "completed", output=response_text, generation_method=generation_method,
+                               validation=validation_result, repairs=repairs, stage="Completed")
     except Exception as e:
         print(">>> Error from LLM:", str(e))
-        # Clean up task on error
-        active_tasks.pop(task_id, None)
-        return JSONResponse({"error": str(e), "task_id": task_id}, status_code=500)
+        finish_generation_task(task_id, "failed", error=str(e), stage="Failed")
+
+# Static for every request, so the local model can keep it evaluated (see LlamaPrefixCache)
+KARATE_SYSTEM_PROMPT = (
+    "You are a world-class software engineer and professional Karate DSL test case generator with expertise in comprehensive requirement analysis. "
+    "Your mission is to analyze requirements documents thoroughly and generate complete, executable Karate feature files that provide 100% test coverage. "
+    "You must be meticulous, analytical, and ensure no requirement goes untested. "
+    "CRITICAL KARATE DSL RULES: "
+    "1. NEVER mix JSON objects with Karate DSL syntax "
+    "2. NEVER use lines like '* request {\"method\": \"GET\", \"expectedStatus\": 404}' "
+    "3. Use ONLY pure Karate DSL: Given path '', When method GET, Then status 200 "
+    "4. For request bodies use: * def requestBody = {...} followed by * request requestBody "
+    "5. Ensure perfect spelling and grammar in all text "
+    "6. Never hallucinate or assume requirements not explicitly stated "
+    "7. Base ALL test cases on actual documented requirements "
+    "8. Ensure proper Karate DSL syntax with executable scenarios "
+    "9. Generate both positive and negative test cases as specified "
+    "10. Include comprehensive validation for all identified requirements"
+)
 
-def build_model_context(requirement_text: str, api_context: str, operation: str) -> dict:
+def build_model_context(requirement_text: str, api_context: str, operation: str, section: Optional[Tuple[int, int]] = None) -> dict:
     """
     Implements an enhanced "Model Context Protocol" for comprehensive requirement analysis and test generation.
+    `section` is (number, total) when the document is generated section by section.
     """
-    system_prompt = (
-        "You are a world-class software engineer and professional Karate DSL test case generator with expertise in comprehensive requirement analysis. "
-        "Your mission is to analyze requirements documents thoroughly and generate complete, executable Karate feature files that provide 100% test coverage. "
-        "You must be meticulous, analytical, and ensure no requirement goes untested. "
-        "CRITICAL KARATE DSL RULES: "
-        "1. NEVER mix JSON objects with Karate DSL syntax "
-        "2. NEVER use lines like '* request {\"method\": \"GET\", \"expectedStatus\": 404}' "
-        "3. Use ONLY pure Karate DSL: Given path '', When method GET, Then status 200 "
-        "4. For request bodies use: * def requestBody = {...} followed by * request requestBody "
-        "5. Ensure perfect spelling and grammar in all text "
-        "6. Never hallucinate or assume requirements not explicitly stated "
-        "7. Base ALL test cases on actual documented requirements "
-        "8. Ensure proper Karate DSL syntax with executable scenarios "
-        "9. Generate both positive and negative test cases as specified "
-        "10. Include comprehensive validation for all identified requirements"
-    )
+    system_prompt = KARATE_SYSTEM_PROMPT
 
     user_prompt = (
         f"COMPREHENSIVE REQUIREMENT ANALYSIS AND TEST GENERATION\n\n"
@@ -692,6 +2214,14 @@ def build_model_context(requirement_text: str, api_context: str, operation: str)
         f"4. MAP each identified requirement to specific test scenarios\n"
         f"5. ENSURE 100% coverage of all documented requirements\n\n"
         
+    )
+    if section:
+        user_prompt += (
+            f"DOCUMENT SECTION {section[0]} OF {section[1]}:\n"
+            f"The requirement document above is one section of a larger document. "
+            f"Generate scenarios ONLY for the requirements in this section; the other sections are handled separately.\n\n"
+        )
+    user_prompt += (
         f"TEST CASE GENERATION FOCUS: {operation.upper()}\n"
         f"- If 'POSITIVE': Focus on happy path scenarios and valid use cases\n"
         f"- If 'NEGATIVE': Focus on error conditions, invalid inputs, and failure scenarios\n"
@@ -713,25 +2243,25 @@ def build_model_context(requirement_text: str, api_context: str, operation: str)
         )
 
     user_prompt += (
-        f"GENERATE COMPREHENSIVE KARATE FEATURE FILE:\n"
-        f"Create a complete .feature file that includes:\n"
-        f"- Feature description reflecting the analyzed requirements\n"
-        f"- Background section with proper setup and configuration\n"
-        f"- Multiple test scenarios covering ALL identified requirements\n"
-        f"- Proper Given-When-Then structure with Karate DSL syntax\n"
-        f"- Data validation using 'match' assertions\n"
-        f"- Error handling and boundary condition tests\n"
-        f"- Authentication/authorization tests where applicable\n"
-        f"- Performance validation where specified\n\n"
-        
-        f"VALIDATION REQUIREMENTS:\n"
-        f"- Each scenario must test a specific requirement from the document\n"
-        f"- Use proper Karate syntax: Given path, When method, Then status, And match\n"
-        f"- Include request/response validation appropriate to the requirement\n"
-        f"- Add comments linking test scenarios to specific requirements\n"
-        f"- Ensure all test cases are executable and realistic\n\n"
-        
-        f"OUTPUT: Complete Karate .feature file ready for execution, with comprehensive coverage of all analyzed requirements."
+        "GENERATE COMPREHENSIVE KARATE FEATURE FILE:\n"
+        "Create a complete .feature file that includes:\n"
+        "- Feature description reflecting the analyzed requirements\n"
+        "- Background section with proper setup and configuration\n"
+        "- Multiple test scenarios covering ALL identified requirements\n"
+        "- Proper Given-When-Then structure with Karate DSL syntax\n"
+        "- Data validation using 'match' assertions\n"
+        "- Error handling and boundary condition tests\n"
+        "- Authentication/authorization tests where applicable\n"
+        "- Performance validation where specified\n\n"
+        
+        "VALIDATION REQUIREMENTS:\n"
+        "- Each scenario must test a specific requirement from the document\n"
+        "- Use proper Karate syntax: Given path, When method, Then status, And match\n"
+        "- Include request/response validation appropriate to the requirement\n"
+        "- Add comments linking test scenarios to specific requirements\n"
+        "- Ensure all test cases are executable and realistic\n\n"
+        
+        "OUTPUT: Complete Karate .feature file ready for execution, with comprehensive coverage of all analyzed requirements."
     )
 
     return {
@@ -739,249 +2269,609 @@ def build_model_context(requirement_text: str, api_context: str, operation: str)
         "user_prompt": user_prompt
     }
 
-def analyze_requirements(requirement_text: str) -> dict:
+# Keywords that indicate different types of requirements, matched as plain substrings of the lowercased line
+REQUIREMENT_KEYWORD_CLASSES = {
+    "functional_requirements": ['must', 'should', 'shall', 'will', 'can', 'able to', 'create', 'update', 'delete', 'retrieve'],
+    "validation_points": ['validate', 'verify', 'check', 'ensure', 'confirm', 'required', 'mandatory', 'optional'],
+    "business_rules": ['business rule', 'constraint', 'limit', 'maximum', 'minimum', 'not exceed'],
+    "error_conditions": ['error', 'fail', 'invalid', 'unauthorized', 'forbidden', 'not found', 'exception'],
+    "integration_points": ['api', 'endpoint', 'service', 'database', 'external', 'integration'],
+    "data_requirements": ['field', 'parameter', 'input', 'output', 'response', 'request', 'data'],
+    # Lines that are clearly documentation headers or section titles are skipped
+    "section_header": ['exception handling', 'business logic', 'precondition', 'flow & steps', 'validation rules', 'user interface']
+}
+REQUIREMENT_SUMMARY_ACTION_WORDS = ('must', 'should', 'will', 'shall', 'can', 'may', 'able', 'create', 'update', 'delete', 'manage', 'validate', 'display', 'handle')
+
+def _build_requirement_keyword_matcher():
     """
-    Analyze requirements document to extract clean, concise testable conditions.
-    This function identifies key requirements and creates focused summaries for test generation.
+    Compile every keyword into one alternation (longest first) inside a lookahead, so a single
+    scan reports a match at every position, including overlapping ones ("invalidate" holds both
+    "invalid" and "validate"). Each keyword maps to the classes of every keyword it contains
+    ("database" also counts as "data"), giving the same classes as checking each keyword separately.
     """
-    analysis = {
-        "functional_requirements": [],
-        "validation_points": [],
-        "business_rules": [],
-        "error_conditions": [],
-        "integration_points": [],
-        "data_requirements": []
+    keyword_classes = {}
+    for category, keywords in REQUIREMENT_KEYWORD_CLASSES.items():
+        for keyword in keywords:
+            keyword_classes.setdefault(keyword, set()).add(category)
+    classes_by_keyword = {
+        keyword: frozenset().union(*(keyword_classes[other] for other in keyword_classes if other in keyword))
+        for keyword in keyword_classes
     }
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keyword_classes, key=len, reverse=True))
+    pattern = re.compile(f"(?=({alternation}))")
+    return pattern, classes_by_keyword
+
+REQUIREMENT_KEYWORD_PATTERN, REQUIREMENT_CLASSES_BY_KEYWORD = _build_requirement_keyword_matcher()
+REQUIREMENT_CATEGORIES = tuple(category for category in REQUIREMENT_KEYWORD_CLASSES if category != "section_header")
+# Callers use at most the first 10 items of a bucket, so the scan stops once every bucket is full
+REQUIREMENT_ANALYSIS_MAX_ITEMS = 10
+BULLET_PREFIX_PATTERN = re.compile(r'^[*\-•]\s*')
+NUMBERING_PREFIX_PATTERN = re.compile(r'^\d+[\.\)]\s*')
+
+@dataclass(frozen=True)
+class RequirementAnalysis:
+    """Result of analyze_requirements; buckets are tuples so one analysis can be shared by every stage of a request"""
+    functional_requirements: Tuple[str, ...] = ()
+    validation_points: Tuple[str, ...] = ()
+    business_rules: Tuple[str, ...] = ()
+    error_conditions: Tuple[str, ...] = ()
+    integration_points: Tuple[str, ...] = ()
+    data_requirements: Tuple[str, ...] = ()
+    capped: bool = False  # True when the scan stopped early because every bucket was full
+
+    def __getitem__(self, category: str) -> Tuple[str, ...]:
+        # Keeps analysis['functional_requirements'] style lookups working
+        return getattr(self, category)
+
+    def count_label(self, category: str) -> str:
+        """Item count for reports, e.g. "10+" when the bucket was capped"""
+        count = len(self[category])
+        return f"{count}+" if count >= REQUIREMENT_ANALYSIS_MAX_ITEMS else str(count)
+
+def extract_clean_summary(line: str, max_length: int = 100) -> str:
+    """Extract a clean, focused summary from a requirement line"""
+    cleaned = line.strip()
     
-    # Convert to lowercase for keyword matching
-    lines = requirement_text.split('\n')
+    # Remove bullet points and numbering
+    cleaned = BULLET_PREFIX_PATTERN.sub('', cleaned)
+    cleaned = NUMBERING_PREFIX_PATTERN.sub('', cleaned)
     
-    # Keywords that indicate different types of requirements
-    functional_keywords = ['must', 'should', 'shall', 'will', 'can', 'able to', 'create', 'update', 'delete', 'retrieve']
-    validation_keywords = ['validate', 'verify', 'check', 'ensure', 'confirm', 'required', 'mandatory', 'optional']
-    business_keywords = ['business rule', 'constraint', 'limit', 'maximum', 'minimum', 'not exceed']
-    error_keywords = ['error', 'fail', 'invalid', 'unauthorized', 'forbidden', 'not found', 'exception']
-    integration_keywords = ['api', 'endpoint', 'service', 'database', 'external', 'integration']
-    data_keywords = ['field', 'parameter', 'input', 'output', 'response', 'request', 'data']
+    # Check if it's likely a section header (short, no action words)
+    word_count = len(cleaned.split())
+    if word_count <= 3 and not any(action in cleaned.lower() for action in REQUIREMENT_SUMMARY_ACTION_WORDS):
+        return ""  # Skip section headers like "Exception Handling"
     
-    def extract_clean_summary(line: str, max_length: int = 100) -> str:
-        """Extract a clean, focused summary from a requirement line"""
-        cleaned = line.strip()
-        
-        # Remove bullet points and numbering
-        cleaned = re.sub(r'^[*\-•]\s*', '', cleaned)
-        cleaned = re.sub(r'^\d+[\.\)]\s*', '', cleaned)
-        
-        # Check if it's likely a section header (short, no action words)
-        word_count = len(cleaned.split())
-        if word_count <= 3 and not any(action in cleaned.lower() for action in 
-                                      ['must', 'should', 'will', 'shall', 'can', 'may', 'able', 'create', 'update', 'delete', 'manage', 'validate', 'display', 'handle']):
-            return ""  # Skip section headers like "Exception Handling"
-        
-        # Remove excessive whitespace and special characters
-        cleaned = ' '.join(cleaned.split())
-        
-        # Truncate to reasonable length
-        if len(cleaned) > max_length:
-            cleaned = cleaned[:max_length] + "..."
-        return cleaned
+    # Remove excessive whitespace and special characters
+    cleaned = ' '.join(cleaned.split())
     
-    for line in lines:
+    # Truncate to reasonable length
+    if len(cleaned) > max_length:
+        cleaned = cleaned[:max_length] + "..."
+    return cleaned
+
+class RequirementAnalyzer:
+    """
+    Incremental requirement analysis: feed lines as they arrive (e.g. while an upload is being read)
+    and call result() at the end. Each line is classified by a single scan of the compiled keyword
+    pattern. Buckets are insertion-ordered dicts used as sets and hold at most
+    REQUIREMENT_ANALYSIS_MAX_ITEMS items; once every bucket is full further lines are ignored.
+    """
+
+    def __init__(self):
+        self.buckets = {category: {} for category in REQUIREMENT_CATEGORIES}
+        self.open_categories = set(REQUIREMENT_CATEGORIES)
+        self.mentions_feed = False
+
+    @property
+    def complete(self) -> bool:
+        return not self.open_categories
+
+    def feed_line(self, line: str):
+        if not self.open_categories:
+            return
         line_stripped = line.strip()
         line_lower = line_stripped.lower()
+        if not self.mentions_feed and "feed" in line_lower:
+            self.mentions_feed = True
         
-        # Skip empty lines or very short lines
-        if not line_stripped or len(line_stripped) < 10:
-            continue
-            
-        # Skip lines that are too long (likely documentation blocks)
-        if len(line_stripped) > 300:
-            continue
-            
-        # Skip lines that are clearly documentation headers or section titles  
-        if any(header in line_lower for header in ['exception handling', 'business logic', 'precondition', 'flow & steps', 'validation rules', 'user interface']):
-            continue
-            
-        # Check for functional requirements (focused on actionable items)
-        if any(keyword in line_lower for keyword in functional_keywords):
-            if len(line_stripped) < 150:  # Only include concise requirements
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["functional_requirements"]:
-                    analysis["functional_requirements"].append(summary)
-        
-        # Check for validation points
-        if any(keyword in line_lower for keyword in validation_keywords):
-            if len(line_stripped) < 150:
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["validation_points"]:
-                    analysis["validation_points"].append(summary)
-            
-        # Check for business rules
-        if any(keyword in line_lower for keyword in business_keywords):
-            if len(line_stripped) < 150:
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["business_rules"]:
-                    analysis["business_rules"].append(summary)
-            
-        # Check for error conditions
-        if any(keyword in line_lower for keyword in error_keywords):
-            if len(line_stripped) < 150:
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["error_conditions"]:
-                    analysis["error_conditions"].append(summary)
-            
-        # Check for integration points
-        if any(keyword in line_lower for keyword in integration_keywords):
-            if len(line_stripped) < 150:
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["integration_points"]:
-                    analysis["integration_points"].append(summary)
-            
-        # Check for data requirements
-        if any(keyword in line_lower for keyword in data_keywords):
-            if len(line_stripped) < 150:
-                summary = extract_clean_summary(line_stripped)
-                if summary not in analysis["data_requirements"]:
-                    analysis["data_requirements"].append(summary)
-    
-    # If no specific requirements found, create generic ones based on overall context
-    if not analysis["functional_requirements"]:
-        if "feed" in requirement_text.lower():
-            analysis["functional_requirements"].append("Create and manage feed collections")
-        else:
-            analysis["functional_requirements"].append("Core API functionality")
-    
-    return analysis
+        # Skip empty or very short lines, and lines too long to be a concise requirement
+        # (lines of 150+ characters never make it into a bucket)
+        if len(line_stripped) < 10 or len(line_stripped) >= 150:
+            return
+        
+        categories = set()
+        for keyword in REQUIREMENT_KEYWORD_PATTERN.findall(line_lower):
+            categories |= REQUIREMENT_CLASSES_BY_KEYWORD[keyword]
+        if "section_header" in categories:
+            return
+        categories &= self.open_categories
+        if not categories:
+            return
+        
+        summary = extract_clean_summary(line_stripped)
+        for category in categories:
+            bucket = self.buckets[category]
+            bucket[summary] = None
+            if len(bucket) >= REQUIREMENT_ANALYSIS_MAX_ITEMS:
+                self.open_categories.discard(category)
+
+    def result(self) -> RequirementAnalysis:
+        functional_requirements = tuple(self.buckets["functional_requirements"])
+        # If no specific requirements found, create generic ones based on overall context
+        if not functional_requirements:
+            if self.mentions_feed:
+                functional_requirements = ("Create and manage feed collections",)
+            else:
+                functional_requirements = ("Core API functionality",)
+        buckets = {category: tuple(items) for category, items in self.buckets.items()}
+        buckets["functional_requirements"] = functional_requirements
+        return RequirementAnalysis(capped=self.complete, **buckets)
+
+def analyze_requirements(requirement_text: str) -> RequirementAnalysis:
+    """
+    Analyze requirements document to extract clean, concise testable conditions.
+    This function identifies key requirements and creates focused summaries for test generation.
+    """
+    analyzer = RequirementAnalyzer()
+    for line in requirement_text.split('\n'):
+        analyzer.feed_line(line)
+        if analyzer.complete:
+            break
+    return analyzer.result()
+
+KARATE_HTTP_METHODS = {"GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"}
+KARATE_REQUEST_OBJECT_KEYS = ('"method"', '"expectedStatus"', '"expected_status"', '"statusCode"')
+karate_validation_cache: "OrderedDict[str, dict]" = OrderedDict()
 
 def validate_karate_syntax(test_cases: str) -> dict:
     """
     Validate that generated test cases follow proper Karate DSL syntax.
     Returns validation results and suggestions for improvement.
+    Checks run on the parsed feature, so every error names its line and scenario;
+    results are cached per feature text alongside the parsed feature.
     """
+    feature = parse_karate_feature(test_cases)
+    with karate_ast_lock:
+        cached = karate_validation_cache.get(feature.digest)
+        if cached is not None:
+            karate_validation_cache.move_to_end(feature.digest)
+            return cached
+    validation_result = validate_karate_feature(feature)
+    with karate_ast_lock:
+        karate_validation_cache[feature.digest] = validation_result
+        while len(karate_validation_cache) > KARATE_AST_CACHE_ENTRIES:
+            karate_validation_cache.popitem(last=False)
+    return validation_result
+
+def is_karate_json_request_object(step: "KarateStep") -> bool:
+    """A 'request' step whose JSON describes the call itself (method, path, expected status) instead of its body"""
+    value = step.value.lstrip()
+    return value[:1] == "{" and any(key in value for key in KARATE_REQUEST_OBJECT_KEYS)
+
+def validate_karate_scenario(scenario: "KarateScenario", report):
+    """Per-scenario checks: a request is sent, its status is asserted, and step values are DSL rather than raw JSON"""
+    if not scenario.steps:
+        report("error", scenario.line, "Scenario has no steps", code="no_steps")
+        return
+    method_line = status_line = None
+    for step in scenario.background + scenario.steps:
+        templated = "<" in step.text
+        if step.action == "method":
+            if method_line is None:
+                method_line = step.line
+            if "{" in step.text or "[" in step.text:
+                report("error", step.line, "JSON in a method step; send the body with 'And request' first", code="json_method")
+            elif step.value not in KARATE_HTTP_METHODS and not templated:
+                report("error", step.line, f"Unknown HTTP method '{step.value}'", code="unknown_method")
+        elif step.action == "status":
+            if status_line is None:
+                status_line = step.line
+            if step.value is None and not templated:
+                report("error", step.line, "'Then status' needs a numeric HTTP status code", code="status_not_numeric")
+            elif method_line is None:
+                report("error", step.line, "Status is checked before 'When method' sends the request", code="status_before_method")
+        elif step.action == "request":
+            if not step.value.strip():
+                report("error", step.line, "'request' step has no payload", code="empty_request")
+            elif is_karate_json_request_object(step):
+                report("error", step.line, "JSON request object; describe the call with path, method and status steps",
+                       code="json_request_object")
+        elif step.action == "path" and "{" in step.value:
+            report("warning", step.line, "Path uses {placeholder}; pass variables as path segments, e.g. path 'orders', id",
+                   code="path_placeholder")
+        elif not step.action and step.value[:1] in ("{", "["):
+            report("error", step.line, "JSON used as a step; assign it with '* def' or send it with 'And request'", code="json_step")
+    if method_line is None:
+        report("error", scenario.line, "No 'When method' step", code="missing_method")
+    if status_line is None:
+        report("error", scenario.line, "No 'Then status' assertion", code="missing_status")
+    if scenario.outline:
+        if not scenario.example_count():
+            report("error", scenario.line, "Scenario Outline has no Examples rows", code="no_examples")
+        columns = {column for table in scenario.examples for column in table.header}
+        for step in scenario.steps:
+            for placeholder in KARATE_PLACEHOLDER_PATTERN.findall(step.text):
+                if placeholder not in columns:
+                    report("error", step.line, f"<{placeholder}> is not a column of the Examples table", code="unknown_placeholder")
+
+def karate_issue_code(message: str) -> str:
+    if message.startswith("Unbalanced body"):
+        return "unbalanced_body"
+    if message.startswith("JSON outside a step"):
+        return "json_outside_step"
+    return "not_a_step"
+
+def validate_karate_feature(feature: "KarateFeature") -> dict:
+    """Structural checks over a parsed feature, with line-numbered diagnostics per scenario"""
     validation_result = {
         "is_valid": True,
         "errors": [],
         "warnings": [],
-        "suggestions": []
+        "suggestions": [],
+        "diagnostics": [],
+        "scenario_count": feature.scenario_count()
     }
-    
-    # Check for required Karate DSL components
-    required_patterns = [
-        ("Feature:", "Feature declaration is missing"),
-        ("Background:", "Background section is recommended"),
-        ("Scenario:", "At least one scenario is required"),
-        ("Given", "Given steps are required"),
-        ("When", "When steps are required"), 
-        ("Then", "Then steps are required")
-    ]
-    
-    for pattern, error_msg in required_patterns:
-        if pattern not in test_cases:
-            validation_result["errors"].append(error_msg)
-            validation_result["is_valid"] = False
-    
-    # Check for proper Karate syntax patterns
-    karate_patterns = [
-        "Given path",
-        "When method",
-        "Then status",
-        "And match"
-    ]
-    
-    found_patterns = []
-    for pattern in karate_patterns:
-        if pattern in test_cases:
-            found_patterns.append(pattern)
-    
-    if len(found_patterns) < 3:
-        validation_result["warnings"].append("Limited use of Karate DSL patterns detected")
-    
-    # Check for HTTP methods
-    http_methods = ["GET", "POST", "PUT", "DELETE", "PATCH"]
-    method_found = any(method in test_cases for method in http_methods)
-    
-    if not method_found:
-        validation_result["errors"].append("No HTTP method found in test cases")
-        validation_result["is_valid"] = False
-    
+    scenario_lines = [scenario.line for scenario in feature.scenarios]
+    current = {"scenario": None}
+
+    def report(severity: str, line: int, message: str, scenario_name: Optional[str] = None, code: str = ""):
+        scenario_name = scenario_name if scenario_name is not None else current["scenario"]
+        validation_result["diagnostics"].append(
+            {"line": line, "severity": severity, "scenario": scenario_name, "message": message, "code": code}
+        )
+
+    if not feature.line:
+        report("error", 1, "Feature declaration is missing", code="missing_feature")
+    if not feature.background:
+        report("warning", feature.line or 1, "Background section is recommended", code="missing_background")
+    if not feature.scenarios:
+        report("error", feature.line or 1, "At least one scenario is required", code="no_scenarios")
+
+    for scenario in feature.scenarios:
+        current["scenario"] = scenario.name
+        validate_karate_scenario(scenario, report)
+    current["scenario"] = None
+
+    # Text the parser could not place (unbalanced bodies, stray JSON) belongs to the scenario above it
+    for line, message in feature.issues:
+        position = bisect.bisect_right(scenario_lines, line) - 1
+        owner = feature.scenarios[position].name if position >= 0 else None
+        code = karate_issue_code(message)
+        report("warning" if code == "not_a_step" else "error", line, message, owner, code=code)
+    validation_result["diagnostics"].sort(key=lambda diagnostic: diagnostic["line"])
+    for diagnostic in validation_result["diagnostics"]:
+        where = f"Line {diagnostic['line']}" + (f" (Scenario: {diagnostic['scenario']})" if diagnostic["scenario"] else "")
+        validation_result["errors" if diagnostic["severity"] == "error" else "warnings"].append(f"{where}: {diagnostic['message']}")
+    validation_result["is_valid"] = not validation_result["errors"]
+
     # Suggestions for improvement
-    if "* def" not in test_cases:
+    actions = {step.action for scenario in feature.scenarios for step in scenario.background + scenario.steps}
+    if "def" not in actions:
         validation_result["suggestions"].append("Consider using variable definitions with '* def' for better test maintenance")
-    
-    if "* print" not in test_cases:
+    if "print" not in actions:
         validation_result["suggestions"].append("Consider adding debug prints for better test debugging")
         
     return validation_result
 
-def enhance_requirement_analysis(requirement_text: str, api_context: str) -> str:
+# Repair pass for generated features: mechanical problems are fixed in place and only the
+# scenarios that are still invalid go back to the model
+KARATE_REPAIR_ENABLED = env_flag("KARATE_REPAIR_ENABLED", True)
+KARATE_REPAIR_MAX_SCENARIOS = int(os.getenv("KARATE_REPAIR_MAX_SCENARIOS", "5"))  # 0 disables model re-prompts
+KARATE_STATUS_HINTS = (
+    (("not found", "does not exist", "nonexistent", "non-existent"), 404),
+    (("unauthorized", "unauthorised", "authentication", "without token", "no token", "invalid token"), 401),
+    (("forbidden", "permission", "access denied"), 403),
+    (("conflict", "duplicate", "already exists"), 409),
+    (("invalid", "missing", "malformed", "bad request", "empty", "negative", "exceed", "boundary"), 400),
+    (("server error",), 500),
+)
+KARATE_STATUS_IN_TEXT_PATTERN = re.compile(r'\b([1-5]\d\d)\b')
+
+def infer_karate_method(scenario: "KarateScenario", default_method: Optional[str]) -> str:
+    """HTTP method named in the scenario title, else the method of the API under test"""
+    for word in re.findall(r'[A-Za-z]+', scenario.name):
+        if word.upper() == word and word in KARATE_HTTP_METHODS:
+            return word
+    if default_method and default_method.upper() in KARATE_HTTP_METHODS:
+        return default_method.upper()
+    return "POST" if any(step.action == "request" for step in scenario.steps) else "GET"
+
+def infer_karate_status(scenario: "KarateScenario", method: str) -> int:
+    """Status quoted in the scenario title or comments, else one implied by its wording"""
+    text = " ".join((scenario.name,) + scenario.comments)
+    quoted = KARATE_STATUS_IN_TEXT_PATTERN.search(text)
+    if quoted:
+        return int(quoted.group(1))
+    lowered = text.lower()
+    for words, status in KARATE_STATUS_HINTS:
+        if any(word in lowered for word in words):
+            return status
+    return 201 if method == "POST" else 200
+
+def karate_json_request_to_steps(step: "KarateStep", indent: str,
+                                 scenario_actions: frozenset = frozenset()) -> Optional[Tuple[List[str], Optional[str], Optional[int]]]:
+    """
+    Rewrite a JSON request object ('* request {"method": ..., "path": ..., "expectedStatus": ...}')
+    as DSL lines; the method and status are returned separately so the caller can place them.
+    The path or url is left out when the scenario already sets one (scenario_actions holds its step actions).
+    """
+    try:
+        request_object = json.loads(step.value)
+    except ValueError:
+        return None
+    if not isinstance(request_object, dict):
+        return None
+    lines = []
+    target = request_object.get("path") or request_object.get("endpoint") or request_object.get("url")
+    if isinstance(target, str) and target:
+        action = "url" if target.startswith("http") else "path"
+        if action not in scenario_actions:
+            lines.append(f"{indent}Given {action} '{target}'")
+    for key in ("headers", "params", "queryParams"):
+        values = request_object.get(key)
+        if isinstance(values, dict):
+            keyword = "header" if key == "headers" else "param"
+            lines.extend(f"{indent}And {keyword} {name} = '{value}'" for name, value in values.items())
+    for key in ("body", "payload", "requestBody", "data"):
+        if request_object.get(key) is not None:
+            lines.append(f"{indent}And request {json.dumps(request_object[key])}")
+            break
+    method = request_object.get("method")
+    method = method.upper() if isinstance(method, str) and method.upper() in KARATE_HTTP_METHODS else None
+    status = None
+    for key in ("expectedStatus", "expected_status", "statusCode", "status"):
+        if str(request_object.get(key, "")).isdigit():
+            status = int(request_object[key])
+            break
+    return lines, method, status
+
+def repair_karate_scenario(scenario: "KarateScenario", lines: List[str], default_method: Optional[str],
+                           replace: Dict[int, List[str]], before: Dict[int, List[str]]) -> List[str]:
+    """
+    Plan local fixes for one scenario as line edits (0-based indexes into lines).
+    Returns a description of each fix; problems needing judgement are left for the model.
+    """
+    problems = []
+    validate_karate_scenario(scenario, lambda severity, line, message, code="": problems.append((line, code)))
+    codes = {code for _, code in problems}
+    if not codes & {"missing_method", "missing_status", "status_before_method", "json_request_object"}:
+        return []
+    first_step = lines[scenario.steps[0].line - 1]
+    indent = first_step[:len(first_step) - len(first_step.lstrip())] or "  "
+    fixes = []
+    method_step = next((step for step in scenario.steps if step.action == "method"), None)
+    status_step = next((step for step in scenario.steps if step.action == "status"), None)
+    method = method_step.value if method_step else None
+    status = status_step.value if status_step else None
+    scenario_actions = frozenset(step.action for step in scenario.steps)
+
+    for step in scenario.steps:
+        if step.action == "request" and (step.line, "json_request_object") in problems:
+            rewritten = karate_json_request_to_steps(step, indent, scenario_actions)
+            if rewritten is None:
+                continue
+            new_lines, object_method, object_status = rewritten
+            method = method or object_method
+            status = status or object_status
+            replace[step.line - 1] = new_lines
+            for index in range(step.line, step.end_line):
+                replace[index] = []
+            fixes.append(f"Line {step.line}: JSON request object rewritten as Karate steps")
+
+    if method_step is None:
+        method = method or infer_karate_method(scenario, default_method)
+        # Send the request before the first assertion on the response, or at the end of the scenario
+        assertion = next((step for step in scenario.steps
+                          if step.action in ("status", "match", "assert") or step.keyword == "Then"), None)
+        anchor = assertion.line - 1 if assertion else scenario.steps[-1].end_line
+        method_lines = [f"{indent}When method {method}"]
+        if status_step is None:
+            status = status or infer_karate_status(scenario, method)
+            method_lines.append(f"{indent}Then status {status}")
+            fixes.append(f"Line {scenario.line}: added 'When method {method}' and 'Then status {status}'")
+        else:
+            fixes.append(f"Line {scenario.line}: added 'When method {method}'")
+        before.setdefault(anchor, []).extend(method_lines)
+    elif status_step is None:
+        status = status or infer_karate_status(scenario, method)
+        before.setdefault(method_step.end_line, []).append(f"{indent}Then status {status}")
+        fixes.append(f"Line {method_step.line}: added 'Then status {status}'")
+    elif status_step.line < method_step.line:
+        # Move the status check after the request it asserts on
+        replace[status_step.line - 1] = []
+        before.setdefault(method_step.end_line, []).append(lines[status_step.line - 1])
+        fixes.append(f"Line {status_step.line}: status check moved after 'When method'")
+    return fixes
+
+def repair_karate_locally(text: str, default_method: Optional[str] = None) -> Tuple[str, List[str]]:
+    """Apply the mechanical fixes to every scenario in one pass over the lines"""
+    feature = parse_karate_feature(text)
+    lines = text.split("\n")
+    replace: Dict[int, List[str]] = {}
+    before: Dict[int, List[str]] = {}
+    fixes = []
+    for scenario in feature.scenarios:
+        if scenario.steps:
+            fixes.extend(repair_karate_scenario(scenario, lines, default_method, replace, before))
+    if not fixes:
+        return text, fixes
+    repaired = []
+    for index in range(len(lines) + 1):
+        repaired.extend(before.get(index, ()))
+        if index < len(lines):
+            repaired.extend(replace.get(index, (lines[index],)))
+    return "\n".join(repaired), fixes
+
+def karate_scenario_spans(feature: "KarateFeature", lines: List[str]) -> List[Tuple[int, int]]:
+    """0-based [start, end) line range of each scenario, leaving the next scenario's tags and comments out"""
+    starts = [scenario.line - 1 for scenario in feature.scenarios]
+    spans = []
+    for position, start in enumerate(starts):
+        end = starts[position + 1] if position + 1 < len(starts) else len(lines)
+        while end > start + 1 and lines[end - 1].strip()[:1] in ("", "@", "#"):
+            end -= 1
+        spans.append((start, end))
+    return spans
+
+def build_karate_repair_prompt(background: str, scenario_text: str, problems: List[str]) -> str:
+    return (
+        "Fix the Karate DSL scenario below so that it passes validation.\n\n"
+        f"PROBLEMS:\n{chr(10).join(f'- {problem}' for problem in problems)}\n\n"
+        f"BACKGROUND OF THE FEATURE (for context, do not repeat it):\n{background or '(none)'}\n\n"
+        f"SCENARIO:\n{scenario_text}\n\n"
+        "Reply with only the corrected scenario, starting with its 'Scenario:' line. "
+        "Use pure Karate DSL steps (Given path, When method, Then status); never describe the call as a JSON object."
+    )
+
+async def repair_scenarios_with_model(text: str, validation: dict, tier: Optional[str],
+                                      task_id: Optional[str] = None) -> Tuple[str, List[str]]:
+    """Re-prompt the model for the scenarios that still have errors, one small prompt per scenario"""
+    if tier == "openai" and async_openai_client is not None and openai_health.is_available():
+        generate = lambda context: generate_test_cases_with_openai(context, async_openai_client, None, task_id)
+    elif tier == "llama" and llm is not None:
+        generate = lambda context: generate_test_cases_with_llama(context, None, task_id)
+    else:
+        return text, []
+    feature = parse_karate_feature(text)
+    scenario_lines = [scenario.line for scenario in feature.scenarios]
+    problems: Dict[int, List[str]] = {}
+    for diagnostic in validation["diagnostics"]:
+        position = bisect.bisect_right(scenario_lines, diagnostic["line"]) - 1
+        if diagnostic["severity"] == "error" and position >= 0:
+            problems.setdefault(position, []).append(f"Line {diagnostic['line']}: {diagnostic['message']}")
+    failing = sorted(problems)[:KARATE_REPAIR_MAX_SCENARIOS]
+    if not failing:
+        return text, []
+
+    lines = text.split("\n")
+    spans = karate_scenario_spans(feature, lines)
+    background = "\n".join(step.text for step in feature.background)
+    background_block = "Background:\n" + "\n".join(f"  {step.text}" for step in feature.background) if feature.background else ""
+    print(f">>> 🔧 Re-prompting {tier} for {len(failing)} invalid scenario(s)")
+
+    async def repair(position: int) -> Optional[List[str]]:
+        start, end = spans[position]
+        context = {
+            "system_prompt": KARATE_SYSTEM_PROMPT,
+            "user_prompt": build_karate_repair_prompt(background, "\n".join(lines[start:end]), problems[position])
+        }
+        reply = await generate(context)
+        reply_lines = reply.replace("```", "").split("\n")
+        first = next((i for i, line in enumerate(reply_lines) if line.strip().startswith("Scenario")), None)
+        if first is None:
+            return None
+        candidate = [line.rstrip() for line in reply_lines[first:]]
+        while candidate and not candidate[-1].strip():
+            candidate.pop()
+        check = validate_karate_syntax(f"Feature: repair\n{background_block}\n" + "\n".join(candidate))
+        return candidate if check["is_valid"] and check["scenario_count"] else None
+
+    replies = await asyncio.gather(*(repair(position) for position in failing), return_exceptions=True)
+    fixes = []
+    for position, reply in zip(failing, replies):
+        if isinstance(reply, BaseException) or reply is None:
+            print(f">>> ⚠️ Could not repair scenario '{feature.scenarios[position].name}': {reply if reply else 'still invalid'}")
+            continue
+        fixes.append((position, reply))
+    if not fixes:
+        return text, []
+    # Replace from the bottom up so earlier spans keep their line numbers
+    for position, reply in sorted(fixes, reverse=True):
+        start, end = spans[position]
+        lines[start:end] = reply
+    return "\n".join(lines), [
+        f"Line {feature.scenarios[position].line}: scenario '{feature.scenarios[position].name}' regenerated by the model"
+        for position, _ in sorted(fixes)
+    ]
+
+async def repair_generated_feature(text: str, validation: dict, tier: Optional[str], api_context: str,
+                                   task_id: Optional[str] = None) -> Tuple[str, dict, List[str]]:
+    """
+    Repair a generated feature that failed validation. Returns (text, validation, repairs);
+    the text is unchanged when nothing could be fixed.
+    """
+    loop = asyncio.get_running_loop()
+    default_method = None
+    for line in (api_context or "").split("\n"):
+        if "Method:" in line:
+            default_method = line.split("Method:")[1].strip()
+            break
+    repaired, repairs = await loop.run_in_executor(task_executor, repair_karate_locally, text, default_method)
+    if repairs:
+        validation = await loop.run_in_executor(task_executor, validate_karate_syntax, repaired)
+    if not validation["is_valid"] and KARATE_REPAIR_MAX_SCENARIOS > 0:
+        repaired, model_repairs = await repair_scenarios_with_model(repaired, validation, tier, task_id)
+        if model_repairs:
+            repairs += model_repairs
+            validation = await loop.run_in_executor(task_executor, validate_karate_syntax, repaired)
+    for repair in repairs:
+        print(f"    REPAIRED: {repair}")
+    return repaired, validation, repairs
+
+def enhance_requirement_analysis(requirement_text: str, api_context: str, analysis: Optional[RequirementAnalysis] = None,
+                                 max_items: int = 10) -> str:
     """
     Enhance the requirement text with structured analysis to improve test generation.
+    A line that lands in several categories is listed once, and repeated lines of the
+    document are sent once, so the prompt does not pay for the same text twice.
     """
-    analysis = analyze_requirements(requirement_text)
+    if analysis is None:
+        analysis = analyze_requirements(requirement_text)
+    
+    listed = set()
+    def bullets(category: str) -> str:
+        items = [item for item in analysis[category][:max_items] if item and item not in listed]
+        listed.update(items)
+        return chr(10).join(f"- {item}" for item in items)
     
     enhanced_prompt = f"""
 STRUCTURED REQUIREMENT ANALYSIS:
 
 FUNCTIONAL REQUIREMENTS IDENTIFIED:
-{chr(10).join(f"- {req}" for req in analysis['functional_requirements'][:10])}
+{bullets('functional_requirements')}
 
 VALIDATION POINTS IDENTIFIED:
-{chr(10).join(f"- {val}" for val in analysis['validation_points'][:10])}
+{bullets('validation_points')}
 
 BUSINESS RULES IDENTIFIED:
-{chr(10).join(f"- {rule}" for rule in analysis['business_rules'][:10])}
+{bullets('business_rules')}
 
 ERROR CONDITIONS TO TEST:
-{chr(10).join(f"- {error}" for error in analysis['error_conditions'][:10])}
+{bullets('error_conditions')}
 
 INTEGRATION POINTS IDENTIFIED:
-{chr(10).join(f"- {point}" for point in analysis['integration_points'][:10])}
+{bullets('integration_points')}
 
 ORIGINAL REQUIREMENT DOCUMENT:
-{requirement_text}
+{dedupe_requirement_lines(requirement_text)}
 
 BASED ON THIS ANALYSIS, generate comprehensive test cases that cover all identified requirements.
 """
     
     return enhanced_prompt
 
-def generate_mock_test_cases(requirement: str, operation: str, api_context: str) -> str:
-    """Generate enhanced mock Karate DSL test cases using requirement analysis"""
-    
-    print(">>> Using enhanced mock with requirement analysis...")
-    
-    # Analyze the requirements first
-    analysis = analyze_requirements(requirement)
-    
-    # Extract API details if available
-    endpoint_info = ""
-    method = "GET"  # default method
-    base_url = "https://api.example.com"
-    actual_endpoint = ""
-    
-    # Extract actual endpoint and method from api_context
-    if api_context:
-        lines = api_context.split('\n')
-        for line in lines:
-            if 'Endpoint:' in line:
-                actual_endpoint = line.split('Endpoint:')[1].strip()
-                if actual_endpoint:
-                    # Extract base URL and path
-                    from urllib.parse import urlparse
-                    parsed = urlparse(actual_endpoint)
-                    base_url = f"{parsed.scheme}://{parsed.netloc}"
-                    endpoint_info = f"* url '{base_url}'\n  "
-            elif 'Method:' in line:
-                method = line.split('Method:')[1].strip()
-    
-    # Generate comprehensive test cases based on analysis
-    feature_description = f"{method} API Test Cases - Comprehensive Coverage"
-    if analysis['functional_requirements']:
-        feature_description += f" ({len(analysis['functional_requirements'])} functional requirements identified)"
-    
-    test_cases = f"""Feature: {feature_description}
-  Generated from requirement analysis with {len(analysis['functional_requirements'])} functional requirements,
-  {len(analysis['validation_points'])} validation points, and {len(analysis['business_rules'])} business rules identified.
+def dedupe_requirement_lines(requirement_text: str, min_length: int = 20) -> str:
+    """Drop repeats of substantial lines (page headers/footers, pasted boilerplate); short lines keep the layout"""
+    seen = set()
+    kept = []
+    for line in requirement_text.split('\n'):
+        key = " ".join(line.split()).lower()
+        if len(key) >= min_length:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return '\n'.join(kept)
+
+# Tier 3 templates. Literal text is sanitized once when a method's template set is compiled, so
+# rendering only fills the per-request slots ({counter}, {summary}, ...) and joins the pieces.
+MOCK_TEMPLATE_SLOT_PATTERN = re.compile(r'\{(\w+)\}')
+MOCK_BODY_METHODS = ("POST", "PUT", "PATCH")
+MOCK_STANDARD_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH")
+
+MOCK_FEATURE_HEADER_TEMPLATE = """Feature: {method} API Test Cases - Comprehensive Coverage{functional_note}
+  Generated from requirement analysis with {functional_count} functional requirements,
+  {validation_count} validation points, and {rules_count} business rules identified.
 
 Background:
   {endpoint_info}* configure connectTimeout = 5000
@@ -991,103 +2881,24 @@ Background:
 
 """
 
-    # Generate scenarios based on identified requirements
-    scenario_counter = 1
-    
-    # Determine expected status codes based on method
-    method_upper = method.upper()
-    expected_success_status = "201" if method_upper == "POST" else "204" if method_upper == "DELETE" else "200"
-    
-    # Functional requirement scenarios
-    if analysis['functional_requirements']:
-        for i, req in enumerate(analysis['functional_requirements'][:3], 1):  # Limit to first 3
-            clean_req = req[:30] + "..." if len(req) > 30 else req
-            
-            # Add request body for POST/PUT/PATCH methods
-            request_body = ""
-            if method_upper in ["POST", "PUT", "PATCH"]:
-                request_body = f'  * def requestBody = {{"title": "Test Data", "description": "Functional test"}}\n  * request requestBody\n'
-            
-            test_cases += f"""Scenario: Functional Requirement Test {scenario_counter} - {method_upper} Operation
-  # Testing core functionality: {clean_req}
-  Given path '/api/v1/resource'
-{request_body}  When method {method}
-  Then status {expected_success_status}
-  And match response != null
-  * print 'Functional {method_upper} test response:', response
-
-"""
-            scenario_counter += 1
-    
-    # Validation scenarios
-    if analysis['validation_points']:
-        for i, val in enumerate(analysis['validation_points'][:3], 1):  # Limit to first 3
-            clean_val = val[:30] + "..." if len(val) > 30 else val
-            
-            # Add request body for POST/PUT/PATCH methods
-            request_body = ""
-            if method_upper in ["POST", "PUT", "PATCH"]:
-                request_body = f'  * def requestBody = {{"title": "Valid Data", "description": "Validation test"}}\n  * request requestBody\n'
-            
-            test_cases += f"""Scenario: Validation Test {scenario_counter} - {method_upper} Data Validation
-  # Testing validation: {clean_val}
-  Given path '/api/v1/resource'
-{request_body}  When method {method}
-  Then status {expected_success_status}
-  And match response != null
-  And match response contains expected data
-  * print 'Validation {method_upper} test response:', response
-
-"""
-            scenario_counter += 1
-    
-    # Business rule scenarios
-    if analysis['business_rules']:
-        for i, rule in enumerate(analysis['business_rules'][:2], 1):  # Limit to first 2
-            clean_rule = rule[:30] + "..." if len(rule) > 30 else rule
-            
-            # Add request body for POST/PUT/PATCH methods
-            request_body = ""
-            if method_upper in ["POST", "PUT", "PATCH"]:
-                request_body = f'  * def requestBody = {{"title": "Business Rule Test", "description": "Rule validation"}}\n  * request requestBody\n'
-            
-            test_cases += f"""Scenario: Business Rule Test {scenario_counter} - {method_upper} System Constraints
-  # Testing business rule: {clean_rule}
-  Given path '/api/v1/resource'
-{request_body}  When method {method}
-  Then status {expected_success_status}
-  And match response != null
-  * print 'Business rule {method_upper} test response:', response
-
-"""
-            scenario_counter += 1
-    
-    # Error condition scenarios
-    if analysis['error_conditions']:
-        for i, error in enumerate(analysis['error_conditions'][:2], 1):  # Limit to first 2
-            clean_error = error[:30] + "..." if len(error) > 30 else error
-            
-            # Add invalid request body for POST/PUT/PATCH methods
-            request_body = ""
-            if method_upper in ["POST", "PUT", "PATCH"]:
-                request_body = f'  * def requestBody = {{"invalid": "data", "malformed": true}}\n  * request requestBody\n'
-            
-            test_cases += f"""Scenario: Error Condition Test {scenario_counter} - {method_upper} Error Handling
-  # Testing error condition: {clean_error}
-  Given path '/api/v1/invalid'
-{request_body}  When method {method}
-  Then status 400
-  And match response.error != null
-  * print 'Error {method_upper} test response:', response
+# (analysis category, scenarios per category, title, comment, request body, path, status, assertions, print label)
+MOCK_ANALYSIS_SCENARIOS = (
+    ("functional_requirements", 3, "Functional Requirement Test {counter} - {method_upper} Operation",
+     "Testing core functionality", '{"title": "Test Data", "description": "Functional test"}',
+     "/api/v1/resource", "{success_status}", ("And match response != null",), "Functional"),
+    ("validation_points", 3, "Validation Test {counter} - {method_upper} Data Validation",
+     "Testing validation", '{"title": "Valid Data", "description": "Validation test"}',
+     "/api/v1/resource", "{success_status}", ("And match response != null", "And match response contains expected data"), "Validation"),
+    ("business_rules", 2, "Business Rule Test {counter} - {method_upper} System Constraints",
+     "Testing business rule", '{"title": "Business Rule Test", "description": "Rule validation"}',
+     "/api/v1/resource", "{success_status}", ("And match response != null",), "Business rule"),
+    ("error_conditions", 2, "Error Condition Test {counter} - {method_upper} Error Handling",
+     "Testing error condition", '{"invalid": "data", "malformed": true}',
+     "/api/v1/invalid", "400", ("And match response.error != null",), "Error"),
+)
 
-"""
-            scenario_counter += 1
-    
-    # Add method-specific scenarios for comprehensive coverage
-    method_upper = method.upper()
-    
-    if method_upper == "GET":
-        test_cases += f"""
+MOCK_METHOD_SCENARIOS = {
+    "GET": """
 Scenario: GET Valid Resource
   Given path '/api/v1/resource/1'
   When method GET
@@ -1133,13 +2944,11 @@ Scenario: GET Content Type Validation
   When method GET
   Then status 200
   And match header Content-Type contains 'application/json'
-"""
-
-    elif method_upper == "POST":
-        test_cases += f"""
+""",
+    "POST": """
 Scenario: POST with Valid Payload
   Given path '/api/v1/resource'
-  * def requestBody = {{"title": "Test Item", "description": "Test description"}}
+  * def requestBody = {"title": "Test Item", "description": "Test description"}
   * request requestBody
   When method POST
   Then status 201
@@ -1149,7 +2958,7 @@ Scenario: POST with Valid Payload
 
 Scenario: POST with Invalid Payload
   Given path '/api/v1/resource'
-  * def requestBody = {{"invalid": "data"}}
+  * def requestBody = {"invalid": "data"}
   * request requestBody
   When method POST
   Then status 400
@@ -1158,7 +2967,7 @@ Scenario: POST with Invalid Payload
 
 Scenario: POST with Empty Payload
   Given path '/api/v1/resource'
-  * def requestBody = {{}}
+  * def requestBody = {}
   * request requestBody
   When method POST
   Then status 400
@@ -1168,7 +2977,7 @@ Scenario: POST with Empty Payload
 Scenario: POST Authentication Required
   Given path '/api/v1/secure'
   * header Authorization = 'Bearer invalid-token'
-  * def requestBody = {{"data": "test"}}
+  * def requestBody = {"data": "test"}
   * request requestBody
   When method POST
   Then status 401
@@ -1177,7 +2986,7 @@ Scenario: POST Authentication Required
 
 Scenario: POST Performance Test
   Given path '/api/v1/resource'
-  * def requestBody = {{"title": "Performance Test"}}
+  * def requestBody = {"title": "Performance Test"}
   * request requestBody
   When method POST
   Then status 201
@@ -1188,18 +2997,16 @@ Scenario: POST Performance Test
 Scenario: POST Content Type Validation
   Given path '/api/v1/resource'
   * header Accept = 'application/json'
-  * def requestBody = {{"title": "Content Test"}}
+  * def requestBody = {"title": "Content Test"}
   * request requestBody
   When method POST
   Then status 201
   And match header Content-Type contains 'application/json'
-"""
-
-    elif method_upper == "PUT":
-        test_cases += f"""
+""",
+    "PUT": """
 Scenario: PUT Update Resource
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"title": "Updated Item", "description": "Updated description"}}
+  * def requestBody = {"title": "Updated Item", "description": "Updated description"}
   * request requestBody
   When method PUT
   Then status 200
@@ -1208,7 +3015,7 @@ Scenario: PUT Update Resource
 
 Scenario: PUT Non-Existent Resource
   Given path '/api/v1/resource/999'
-  * def requestBody = {{"title": "Not Found"}}
+  * def requestBody = {"title": "Not Found"}
   * request requestBody
   When method PUT
   Then status 404
@@ -1217,7 +3024,7 @@ Scenario: PUT Non-Existent Resource
 
 Scenario: PUT with Invalid Payload
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"invalid": "data"}}
+  * def requestBody = {"invalid": "data"}
   * request requestBody
   When method PUT
   Then status 400
@@ -1227,7 +3034,7 @@ Scenario: PUT with Invalid Payload
 Scenario: PUT Authentication Required
   Given path '/api/v1/secure/1'
   * header Authorization = 'Bearer invalid-token'
-  * def requestBody = {{"title": "Secure Update"}}
+  * def requestBody = {"title": "Secure Update"}
   * request requestBody
   When method PUT
   Then status 401
@@ -1236,17 +3043,15 @@ Scenario: PUT Authentication Required
 
 Scenario: PUT Performance Test
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"title": "Performance Update"}}
+  * def requestBody = {"title": "Performance Update"}
   * request requestBody
   When method PUT
   Then status 200
   * def responseTime = responseTime
   * print 'PUT Response time:', responseTime, 'ms'
   * assert responseTime < 5000
-"""
-
-    elif method_upper == "DELETE":
-        test_cases += f"""
+""",
+    "DELETE": """
 Scenario: DELETE Valid Resource
   Given path '/api/v1/resource/1'
   When method DELETE
@@ -1282,13 +3087,11 @@ Scenario: DELETE Already Deleted Resource
   Then status 404
   And match response.error != null
   * print 'DELETE already deleted response:', response
-"""
-
-    elif method_upper == "PATCH":
-        test_cases += f"""
+""",
+    "PATCH": """
 Scenario: PATCH Partial Update
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"title": "Patched Title"}}
+  * def requestBody = {"title": "Patched Title"}
   * request requestBody
   When method PATCH
   Then status 200
@@ -1297,7 +3100,7 @@ Scenario: PATCH Partial Update
 
 Scenario: PATCH Non-Existent Resource
   Given path '/api/v1/resource/999'
-  * def requestBody = {{"title": "Not Found"}}
+  * def requestBody = {"title": "Not Found"}
   * request requestBody
   When method PATCH
   Then status 404
@@ -1306,7 +3109,7 @@ Scenario: PATCH Non-Existent Resource
 
 Scenario: PATCH with Invalid Field
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"invalid_field": "value"}}
+  * def requestBody = {"invalid_field": "value"}
   * request requestBody
   When method PATCH
   Then status 400
@@ -1316,7 +3119,7 @@ Scenario: PATCH with Invalid Field
 Scenario: PATCH Authentication Required
   Given path '/api/v1/secure/1'
   * header Authorization = 'Bearer invalid-token'
-  * def requestBody = {{"title": "Secure Patch"}}
+  * def requestBody = {"title": "Secure Patch"}
   * request requestBody
   When method PATCH
   Then status 401
@@ -1325,18 +3128,18 @@ Scenario: PATCH Authentication Required
 
 Scenario: PATCH Performance Test
   Given path '/api/v1/resource/1'
-  * def requestBody = {{"title": "Performance Patch"}}
+  * def requestBody = {"title": "Performance Patch"}
   * request requestBody
   When method PATCH
   Then status 200
   * def responseTime = responseTime
   * print 'PATCH Response time:', responseTime, 'ms'
   * assert responseTime < 5000
-"""
+""",
+}
 
-    else:
-        # Fallback for other methods (HEAD, OPTIONS, etc.)
-        test_cases += f"""
+# Fallback for other methods (HEAD, OPTIONS, etc.)
+MOCK_GENERIC_METHOD_SCENARIOS = """
 Scenario: {method_upper} Basic Test
   Given path '/api/v1/resource'
   When method {method_upper}
@@ -1359,19 +3162,148 @@ Scenario: {method_upper} Not Found Test
   * print '{method_upper} 404 response:', response
 """
 
-    # Count total scenarios for logging
-    total_scenarios = len([line for line in test_cases.split('\n') if line.strip().startswith('Scenario:')])
-    print(f">>> Enhanced mock generated {total_scenarios} test scenarios based on requirement analysis")
+def build_mock_scenario_template(category_spec: tuple, with_body: bool) -> str:
+    _, _, title, comment, body, path, status, assertions, label = category_spec
+    lines = [f"Scenario: {title}", f"  # {comment}: {{summary}}", f"  Given path '{path}'"]
+    if with_body:
+        lines += [f"  * def requestBody = {body}", "  * request requestBody"]
+    lines += ["  When method {method}", f"  Then status {status}"]
+    lines += [f"  {assertion}" for assertion in assertions]
+    lines.append(f"  * print '{label} {{method_upper}} test response:', response")
+    return "\n".join(lines) + "\n\n"
+
+def compile_mock_template(template: str, static_values: dict) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Split a template into sanitized literal parts and the names of the slots between them.
+    Slots named in `static_values` are folded into the literals before sanitizing.
+    """
+    literals, slots = [], []
+    current = []
+    pieces = MOCK_TEMPLATE_SLOT_PATTERN.split(template)
+    for index, piece in enumerate(pieces):
+        if index % 2 == 0:
+            current.append(piece)
+        elif piece in static_values:
+            current.append(static_values[piece])
+        else:
+            literals.append(sanitize_ai_fragment("".join(current)))
+            slots.append(piece)
+            current = []
+    literals.append(sanitize_ai_fragment("".join(current)))
+    return tuple(literals), tuple(slots)
+
+def render_mock_template(compiled: Tuple[Tuple[str, ...], Tuple[str, ...]], values: dict, pieces: List[str]):
+    literals, slots = compiled
+    for literal, slot in zip(literals, slots):
+        pieces.append(literal)
+        pieces.append(values[slot])
+    pieces.append(literals[-1])
+
+def sanitize_mock_summary(summary: str) -> str:
+    """Sanitize a requirement summary for a template slot; plain ASCII summaries are already clean"""
+    if not (summary.isascii() and summary.isprintable() and "  " not in summary and "@ " not in summary):
+        summary = sanitize_ai_fragment(summary)
+    # A leading space would merge with the one after the comment label
+    return summary.lstrip(" ")
+
+mock_template_sets: Dict[str, dict] = {}
+
+def get_mock_template_set(method: str) -> dict:
+    """Compiled Tier 3 templates for one HTTP method, built on first use and kept for the process lifetime"""
+    template_set = mock_template_sets.get(method)
+    if template_set is not None:
+        return template_set
+    method_upper = method.upper()
+    static_values = {
+        "method": method,
+        "method_upper": method_upper,
+        "success_status": "201" if method_upper == "POST" else "204" if method_upper == "DELETE" else "200"
+    }
+    with_body = method_upper in MOCK_BODY_METHODS
+    method_block = MOCK_METHOD_SCENARIOS.get(method_upper, MOCK_GENERIC_METHOD_SCENARIOS)
+    # The analysis scenarios before it already end with a blank line, and the feature file is stripped at the end
+    method_block = sanitize_ai_fragment(method_block.replace("{method_upper}", method_upper)).strip("\n")
+    template_set = {
+        "header": compile_mock_template(MOCK_FEATURE_HEADER_TEMPLATE, static_values),
+        "scenarios": tuple(
+            (spec[0], spec[1], compile_mock_template(build_mock_scenario_template(spec, with_body), static_values))
+            for spec in MOCK_ANALYSIS_SCENARIOS
+        ),
+        "method_block": method_block.rstrip(),
+        "method_block_scenarios": method_block.count("Scenario:")
+    }
+    mock_template_sets[method] = template_set
+    return template_set
+
+def generate_mock_test_cases(requirement: str, operation: str, api_context: str, analysis: Optional[RequirementAnalysis] = None) -> str:
+    """Generate enhanced mock Karate DSL test cases using requirement analysis"""
     
-    # Sanitize the generated content to prevent character issues
-    sanitized_test_cases = sanitize_ai_response(test_cases)
-    return sanitized_test_cases
+    print(">>> Using enhanced mock with requirement analysis...")
+    
+    # Analyze the requirements first, unless the caller already has the analysis for this request
+    if analysis is None:
+        analysis = analyze_requirements(requirement)
+    
+    # Extract API details if available
+    endpoint_info = ""
+    method = "GET"  # default method
+    
+    # Extract actual endpoint and method from api_context
+    if api_context:
+        for line in api_context.split('\n'):
+            if 'Endpoint:' in line:
+                actual_endpoint = line.split('Endpoint:')[1].strip()
+                if actual_endpoint:
+                    # Extract base URL for the Background section
+                    from urllib.parse import urlparse
+                    parsed = urlparse(actual_endpoint)
+                    base_url = sanitize_ai_fragment(f"{parsed.scheme}://{parsed.netloc}")
+                    endpoint_info = f"* url '{base_url}'\n "
+            elif 'Method:' in line:
+                method = line.split('Method:')[1].strip()
+    
+    template_set = get_mock_template_set(method)
+    functional_count = analysis.count_label('functional_requirements')
+    pieces = []
+    render_mock_template(template_set["header"], {
+        "functional_note": f" ({functional_count} functional requirements identified)" if analysis['functional_requirements'] else "",
+        "functional_count": functional_count,
+        "validation_count": analysis.count_label('validation_points'),
+        "rules_count": analysis.count_label('business_rules'),
+        "endpoint_info": endpoint_info
+    }, pieces)
+    
+    # Scenarios based on identified requirements, numbered across categories
+    scenario_counter = 1
+    for category, limit, compiled in template_set["scenarios"]:
+        for item in analysis[category][:limit]:
+            summary = item[:30] + "..." if len(item) > 30 else item
+            render_mock_template(compiled, {"counter": str(scenario_counter), "summary": sanitize_mock_summary(summary)}, pieces)
+            scenario_counter += 1
+    
+    # Method-specific scenarios for comprehensive coverage
+    pieces.append(template_set["method_block"])
+    test_cases = "".join(pieces)
+    
+    print(f">>> Enhanced mock generated {scenario_counter - 1 + template_set['method_block_scenarios']} test scenarios based on requirement analysis")
+    return test_cases
 
-def generate_test_cases_with_openai(model_context: dict, client) -> str:
-    """Generate test cases using OpenAI API with enhanced error handling"""
+async def generate_test_cases_with_openai(model_context: dict, client: AsyncOpenAI, on_token=None,
+                                          task_id: Optional[str] = None) -> str:
+    """
+    Generate test cases using the async OpenAI client with enhanced error handling.
+    The completion is streamed; `on_token` (an async callable) receives each raw text delta as it arrives.
+    Prompt and completion tokens are recorded against `task_id`.
+    """
+    loop = asyncio.get_running_loop()
+    # Token counting and prompt trimming are CPU work - keep them off the event loop
+    model_context = await loop.run_in_executor(task_executor, fit_model_context, model_context, "openai")
+    prompt_tokens = model_context.get("prompt_tokens", 0)
+    parts = []
+    reported_usage = None
     try:
-        print(">>> Calling OpenAI API...")
-        response = client.chat.completions.create(
+        print(f">>> Calling OpenAI API ({prompt_tokens} prompt tokens)...")
+        stream = await client.chat.completions.create(
             model="gpt-4o",  # Using gpt-4o which works with Comcast gateway
             messages=[
                 {
@@ -1385,12 +3317,29 @@ def generate_test_cases_with_openai(model_context: dict, client) -> str:
             ],
             max_tokens=2048,
             temperature=0.7,
-            top_p=0.9
+            top_p=0.9,
+            stream=True
         )
+        async for chunk in stream:
+            if task_id and is_task_cancelled(task_id):
+                # Stop paying for tokens nobody will read
+                print(">>> OpenAI stream closed - task was cancelled")
+                await stream.close()
+                break
+            # Gateways that report usage send it on the final chunk
+            if getattr(chunk, "usage", None):
+                reported_usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_token:
+                    await on_token(delta)
         print(">>> OpenAI API call successful")
         
         # Sanitize the response to remove problematic characters
-        raw_content = response.choices[0].message.content
+        raw_content = "".join(parts)
         sanitized_content = sanitize_ai_response(raw_content)
         return sanitized_content
         
@@ -1399,36 +3348,506 @@ def generate_test_cases_with_openai(model_context: dict, client) -> str:
         
         # Detailed error categorization
         if "api key" in error_msg or "unauthorized" in error_msg:
-            print(f">>> ❌ OpenAI API Authentication Error: Invalid or inactive API key")
+            print(">>> ❌ OpenAI API Authentication Error: Invalid or inactive API key")
             raise Exception("OpenAI API key is invalid or inactive. Please check your API key.")
+        raise
+    finally:
+        if reported_usage is not None:
+            record_token_usage(task_id, "openai", reported_usage.prompt_tokens, reported_usage.completion_tokens)
+        else:
+            completion_tokens = await loop.run_in_executor(task_executor, count_tokens, "".join(parts), "openai") if parts else 0
+            record_token_usage(task_id, "openai", prompt_tokens, completion_tokens)
+
+async def generate_test_cases_with_llama(model_context: dict, on_token=None, task_id: Optional[str] = None) -> str:
+    """
+    Generate test cases with a local Llama instance from the pool, on that instance's executor thread.
+    Tokens are handed back to the event loop as they are sampled and passed to `on_token`.
+    Prompt and completion tokens are recorded against `task_id`.
+    """
+    loop = asyncio.get_running_loop()
+    token_queue = asyncio.Queue()
+    stop_requested = threading.Event()
+    instance = await local_model_pool.acquire(task_id)
+    if task_id and is_task_cancelled(task_id):
+        # Cancelled while waiting for a free instance - hand it straight to the next request
+        local_model_pool.release(instance)
+        return sanitize_ai_response("")
+    model = instance.model
+
+    def run_completion(prompt: str):
+        try:
+            instance.prefix_cache.prepare(model, model.tokenize(prompt.encode("utf-8"), special=True))
+            for chunk in model.create_completion(
+                prompt=prompt,
+                max_tokens=2048,
+                temperature=0.7,
+                top_p=0.9,
+                stream=True
+            ):
+                # The caller went away or the task was cancelled - free the instance for the next request
+                if stop_requested.is_set() or (task_id and is_task_cancelled(task_id)):
+                    break
+                loop.call_soon_threadsafe(token_queue.put_nowait, chunk["choices"][0]["text"])
+        finally:
+            loop.call_soon_threadsafe(token_queue.put_nowait, None)
+
+    completion = None
+    parts = []
+    try:
+        # Count and trim the prompt with this instance's own tokenizer, on its thread rather than the event loop
+        model_context = await loop.run_in_executor(instance.executor, fit_model_context, model_context, "llama", model)
+        prompt = f"{model_context['system_prompt']}\n\n{model_context['user_prompt']}"
+        completion = loop.run_in_executor(instance.executor, run_completion, prompt)
+        while True:
+            text = await token_queue.get()
+            if text is None:
+                break
+            if task_id and is_task_cancelled(task_id):
+                # The llama thread sees the flag at its next token and returns the instance to the pool
+                stop_requested.set()
+                print(f">>> Local model instance {instance.index} stopped - task was cancelled")
+                break
+            parts.append(text)
+            if on_token:
+                await on_token(text)
+        # Surface any exception raised on the llama thread
+        await completion
+    finally:
+        stop_requested.set()
+        local_model_pool.release(instance, completion)
+        # llama_cpp streams one sampled token per chunk
+        record_token_usage(task_id, "llama", model_context.get("prompt_tokens", 0), len(parts))
+
+    raw_response = "".join(parts)
+    return sanitize_ai_response(raw_response)
+
+# Prompt token budgeting and accounting per tier
+OPENAI_PROMPT_TOKEN_BUDGET = int(os.getenv("OPENAI_PROMPT_TOKEN_BUDGET", "12000"))
+
+try:
+    import tiktoken  # optional - exact OpenAI token counts
+except ImportError:
+    tiktoken = None
+openai_token_encoding = None
+
+token_usage_totals = {
+    tier: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0} for tier in ("openai", "llama")
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def token_counting_method(tier: str) -> str:
+    if tier == "llama" and llm is not None:
+        return "llama tokenizer"
+    if tier == "openai" and tiktoken is not None and openai_token_encoding is not False:
+        return "tiktoken"
+    return "estimate"
+
+def count_tokens(text: str, tier: str, model=None) -> int:
+    """
+    Count tokens with the tier's own tokenizer: llama_cpp for Tier 2, tiktoken for Tier 1 when installed.
+    Pass the pool instance's model for Tier 2 and call from that instance's thread.
+    """
+    global openai_token_encoding
+    model = model or llm
+    if tier == "llama" and model is not None:
+        return len(model.tokenize(text.encode("utf-8"), add_bos=False))
+    if tier == "openai" and tiktoken is not None and openai_token_encoding is not False:
+        if openai_token_encoding is None:
+            try:
+                openai_token_encoding = tiktoken.encoding_for_model("gpt-4o")
+            except Exception as e:
+                # The encoding file could not be loaded (e.g. offline) - stay on estimates
+                print(f">>> tiktoken encoding unavailable, estimating OpenAI tokens: {e}")
+                openai_token_encoding = False
+                return estimate_tokens(text)
+        return len(openai_token_encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text)
+
+def prompt_token_budget(tier: str, model=None) -> int:
+    model = model or llm
+    if tier == "llama" and model is not None:
+        return model.n_ctx() - LLAMA_MIN_OUTPUT_TOKENS
+    return OPENAI_PROMPT_TOKEN_BUDGET
+
+def count_prompt_tokens(model_context: dict, tier: str, model=None) -> int:
+    if tier == "llama":
+        return count_tokens(f"{model_context['system_prompt']}\n\n{model_context['user_prompt']}", tier, model)
+    # Chat messages carry a few tokens of framing each
+    return count_tokens(model_context["system_prompt"], tier) + count_tokens(model_context["user_prompt"], tier) + 8
+
+def build_generation_context(requirement_text: str, api_context: str, operation: str, analysis: RequirementAnalysis,
+                             section: Optional[Tuple[int, int]] = None, max_items: int = 10) -> dict:
+    """Build the model context and keep its ingredients so fit_model_context can rebuild a smaller prompt"""
+    enhanced_requirements = enhance_requirement_analysis(requirement_text, api_context, analysis, max_items=max_items)
+    model_context = build_model_context(enhanced_requirements, api_context, operation, section=section)
+    model_context["sources"] = {
+        "requirement_text": requirement_text,
+        "api_context": api_context,
+        "operation": operation,
+        "analysis": analysis,
+        "section": section,
+        "max_items": max_items
+    }
+    return model_context
+
+def fit_model_context(model_context: dict, tier: str, model=None) -> dict:
+    """
+    Enforce the tier's prompt token budget: first list fewer analysis bullets, then truncate the
+    requirement document. The returned context records its size under "prompt_tokens".
+    Runs on an executor thread; for Tier 2, on the thread of the instance whose model is passed.
+    """
+    budget = prompt_token_budget(tier, model)
+    prompt_tokens = count_prompt_tokens(model_context, tier, model)
+    sources = model_context.get("sources")
+    if prompt_tokens <= budget or sources is None:
+        return {**model_context, "prompt_tokens": prompt_tokens}
+
+    print(f">>> Prompt is {prompt_tokens} tokens, over the {tier} budget of {budget} - trimming")
+    requirement_text = sources["requirement_text"]
+    for max_items in (3, 0):
+        if max_items >= sources["max_items"]:
+            continue
+        candidate = build_generation_context(
+            requirement_text, sources["api_context"], sources["operation"], sources["analysis"], sources["section"], max_items
+        )
+        prompt_tokens = count_prompt_tokens(candidate, tier, model)
+        if prompt_tokens <= budget:
+            return {**candidate, "prompt_tokens": prompt_tokens}
+
+    # Still too large: keep the share of the document that fits, with a little headroom
+    for _ in range(3):
+        keep_chars = int(len(requirement_text) * budget / prompt_tokens * 0.9)
+        requirement_text = requirement_text[:keep_chars] + "\n[... requirement document truncated to fit the prompt budget ...]"
+        candidate = build_generation_context(
+            requirement_text, sources["api_context"], sources["operation"], sources["analysis"], sources["section"], 0
+        )
+        prompt_tokens = count_prompt_tokens(candidate, tier, model)
+        if prompt_tokens <= budget:
+            break
+    print(f">>> Prompt truncated to {prompt_tokens} tokens for {tier}")
+    return {**candidate, "prompt_tokens": prompt_tokens}
+
+def record_token_usage(task_id: Optional[str], tier: str, prompt_tokens: int, completion_tokens: int):
+    """Add one LLM call to the per-tier totals and to the task record"""
+    totals = token_usage_totals[tier]
+    totals["calls"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    if task_id and task_id in active_tasks:
+        usage = dict(active_tasks[task_id].get("token_usage") or {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        update_task(task_id, token_usage=usage)
+
+# Chunked (map-reduce) generation for documents that do not fit one prompt
+GENERATION_SECTION_PARALLELISM = int(os.getenv("GENERATION_SECTION_PARALLELISM", "4"))
+SECTION_ANALYSIS_ITEMS = 3  # analysis bullets per category in a section prompt
+GENERATION_TIER_LABELS = {
+    "openai": "OpenAI API (Tier 1)",
+    "llama": "Local Llama Model (Tier 2)",
+    "mock": "Enhanced Local Generation (Tier 3)"
+}
+SCENARIO_START_PATTERN = re.compile(r'^\s*Scenario( Outline| Template)?:', re.IGNORECASE)
+
+def section_token_budget(tier: str, api_context: str, operation: str) -> int:
+    """How many tokens of requirement text fit in one prompt for the given tier, from its prompt budget"""
+    scaffold = build_generation_context("", api_context, operation, RequirementAnalysis(), section=(1, 1))
+    overhead = count_prompt_tokens(scaffold, tier)
+    # Worst case for the per-section analysis bullets (5 categories, ~100 characters each)
+    overhead += estimate_tokens("x" * 105 * 5 * SECTION_ANALYSIS_ITEMS)
+    return max(prompt_token_budget(tier) - overhead, 200)
+
+def plan_requirement_sections(requirement_text: str, api_context: str, operation: str,
+                              analysis: "RequirementAnalysis", tier: str) -> List[str]:
+    """
+    Sections to generate separately, or [] when the document fits one prompt for the tier once
+    fit_model_context has dropped the analysis bullets. Runs on task_executor; Tier 2 counting only
+    reads the model's vocabulary, not a context that may be decoding.
+    """
+    smallest = build_generation_context(requirement_text, api_context, operation, analysis, max_items=0)
+    if count_prompt_tokens(smallest, tier) <= prompt_token_budget(tier):
+        return []
+    return split_requirement_sections(requirement_text, section_token_budget(tier, api_context, operation))
+
+def split_requirement_sections(requirement_text: str, max_tokens: int) -> List[str]:
+    """
+    Split a requirement document into sections of at most max_tokens, breaking at blank lines
+    where possible, then at line ends, and only cutting inside a line that is too long on its own.
+    """
+    max_chars = max_tokens * 4
+    sections, current, current_chars = [], [], 0
+
+    def flush():
+        nonlocal current, current_chars
+        if current:
+            sections.append("\n".join(current).strip("\n"))
+        current, current_chars = [], 0
+
+    for paragraph in re.split(r'\n\s*\n', requirement_text):
+        if not paragraph.strip():
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else [
+            line[i:i + max_chars] for line in paragraph.split('\n') for i in range(0, max(len(line), 1), max_chars)
+        ]
+        for piece in pieces:
+            if current and current_chars + len(piece) + 2 > max_chars:
+                flush()
+            current.append(piece + ("\n" if piece is paragraph else ""))
+            current_chars += len(piece) + 2
+    flush()
+    return [section for section in sections if section.strip()]
+
+def split_feature_blocks(feature_text: str):
+    """Split a generated feature file into (feature header lines, background lines, scenario blocks)"""
+    header, background, blocks = [], [], []
+    state = None
+    pending = []  # tags, comments and blank lines that may belong to the next scenario
+    for line in feature_text.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            continue
+        if stripped.startswith('Feature:'):
+            state = "feature"
+            header.append(stripped)
+            continue
+        if stripped.startswith('Background:'):
+            state = "background"
+            background.append(stripped)
+            continue
+        if SCENARIO_START_PATTERN.match(line):
+            state = "scenario"
+            blocks.append([l for l in pending if l.strip()] + [stripped])
+            pending = []
+            continue
+        if state == "scenario":
+            if not stripped or stripped.startswith(('@', '#')):
+                pending.append(line)
+                continue
+            blocks[-1].extend(pending)
+            pending = []
+            blocks[-1].append(line)
+        elif state == "background":
+            if stripped.startswith('@'):
+                pending.append(line)
+            elif stripped:
+                background.append(line)
+        elif state == "feature":
+            if stripped.startswith('@'):
+                pending.append(line)
+            elif stripped:
+                header.append(line)
+    if blocks:
+        blocks[-1].extend(l for l in pending if l.strip().startswith('#'))
+    return header, background, ["\n".join(block).rstrip() for block in blocks]
+
+def merge_feature_sections(section_outputs: List[str]) -> str:
+    """
+    Reduce step: one Feature header and one Background (taken from the first section that has
+    them), then every scenario once. Identical scenarios are dropped; different scenarios that
+    share a title get a numeric suffix.
+    """
+    feature_header, feature_background, scenarios = [], [], []
+    seen_blocks, title_counts = set(), {}
+    for output in section_outputs:
+        header, background, blocks = split_feature_blocks(output or "")
+        if not feature_header and header:
+            feature_header = header
+        if not feature_background and background:
+            feature_background = background
+        for block in blocks:
+            block_key = " ".join(block.lower().split())
+            if block_key in seen_blocks:
+                continue
+            seen_blocks.add(block_key)
+            lines = block.split('\n')
+            title_index = next(i for i, line in enumerate(lines) if SCENARIO_START_PATTERN.match(line))
+            keyword, title = lines[title_index].split(':', 1)
+            title_key = " ".join(title.lower().split())
+            title_counts[title_key] = title_counts.get(title_key, 0) + 1
+            if title_counts[title_key] > 1:
+                lines[title_index] = f"{keyword}: {title.strip()} ({title_counts[title_key]})"
+            scenarios.append("\n".join(lines))
+    parts = ["\n".join(feature_header or ["Feature: Generated API Test Cases"])]
+    if feature_background:
+        parts.append("\n".join(feature_background))
+    parts.extend(scenarios)
+    return "\n\n".join(parts) + "\n"
+
+async def generate_requirement_section(task_id: str, section_text: str, operation: str, api_context: str,
+                                       section: Tuple[int, int]) -> Tuple[str, str]:
+    """Map step: run the tier chain for one section and return (feature text, tier used)"""
+    # Each section prompt carries a short analysis of that section only
+    section_context = build_generation_context(
+        section_text, api_context, operation, analyze_requirements(section_text),
+        section=section, max_items=SECTION_ANALYSIS_ITEMS
+    )
+    label = f"section {section[0]}/{section[1]}"
+    if async_openai_client is not None and openai_health.allow_request():
+        openai_started = time.time()
+        try:
+            response_text = await generate_test_cases_with_openai(section_context, async_openai_client, task_id=task_id)
+            openai_health.record_success(time.time() - openai_started)
+            return response_text, "openai"
+        except Exception as openai_error:
+            failure = classify_openai_error(openai_error)
+            openai_health.record_failure(failure["status"], failure["message"], time.time() - openai_started)
+            print(f">>> ❌ OpenAI API failed on {label}: {openai_error}")
+    if llm is not None:
+        try:
+            return await generate_test_cases_with_llama(section_context, task_id=task_id), "llama"
+        except Exception as llama_error:
+            print(f">>> ❌ Local Llama model failed on {label}: {llama_error}")
+    loop = asyncio.get_running_loop()
+    response_text = await loop.run_in_executor(task_executor, generate_mock_test_cases, section_text, operation, api_context)
+    return response_text, "mock"
+
+async def generate_sectioned_test_cases(task_id: str, sections: List[str], operation: str, api_context: str):
+    """
+    Generate every section with at most GENERATION_SECTION_PARALLELISM in flight, then merge.
+    Returns (feature text, generation method, tier) or None if the task was cancelled.
+    The tier is None when sections ended up on different tiers.
+    """
+    semaphore = asyncio.Semaphore(max(1, GENERATION_SECTION_PARALLELISM))
+    results: List[Optional[Tuple[str, str]]] = [None] * len(sections)
+    finished = 0
+
+    async def run_section(index: int, section_text: str):
+        nonlocal finished
+        async with semaphore:
+            if is_task_cancelled(task_id):
+                return
+            results[index] = await generate_requirement_section(
+                task_id, section_text, operation, api_context, (index + 1, len(sections))
+            )
+            finished += 1
+            update_task(task_id, progress=40 + 40 * finished // len(sections),
+                        stage=f"Generated section {finished}/{len(sections)}")
+
+    await asyncio.gather(*(run_section(i, section) for i, section in enumerate(sections)))
+    if is_task_cancelled(task_id):
+        return None
+
+    merged = merge_feature_sections([text for text, _ in results])
+    tiers = [tier for _, tier in results]
+    if len(set(tiers)) == 1:
+        generation_method = f"{GENERATION_TIER_LABELS[tiers[0]]} - {len(sections)} sections"
+        return merged, generation_method, tiers[0]
+    tier_counts = ", ".join(
+        f"{tiers.count(tier)} x {GENERATION_TIER_LABELS[tier]}" for tier in GENERATION_TIER_LABELS if tier in tiers
+    )
+    return merged, f"Sectioned Generation ({len(sections)} sections: {tier_counts})", None
+
+class StreamingSanitizer:
+    """
+    Incremental counterpart of sanitize_ai_response for streamed completions.
+    Text is buffered until a full line is available, each complete line is sanitized,
+    leading blank lines are dropped and runs of blank lines collapse to one.
+    """
 
+    def __init__(self):
+        self.buffer = ""
+        self.started = False
+        self.pending_blank = False
+
+    def feed(self, chunk: str) -> str:
+        """Add raw streamed text and return the sanitized text for any lines it completed"""
+        self.buffer += chunk
+        if "\n" not in self.buffer:
+            return ""
+        complete, self.buffer = self.buffer.rsplit("\n", 1)
+        return "".join(self._emit_line(line) for line in complete.split("\n"))
+
+    def flush(self) -> str:
+        """Return the sanitized remainder once the stream has ended"""
+        remainder, self.buffer = self.buffer, ""
+        return self._emit_line(remainder, final=True) if remainder else ""
+
+    def _emit_line(self, line: str, final: bool = False) -> str:
+        cleaned = sanitize_ai_response_line(line)
+        if not cleaned.strip():
+            # Defer blank lines so that at most one separates two content lines
+            self.pending_blank = self.started
+            return ""
+        prefix = "\n" if self.pending_blank else ""
+        self.pending_blank = False
+        self.started = True
+        return prefix + cleaned + ("" if final else "\n")
+
+def count_new_scenarios(text: str) -> int:
+    """Count scenario headers in a fragment made of complete feature file lines"""
+    return sum(1 for line in text.split("\n") if line.strip().startswith(("Scenario:", "Scenario Outline:")))
+
+# Remove common problematic characters that appear in AI responses
+AI_RESPONSE_PROBLEMATIC_CHARS = [
+    "@ neue",
+    "développement",
+    "@ ",  # Remove stray @ symbols
+]
+AI_RESPONSE_PHRASES = [pattern for pattern in AI_RESPONSE_PROBLEMATIC_CHARS if pattern != "@ "]
+AI_RESPONSE_DISALLOWED_PATTERN = re.compile(r'[^\x20-\x7E\n\r\t]+')   # keep only printable ASCII + line breaks and tabs
+AI_RESPONSE_LINE_DISALLOWED_PATTERN = re.compile(r'[^\x20-\x7E\t]+')
+AI_RESPONSE_SPACES_PATTERN = re.compile(r'  +')
+AI_RESPONSE_BLANK_LINES_PATTERN = re.compile(r'\n\s*\n')
+
+class SanitizedText(str):
+    """Text that has already been through sanitize_ai_fragment; sanitizing it again returns it unchanged"""
+    __slots__ = ()
 
 def sanitize_ai_response(content: str) -> str:
     """Sanitize AI response to remove problematic characters and encoding issues"""
     if not content:
-        return ""
-    
-    # Remove common problematic characters that appear in AI responses
-    problematic_chars = [
-        "@ neue",
-        "développement",
-        "@ ",  # Remove stray @ symbols
-    ]
-    
-    sanitized = content
-    for char_pattern in problematic_chars:
-        sanitized = sanitized.replace(char_pattern, "")
-    
-    # Remove non-ASCII characters that might cause display issues
-    # Keep only printable ASCII + basic unicode
-    import re
-    sanitized = re.sub(r'[^\x20-\x7E\n\r\t]', '', sanitized)
-    
-    # Clean up multiple spaces and lines
-    sanitized = re.sub(r' +', ' ', sanitized)  # Multiple spaces to single
-    sanitized = re.sub(r'\n\s*\n', '\n\n', sanitized)  # Clean up blank lines
-    
-    return sanitized.strip()
+        return SanitizedText("")
+    stripped = sanitize_ai_fragment(content).strip()
+    return stripped if type(stripped) is SanitizedText else SanitizedText(stripped)
+
+def remove_ai_response_phrases(text: str) -> str:
+    for phrase in AI_RESPONSE_PHRASES:
+        if phrase in text:
+            text = text.replace(phrase, "")
+    return text
+
+def remove_stray_at_signs(text: str) -> str:
+    # Removing "@ " can join another "@" to a space ("@@  "), so repeat until none is left;
+    # generated text needs a single pass
+    while "@ " in text:
+        text = text.replace("@ ", "")
+    return text
+
+def sanitize_ai_fragment(content: str) -> str:
+    """
+    The rules of sanitize_ai_response without the final strip, for pieces of a larger text.
+    The known garbage phrases go first (one of them is not ASCII), then everything outside
+    printable ASCII, stray "@ ", repeated spaces and runs of blank lines. Each rule is one pass
+    of a pattern compiled at import, skipped when the text cannot match, and the result is
+    idempotent.
+    """
+    if type(content) is SanitizedText:
+        return content
+    sanitized = AI_RESPONSE_DISALLOWED_PATTERN.sub('', remove_ai_response_phrases(content))
+    sanitized = remove_stray_at_signs(sanitized)
+    if "  " in sanitized:
+        sanitized = AI_RESPONSE_SPACES_PATTERN.sub(' ', sanitized)  # Multiple spaces to single
+    if "\n" in sanitized:
+        sanitized = AI_RESPONSE_BLANK_LINES_PATTERN.sub('\n\n', sanitized)  # Clean up blank lines
+    return SanitizedText(sanitized)
+
+def sanitize_ai_response_line(line: str) -> str:
+    """Apply the character-level rules of sanitize_ai_response to a single line of text"""
+    sanitized = remove_ai_response_phrases(line.rstrip("\r"))
+    if not sanitized.isascii() or not sanitized.isprintable():
+        sanitized = AI_RESPONSE_LINE_DISALLOWED_PATTERN.sub('', sanitized)
+    sanitized = remove_stray_at_signs(sanitized)
+    if "  " in sanitized:
+        sanitized = AI_RESPONSE_SPACES_PATTERN.sub(' ', sanitized)
+    return sanitized.rstrip()
+
+# Compile the Tier 3 templates for the common methods up front
+for mock_method in MOCK_STANDARD_METHODS:
+    get_mock_template_set(mock_method)
 
 @app.post("/run-rest-assured")
 async def run_rest_assured_test(request: RestAssuredRequest):
@@ -1478,19 +3897,14 @@ async def run_rest_assured_test(request: RestAssuredRequest):
                 endpoint += '/'
             endpoint += request.resourceId
         
-        if method == 'GET':
-            response = requests.get(endpoint, headers=headers, auth=auth, timeout=30)
-        elif method == 'POST':
-            response = requests.post(endpoint, headers=headers, json=data, auth=auth, timeout=30)
-        elif method == 'PUT':
-            response = requests.put(endpoint, headers=headers, json=data, auth=auth, timeout=30)
-        elif method == 'DELETE':
-            response = requests.delete(endpoint, headers=headers, auth=auth, timeout=30)
-        elif method == 'PATCH':
-            response = requests.patch(endpoint, headers=headers, json=data, auth=auth, timeout=30)
-        else:
+        if method not in ('GET', 'POST', 'PUT', 'DELETE', 'PATCH'):
             raise HTTPException(status_code=400, detail=f"Unsupported HTTP method: {method}")
         
+        request_kwargs = {"headers": headers, "auth": auth}
+        if method in ('POST', 'PUT', 'PATCH'):
+            request_kwargs["json"] = data
+        response = await send_target_request(method, endpoint, 30, **request_kwargs)
+        
         # Format response
         try:
             response_data = response.json()
@@ -1506,9 +3920,9 @@ async def run_rest_assured_test(request: RestAssuredRequest):
         print(f">>> REST Assured test completed: {response.status_code}")
         return JSONResponse(result.dict())
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(status_code=408, detail="API request timed out")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="Failed to connect to API endpoint")
     except Exception as e:
         print(f">>> REST Assured test error: {str(e)}")
@@ -1535,125 +3949,357 @@ def format_response_with_request(request_details: str, response_data: str):
 {response_data}
 ==============="""
 
+# Karate feature AST - parsed once per feature text and shared by execution, validation and reporting
+KARATE_AST_CACHE_ENTRIES = int(os.getenv("KARATE_AST_CACHE_ENTRIES", "128"))
+KARATE_STEP_PATTERN = re.compile(r'^(Given|When|Then|And|But|\*)(?:\s+(.*))?$')
+KARATE_STEP_ACTION_PATTERN = re.compile(
+    r'^(path|url|method|status|header|headers|param|params|request|def|text|json|match|assert|print|configure|call|retry|cookie|form field)\b\s*(.*)$',
+    re.DOTALL
+)
+KARATE_SECTION_PATTERN = re.compile(r'^(Feature|Background|Scenario Outline|Scenario Template|Scenario|Examples|Scenarios):\s*(.*)$')
+KARATE_QUOTED_PATTERN = re.compile(r"['\"]([^'\"]+)['\"]")
+KARATE_PLACEHOLDER_PATTERN = re.compile(r'<([^<>\s][^<>]*)>')
+KARATE_BRACKET_CHARS = frozenset("{}[]()")
+
+@dataclass(frozen=True)
+class KarateStep:
+    line: int
+    keyword: str          # Given, When, Then, And, But or *
+    text: str             # the step line as written (first line only for multi-line steps)
+    action: str           # path, method, status, header, request, def, match, ... or "" for plain text steps
+    value: Any            # typed payload: str path/method, int status, (name, value) for header/def/param/configure
+    body: str = ""        # continuation lines of a multi-line JSON value or doc string
+    table: Tuple[Tuple[str, ...], ...] = ()
+    end_line: int = 0     # last line of the step, including its body, doc string or table
+
+@dataclass(frozen=True)
+class KarateExamples:
+    line: int
+    name: str
+    header: Tuple[str, ...]
+    rows: Tuple[Tuple[int, Tuple[str, ...]], ...]  # (line number, cell values)
+
+@dataclass(frozen=True)
+class KarateScenario:
+    line: int
+    name: str
+    outline: bool
+    tags: Tuple[str, ...]
+    comments: Tuple[str, ...]
+    steps: Tuple[KarateStep, ...]
+    examples: Tuple[KarateExamples, ...] = ()
+    background: Tuple[KarateStep, ...] = ()  # the Background in effect for this scenario
+
+    def example_count(self) -> int:
+        return sum(len(table.rows) for table in self.examples)
+
+    def expand(self):
+        """Yield one concrete scenario per Examples row, with <placeholders> substituted in names and steps"""
+        number = 0
+        for table in self.examples:
+            for line, cells in table.rows:
+                number += 1
+                values = dict(zip(table.header, cells))
+                substitute = lambda text: KARATE_PLACEHOLDER_PATTERN.sub(lambda m: values.get(m.group(1), m.group(0)), text)
+                name = substitute(self.name)
+                if name == self.name:
+                    name = f"{self.name} (example {number})"
+                steps = tuple(
+                    build_karate_step(step.line, substitute(step.text), substitute(step.body), step.table, step.end_line)
+                    for step in self.steps
+                )
+                yield KarateScenario(line, name, False, self.tags, self.comments, steps, (), self.background)
+
+@dataclass(frozen=True)
+class KarateFeature:
+    name: str
+    line: int
+    tags: Tuple[str, ...]
+    description: str
+    background: Tuple[KarateStep, ...]   # the first Background; concatenated features keep theirs on each scenario
+    scenarios: Tuple[KarateScenario, ...]
+    digest: str
+    issues: Tuple[Tuple[int, str], ...] = ()   # (line, message) for text the parser could not place
+
+    def scenario_count(self) -> int:
+        """Executable scenarios, counting each Examples row of an outline"""
+        return sum(scenario.example_count() if scenario.outline else 1 for scenario in self.scenarios)
+
+def build_karate_step(line: int, text: str, body: str = "", table: tuple = (), end_line: int = 0) -> KarateStep:
+    """Classify a step line and extract its typed payload"""
+    keyword, action, value = classify_karate_step(text, body)
+    return KarateStep(line, keyword, text, action, value, body, table, end_line or line)
+
+@lru_cache(maxsize=4096)
+def classify_karate_step(text: str, body: str) -> Tuple[str, str, Any]:
+    """(keyword, action, value) for a step; generated features repeat the same steps heavily"""
+    match = KARATE_STEP_PATTERN.match(text)
+    keyword, rest = match.group(1), (match.group(2) or "")
+    action_match = KARATE_STEP_ACTION_PATTERN.match(rest)
+    if not action_match:
+        return keyword, "", rest
+    action, argument = action_match.group(1), action_match.group(2).strip()
+    full_argument = f"{argument}\n{body}" if body else argument
+    if action == "path":
+        quoted = KARATE_QUOTED_PATTERN.search(argument)
+        value = quoted.group(1).replace(" ", "") if quoted else argument.strip("'\"").replace(" ", "")
+    elif action == "url":
+        quoted = KARATE_QUOTED_PATTERN.search(argument)
+        value = quoted.group(1) if quoted else argument
+    elif action == "method":
+        value = argument.upper()
+    elif action == "status":
+        value = next((int(part) for part in argument.split() if part.isdigit()), None)
+    elif action in ("header", "def", "param", "configure", "cookie", "form field", "text", "json"):
+        name, _, expression = full_argument.partition("=")
+        expression = expression.strip()
+        if action in ("header", "param", "cookie", "form field") and "\n" not in expression:
+            expression = expression.strip("'").strip('"')
+        value = (name.strip(), expression)
+    else:
+        value = full_argument
+    return keyword, action, value
+
+def karate_bracket_depth(text: str) -> int:
+    """Net count of unclosed {, [ and ( outside quoted strings, to join multi-line JSON step values"""
+    depth = 0
+    quote = None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "{[(":
+            depth += 1
+        elif char in "}])":
+            depth -= 1
+    return depth
+
+def split_table_row(line: str) -> Tuple[str, ...]:
+    return tuple(cell.strip() for cell in line.strip().strip("|").split("|"))
+
+def _parse_karate_feature(content: str, digest: str) -> KarateFeature:
+    """Single pass over the lines; every line is classified exactly once"""
+    feature_name, feature_line, feature_tags, description = "", 0, (), []
+    background: List[KarateStep] = []
+    backgrounds: List[Tuple[KarateStep, ...]] = []
+    snapshot_of = None      # the background list backgrounds[-1] was taken from
+    scenarios: List[KarateScenario] = []
+    pending_tags: List[str] = []
+    pending_comments: List[str] = []
+    section = None          # None, "feature", "background", "scenario" or "examples"
+    scenario = None         # dict for the scenario being built
+    steps = None            # the step list being filled (background or scenario)
+    examples = None         # dict for the Examples table being built
+    open_step = None        # [line, text, body lines, table rows, bracket depth, last line] awaiting continuation lines
+    in_doc_string = False
+    issues: List[Tuple[int, str]] = []
+
+    def close_step():
+        nonlocal open_step
+        if open_step is not None:
+            steps.append(build_karate_step(open_step[0], open_step[1], "\n".join(open_step[2]), tuple(open_step[3]), open_step[5]))
+            open_step = None
+
+    def close_examples():
+        nonlocal examples
+        if examples is not None and scenario is not None:
+            header = examples["rows"][0][1] if examples["rows"] else ()
+            scenario["examples"].append(KarateExamples(examples["line"], examples["name"], header, tuple(examples["rows"][1:])))
+        examples = None
+
+    def close_scenario():
+        nonlocal scenario, snapshot_of
+        close_step()
+        close_examples()
+        if scenario is not None:
+            # Each Feature and Background starts a new list, and a list only grows, so this
+            # detects any change without comparing the steps
+            if snapshot_of is not background or len(backgrounds[-1]) != len(background):
+                backgrounds.append(tuple(background))
+                snapshot_of = background
+            scenarios.append(KarateScenario(
+                scenario["line"], scenario["name"], scenario["outline"], scenario["tags"],
+                tuple(scenario["comments"]), tuple(scenario["steps"]), tuple(scenario["examples"]), backgrounds[-1]
+            ))
+        scenario = None
+
+    for number, raw_line in enumerate(content.split("\n"), 1):
+        line = raw_line.strip()
+
+        if in_doc_string:
+            open_step[5] = number
+            if line.startswith('"""'):
+                in_doc_string = False
+                close_step()
+            else:
+                open_step[2].append(raw_line.rstrip())
+            continue
+        if open_step is not None and open_step[4] > 0:
+            # Inside a multi-line JSON value: keep reading until the brackets balance, unless the
+            # model left them unbalanced and the next step or section has started
+            if not (KARATE_SECTION_PATTERN.match(line) or (line[:1] in "GWTAB*" and KARATE_STEP_PATTERN.match(line))):
+                open_step[2].append(raw_line.rstrip())
+                open_step[4] += karate_bracket_depth(line)
+                open_step[5] = number
+                if open_step[4] <= 0:
+                    close_step()
+                continue
+            issues.append((open_step[0], f"Unbalanced body: {open_step[4]} unclosed bracket(s) before line {number}"))
+            close_step()
+
+        if not line:
+            continue
+        first = line[0]
+        if first == "#":
+            pending_comments.append(line[1:].strip())
+            continue
+        if first == "@":
+            pending_tags.extend(tag for tag in line.split() if tag.startswith("@"))
+            continue
+        if line.startswith('"""') and open_step is not None:
+            in_doc_string = True
+            open_step[5] = number
+            continue
+        if first == "|":
+            if section == "examples":
+                examples["rows"].append((number, split_table_row(line)))
+            elif open_step is not None:
+                open_step[3].append(split_table_row(line))
+                open_step[5] = number
+            continue
+
+        step_match = KARATE_STEP_PATTERN.match(line) if first in "GWTAB*" else None
+        if step_match and steps is not None and section in ("background", "scenario"):
+            close_step()
+            if scenario is not None and pending_comments:
+                scenario["comments"].extend(pending_comments)
+            pending_comments = []
+            depth = 0 if KARATE_BRACKET_CHARS.isdisjoint(line) else karate_bracket_depth(line)
+            if depth < 0:
+                issues.append((number, f"Unbalanced body: {-depth} unmatched closing bracket(s)"))
+            open_step = [number, line, [], [], depth, number]
+            continue
+
+        section_match = KARATE_SECTION_PATTERN.match(line)
+        if section_match:
+            keyword, title = section_match.group(1), section_match.group(2).strip()
+            if keyword == "Feature":
+                close_scenario()
+                close_step()
+                if feature_line:
+                    # Concatenated features: the scenarios of this one do not inherit the previous Background
+                    background = []
+                else:
+                    feature_name, feature_line, feature_tags = title, number, tuple(pending_tags)
+                section, steps = "feature", None
+                pending_comments = []
+            elif keyword == "Background":
+                close_scenario()
+                background = []
+                section, steps = "background", background
+                pending_comments = []
+            elif keyword in ("Examples", "Scenarios"):
+                close_step()
+                close_examples()
+                if scenario is not None:
+                    examples = {"line": number, "name": title, "rows": []}
+                    section = "examples"
+            else:
+                close_scenario()
+                scenario = {
+                    "line": number, "name": title, "outline": keyword != "Scenario", "tags": tuple(pending_tags),
+                    "comments": list(pending_comments), "steps": [], "examples": []
+                }
+                section, steps = "scenario", scenario["steps"]
+                pending_comments = []
+            pending_tags = []
+            continue
+
+        if section == "feature":
+            description.append(line)
+        elif section in ("background", "scenario", "examples"):
+            # Stray text inside a scenario is not part of the AST; JSON here was meant as a step value
+            if first in "{[" or (first == '"' and ":" in line):
+                issues.append((number, "JSON outside a step: use '* def', 'And request' or a \"\"\" doc string"))
+            else:
+                issues.append((number, f"Not a Karate step: {line[:60]}"))
+
+    if in_doc_string:
+        issues.append((open_step[0], 'Unbalanced body: doc string is not closed with """'))
+    elif open_step is not None and open_step[4] > 0:
+        issues.append((open_step[0], f"Unbalanced body: {open_step[4]} unclosed bracket(s) at end of file"))
+    close_scenario()
+    return KarateFeature(feature_name, feature_line, feature_tags, "\n".join(description),
+                         backgrounds[0] if backgrounds else tuple(background), tuple(scenarios), digest, tuple(issues))
+
+karate_ast_cache: "OrderedDict[str, KarateFeature]" = OrderedDict()
+karate_ast_lock = threading.Lock()  # features are parsed on the event loop and in task_executor threads
+
+def parse_karate_feature(content: str) -> KarateFeature:
+    """Parse a feature file into its AST, reusing the cached AST for text seen before"""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    with karate_ast_lock:
+        feature = karate_ast_cache.get(digest)
+        if feature is not None:
+            karate_ast_cache.move_to_end(digest)
+            return feature
+    feature = _parse_karate_feature(content, digest)
+    with karate_ast_lock:
+        karate_ast_cache[digest] = feature
+        while len(karate_ast_cache) > KARATE_AST_CACHE_ENTRIES:
+            karate_ast_cache.popitem(last=False)
+    return feature
+
+def iter_karate_test_cases(feature: KarateFeature):
+    """
+    Yield structured test case objects for the automation runner, one at a time.
+    Scenario Outline rows are expanded only when the runner asks for the next case.
+    """
+    for scenario in feature.scenarios:
+        if not scenario.steps:
+            continue
+        for case in (scenario.expand() if scenario.outline else (scenario,)):
+            yield create_test_case_from_scenario(case)
+
+def count_karate_test_cases(feature: KarateFeature) -> int:
+    """Number of test cases iter_karate_test_cases will yield, without expanding anything"""
+    return sum((scenario.example_count() if scenario.outline else 1) for scenario in feature.scenarios if scenario.steps)
+
 def parse_karate_feature_to_test_cases(feature_content: str) -> List[Dict[str, Any]]:
     """
     Parse raw Karate feature file content into structured test case objects
     that the backend can process for automation execution.
-    Enhanced to handle complex scenarios with mixed content.
-    """
-    test_cases = []
-    lines = feature_content.split('\n')
-    current_scenario = None
-    current_steps = []
-    current_comments = []
-    in_scenario = False
-    
-    print(f">>> Parsing Karate feature with {len(lines)} lines")
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        # Detect scenario start (handle both "Scenario:" and "Scenario Outline:")
-        if line.startswith('Scenario:') or line.startswith('Scenario Outline:'):
-            # Save previous scenario if exists
-            if current_scenario and current_steps:
-                test_case = create_test_case_from_scenario(current_scenario, current_steps, current_comments)
-                if test_case:
-                    test_cases.append(test_case)
-                    print(f">>> Added scenario: {current_scenario[:50]}...")
-            
-            # Start new scenario
-            scenario_line = line.replace('Scenario:', '').replace('Scenario Outline:', '').strip()
-            current_scenario = scenario_line
-            current_steps = []
-            current_comments = []
-            in_scenario = True
-            print(f">>> Found new scenario: {scenario_line[:50]}...")
-            
-        # Collect comments (requirement links) - only within scenarios
-        elif in_scenario and line.startswith('#'):
-            current_comments.append(line[1:].strip())
-            
-        # Collect scenario steps - the main test logic
-        elif in_scenario and line.startswith(('Given', 'When', 'Then', 'And', '*')):
-            current_steps.append(line)
-            print(f">>> Added step: {line[:50]}...")
-            
-        # Look for Background section steps (applies to all scenarios)
-        elif line.startswith(('Given', 'When', 'Then', 'And', '*')) and not in_scenario:
-            # These are background steps that apply to all scenarios
-            # We'll handle them separately if needed
-            pass
-            
-        i += 1
-    
-    # Don't forget the last scenario
-    if current_scenario and current_steps:
-        test_case = create_test_case_from_scenario(current_scenario, current_steps, current_comments)
-        if test_case:
-            test_cases.append(test_case)
-            print(f">>> Added final scenario: {current_scenario[:50]}...")
-    
+    Scenario Outlines are expanded into one test case per Examples row.
+    """
+    feature = parse_karate_feature(feature_content)
+    print(f">>> Parsing Karate feature with {len(feature.scenarios)} scenario blocks")
+    test_cases = list(iter_karate_test_cases(feature))
     print(f">>> Successfully parsed {len(test_cases)} test scenarios from Karate feature file")
     return test_cases
 
-def create_test_case_from_scenario(scenario_name: str, steps: List[str], comments: List[str]) -> Dict[str, Any]:
-    """Create a structured test case object from Karate scenario data"""
-    
-    # Extract expected status from steps
-    expected_status = 200  # default
-    for step in steps:
-        if 'Then status' in step:
-            # Extract status code from "Then status 200", "Then status 400", etc.
-            parts = step.split()
-            for part in parts:
-                if part.isdigit():
-                    expected_status = int(part)
-                    break
-                elif '<' in part:  # Handle "status < 400"
-                    if '400' in part:
-                        expected_status = 200  # Assume success for "< 400"
-                    break
-    
-    # Extract HTTP method from steps
-    http_method = "GET"  # default
-    for step in steps:
-        if 'When method' in step:
-            method_part = step.split('method')[1].strip()
-            http_method = method_part.upper()
-            break
-    
-    # Extract path from steps with improved parsing
-    api_path = ""
-    for step in steps:
-        if 'Given path' in step:
-            # Extract path from "Given path 'railCollections'" or similar patterns
-            import re
-            # Look for content between single quotes after 'Given path'
-            path_pattern = r"Given path\s+['\"]([^'\"]+)['\"]"
-            match = re.search(path_pattern, step)
-            if match:
-                api_path = match.group(1)
-                # Ensure the path doesn't contain spaces (fix splitting issues)
-                api_path = api_path.replace(" ", "")
-            else:
-                # Fallback to simple splitting if regex fails
-                path_match = step.split("'")
-                if len(path_match) >= 3:  # Expected format: "Given path '" + path + "'"
-                    api_path = path_match[1].replace(" ", "")
-            break
-    
-    # Extract headers from steps
-    headers = {}
+def collect_request_steps(steps: Tuple[KarateStep, ...]) -> Tuple[dict, dict]:
+    """First path, method and status of a step list, plus its headers (later headers win)"""
+    values, headers = {}, {}
     for step in steps:
-        if step.strip().startswith('* header'):
-            # e.g., * header Accept = 'application/xml'
-            parts = step.split('=', 1)
-            if len(parts) == 2:
-                header_key = parts[0].replace('* header', '').strip()
-                header_value = parts[1].strip().strip("'").strip('"')
-                headers[header_key] = header_value
+        if step.action in ("path", "method", "status"):
+            if step.action not in values and step.value not in (None, ""):
+                values[step.action] = step.value
+        elif step.action == "header":
+            headers[step.value[0]] = step.value[1]
+    return values, headers
+
+def create_test_case_from_scenario(scenario: KarateScenario) -> Dict[str, Any]:
+    """Create a structured test case object from a parsed scenario; its Background's headers and path apply to it"""
+    background_values, background_headers = collect_request_steps(scenario.background)
+    scenario_values, scenario_headers = collect_request_steps(scenario.steps)
+    values = {**background_values, **scenario_values}
+    headers = {**background_headers, **scenario_headers}
+    expected_status = values.get("status", 200)
+    http_method = values.get("method", "GET")
+    api_path = values.get("path", "")
+    steps = [step.text for step in scenario.steps]
     
     # Determine test type based on scenario name and expected status
     test_type = "positive" if expected_status < 400 else "negative"
@@ -1663,7 +4309,7 @@ def create_test_case_from_scenario(scenario_name: str, steps: List[str], comment
     objective = ""
     requirement_link = ""
     
-    for comment in comments:
+    for comment in scenario.comments:
         if comment.startswith("Positive Test Case:") or comment.startswith("Negative Test Case:"):
             description = comment
         elif comment.startswith("Requirement:"):
@@ -1673,7 +4319,7 @@ def create_test_case_from_scenario(scenario_name: str, steps: List[str], comment
     
     # Create structured test case object
     test_case = {
-        "Test Scenario": scenario_name,
+        "Test Scenario": scenario.name,
         "Test Description": description or f"{test_type.title()} test scenario",
         "Test Objective": objective or f"Validate {http_method} {api_path} returns {expected_status}",
         "Test Type": test_type,
@@ -1694,6 +4340,354 @@ def create_test_case_from_scenario(scenario_name: str, steps: List[str], comment
     
     return test_case
 
+# Shared HTTP clients for the APIs under test - one keep-alive pool per target origin
+TARGET_HTTP_MAX_CONNECTIONS = int(os.getenv("TARGET_HTTP_MAX_CONNECTIONS", "20"))
+TARGET_HTTP_MAX_KEEPALIVE = int(os.getenv("TARGET_HTTP_MAX_KEEPALIVE", "10"))
+TARGET_HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("TARGET_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+TARGET_HTTP2_ENABLED = env_flag("TARGET_HTTP2_ENABLED", True)
+
+try:
+    import h2  # noqa: F401 - httpx only negotiates HTTP/2 when the h2 package is installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class TargetHTTPClientPool:
+    """
+    App-lifetime httpx clients keyed by scheme/host/port, so every scenario fired at the
+    same base URL reuses warm connections instead of paying a new TCP/TLS handshake.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, keepalive_expiry: float, http2: bool):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self.clients: Dict[tuple, httpx.AsyncClient] = {}
+        self.requests_sent = 0
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        target = httpx.URL(url)
+        origin = (target.scheme, target.host, target.port)
+        client = self.clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(limits=self.limits, http2=self.http2, follow_redirects=True)
+            self.clients[origin] = client
+            print(f">>> Opened HTTP client pool for {target.scheme}://{target.netloc.decode()} (HTTP/2: {self.http2})")
+        self.requests_sent += 1
+        return client
+
+    async def aclose(self):
+        clients, self.clients = list(self.clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    def status(self) -> dict:
+        return {
+            "hosts": len(self.clients),
+            "requests_sent": self.requests_sent,
+            "http2": self.http2,
+            "max_connections_per_host": TARGET_HTTP_MAX_CONNECTIONS
+        }
+
+target_http_pool: Optional[TargetHTTPClientPool] = None
+
+@app.on_event("startup")
+async def open_target_http_pool():
+    global target_http_pool
+    target_http_pool = TargetHTTPClientPool(
+        TARGET_HTTP_MAX_CONNECTIONS,
+        TARGET_HTTP_MAX_KEEPALIVE,
+        TARGET_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        http2=TARGET_HTTP2_ENABLED and HTTP2_AVAILABLE
+    )
+
+@app.on_event("shutdown")
+async def close_target_http_pool():
+    global target_http_pool
+    if target_http_pool is not None:
+        await target_http_pool.aclose()
+        target_http_pool = None
+
+async def send_target_request(method: str, url: str, timeout: float, **kwargs) -> httpx.Response:
+    """Send a request to the API under test through the shared pool (or a one-off client outside the app lifespan)"""
+    if target_http_pool is not None:
+        return await target_http_pool.get(url).request(method, url, timeout=timeout, **kwargs)
+    async with httpx.AsyncClient(follow_redirects=True) as client:
+        return await client.request(method, url, timeout=timeout, **kwargs)
+
+# Automation results kept by task ID so reports never have to re-run the suite
+AUTOMATION_RESULTS_MEMORY_ENTRIES = int(os.getenv("AUTOMATION_RESULTS_MEMORY_ENTRIES", "50"))
+AUTOMATION_RESULTS_DB_PATH = os.getenv("AUTOMATION_RESULTS_DB_PATH", "")  # opt-in, e.g. .cache/automation_results.sqlite3
+AUTOMATION_RESULTS_DB_MAX_ENTRIES = int(os.getenv("AUTOMATION_RESULTS_DB_MAX_ENTRIES", "200"))
+AUTOMATION_RESULTS_TTL_SECONDS = int(os.getenv("AUTOMATION_RESULTS_TTL_SECONDS", str(7 * 24 * 3600)))
+
+class AutomationResultStore:
+    """
+    Stores finished /run-automation-script results by task ID. Recent runs stay in an in-memory
+    LRU; when AUTOMATION_RESULTS_DB_PATH is set every run is also written to SQLite so reports
+    survive a restart, keeping at most db_max_entries runs for ttl_seconds. The password and
+    token are masked everywhere in a run (Karate steps, feature file, echoed responses) before
+    it is stored.
+    """
+
+    def __init__(self, memory_entries: int, db_path: Optional[str], ttl_seconds: int, db_max_entries: int = 200):
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_max_entries = db_max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self.db = sqlite3.connect(db_path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS automation_results ("
+                    "task_id TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f">>> Automation result disk store disabled: {e}")
+                self.db = None
+
+    @staticmethod
+    def describe_request(request: RestAssuredRequest) -> dict:
+        """Keep what the report needs from the request, without secrets or the test case payload"""
+        return {
+            "apiEndpoint": request.apiEndpoint,
+            "method": request.method,
+            "username": request.username,
+            "password": "***" if request.password else None,
+            "token": "***" if request.token else None,
+            "acceptHeader": request.acceptHeader,
+            "resourceId": request.resourceId
+        }
+
+    @staticmethod
+    def request_secrets(request: RestAssuredRequest) -> List[str]:
+        secrets = [secret for secret in (request.password, request.token) if secret]
+        if request.username and request.password:
+            # The Authorization header sent for Basic auth, in case the API under test echoes it back
+            secrets.append(base64.b64encode(f"{request.username}:{request.password}".encode("utf-8")).decode("ascii"))
+        # Longest first, so a secret containing another one is masked whole
+        return sorted(secrets, key=len, reverse=True)
+
+    @classmethod
+    def mask_secrets(cls, value, secrets: List[str]):
+        """Replace every occurrence of the secrets in the strings of a JSON-like value"""
+        if isinstance(value, str):
+            for secret in secrets:
+                if secret in value:
+                    value = value.replace(secret, "***")
+            return value
+        if isinstance(value, dict):
+            return {key: cls.mask_secrets(item, secrets) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.mask_secrets(item, secrets) for item in value]
+        return value
+
+    def put(self, task_id: str, result: dict, request: RestAssuredRequest):
+        now = time.time()
+        entry = {
+            "result": self.mask_secrets(result, self.request_secrets(request)),
+            "request": self.describe_request(request),
+            "created_at": now
+        }
+        with self.lock:
+            self._remember(task_id, entry)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO automation_results VALUES (?, ?, ?)",
+                    (task_id, json.dumps(entry), now)
+                )
+                self.db.execute("DELETE FROM automation_results WHERE created_at < ?", (now - self.ttl_seconds,))
+                self.db.execute(
+                    "DELETE FROM automation_results WHERE task_id NOT IN "
+                    "(SELECT task_id FROM automation_results ORDER BY created_at DESC LIMIT ?)",
+                    (self.db_max_entries,)
+                )
+                self.db.commit()
+
+    def get(self, task_id: str) -> Optional[dict]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(task_id)
+            if entry is not None and now - entry["created_at"] <= self.ttl_seconds:
+                self.memory.move_to_end(task_id)
+                return entry
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT payload FROM automation_results WHERE task_id = ? AND created_at >= ?",
+                    (task_id, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    entry = json.loads(row[0])
+                    self._remember(task_id, entry)
+                    return entry
+            return None
+
+    def _remember(self, task_id: str, entry: dict):
+        self.memory[task_id] = entry
+        self.memory.move_to_end(task_id)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+automation_results = AutomationResultStore(
+    memory_entries=AUTOMATION_RESULTS_MEMORY_ENTRIES,
+    db_path=AUTOMATION_RESULTS_DB_PATH,
+    ttl_seconds=AUTOMATION_RESULTS_TTL_SECONDS,
+    db_max_entries=AUTOMATION_RESULTS_DB_MAX_ENTRIES
+)
+
+async def store_automation_result(task_id: str, result: dict, request: RestAssuredRequest):
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(task_executor, automation_results.put, task_id, result, request)
+    except Exception as e:
+        print(f">>> Could not store automation results for task {task_id}: {e}")
+
+# Concurrent execution engine for generated test cases
+AUTOMATION_CONCURRENCY = int(os.getenv("AUTOMATION_CONCURRENCY", "10"))
+AUTOMATION_HOST_RATE_LIMIT = float(os.getenv("AUTOMATION_HOST_RATE_LIMIT", "20"))  # requests/second per host, 0 disables
+AUTOMATION_REQUEST_TIMEOUT_SECONDS = float(os.getenv("AUTOMATION_REQUEST_TIMEOUT_SECONDS", "10"))
+
+class HostRateLimiter:
+    """Spaces out requests to the same host so a concurrent suite cannot flood the API under test"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.next_slot = {}
+
+    async def acquire(self, host: str):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        # No await between reading and booking the slot, so concurrent callers never share one
+        slot = max(now, self.next_slot.get(host, 0.0))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+automation_rate_limiter = HostRateLimiter(AUTOMATION_HOST_RATE_LIMIT)
+
+async def execute_automation_test_case(index: int, total: int, test_case: Dict[str, Any],
+                                       processed_request: RestAssuredRequest) -> Dict[str, Any]:
+    """Execute one generated test case and format its result row"""
+    i = index
+    scenario_name = (
+        test_case.get('Test Scenario') or 
+        test_case.get('scenario') or 
+        test_case.get('Scenario') or 
+        f"Generated Test Case {i+1}"
+    )
+    
+    print(f">>> Executing test case {i+1}/{total}: {scenario_name}")
+    print(f">>> Test case data preview: {json.dumps(test_case, indent=2)[:200]}...")
+    
+    try:
+        # Extract test case details
+        expected_status = extract_expected_status(test_case)
+        test_data = extract_test_data(test_case, processed_request)
+        
+        print(f">>> Expected status: {expected_status}")
+        print(f">>> Extracted test data: {json.dumps(test_data, indent=2)[:200]}...")
+        
+        # Create a custom request for this test case
+        test_request = create_test_request(processed_request, test_case, test_data)
+        
+        # Execute the test
+        print(f">>> Executing API call for test case {i+1}...")
+        result = await execute_generated_test_case(test_request, test_case, f"generated_test_{i+1}")
+        print(f">>> Test case {i+1} completed - Status: {result.get('statusCode', 'unknown')}")
+        
+        # Format the result
+        status_info = determine_test_status(result, expected_status)
+        print(f">>> Test case {i+1} result: {status_info}")
+        return {
+            "scenario": scenario_name,
+            "status": status_info["status"],
+            "justification": status_info["justification"],
+            "expectedStatus": expected_status,
+            "statusCode": result.get("statusCode", 0),
+            "response": result.get("response", ""),
+            "details": get_test_case_details(test_case),
+            "expectedResult": test_case.get('Expected Result', 'Not specified'),
+            "actualResult": result.get("response", ""),
+            "karateStep": generate_karate_step(test_request, expected_status),
+            "testData": test_data
+        }
+        
+    except Exception as e:
+        print(f">>> Error executing test case {i+1}: {str(e)}")
+        return {
+            "scenario": scenario_name,
+            "status": "FAILED",
+            "justification": f"Test execution failed with an exception: {str(e)}",
+            "statusCode": 0,
+            "expectedStatus": extract_expected_status(test_case),
+            "response": f"Execution error: {str(e)}",
+            "details": get_test_case_details(test_case),
+            "expectedResult": test_case.get('Expected Result', 'Not specified'),
+            "actualResult": f"Error: {str(e)}",
+            "karateStep": f"# Test case execution failed: {str(e)}",
+            "testData": {}
+        }
+
+async def execute_automation_test_cases(task_id: str, test_cases, processed_request: RestAssuredRequest,
+                                        total: Optional[int] = None, executed: Optional[list] = None):
+    """
+    Run test cases with at most AUTOMATION_CONCURRENCY in flight. Returns (results, cancelled);
+    results are in scenario order and, after a cancellation, hold only the finished ones.
+    test_cases may be any iterable, e.g. a generator expanding Scenario Outline rows: a fixed set
+    of workers pulls the next case only when it is free, so a large outline is never expanded
+    up front. Pass a list as executed to get the test cases that were run, in the same order.
+    """
+    if total is None:
+        total = len(test_cases)
+    results: Dict[int, Dict[str, Any]] = {}
+    cases: Dict[int, Dict[str, Any]] = {}
+    source = enumerate(test_cases)
+    
+    async def worker():
+        # next() runs between awaits on the event loop, so workers never receive the same case
+        while not is_task_cancelled(task_id):
+            item = next(source, None)
+            if item is None:
+                return
+            index, test_case = item
+            cases[index] = test_case
+            results[index] = await execute_automation_test_case(index, total, test_case, processed_request)
+    
+    pending = {asyncio.create_task(worker()) for _ in range(max(1, min(AUTOMATION_CONCURRENCY, total or 1)))}
+    cancelled = False
+    while pending:
+        # Wake up regularly so a cancel request stops in-flight calls promptly
+        done, pending = await asyncio.wait(pending, timeout=TASK_STREAM_POLL_SECONDS)
+        failed = next((task for task in done if task.exception() is not None), None)
+        if failed is not None:
+            # Expanding the next test case failed; stop the other workers and surface the error
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise failed.exception()
+        if pending and is_task_cancelled(task_id):
+            cancelled = True
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+    cancelled = cancelled or is_task_cancelled(task_id)
+    
+    order = sorted(results)
+    finished = [results[index] for index in order]
+    if executed is not None:
+        executed.extend(cases[index] for index in order)
+    print(f">>> Executed {len(finished)}/{total} test cases with concurrency {AUTOMATION_CONCURRENCY}")
+    return finished, cancelled
+
 @app.post("/run-automation-script")
 async def run_karate_automation_script(request: RestAssuredRequest):
     """
@@ -1717,11 +4711,12 @@ async def run_karate_automation_script(request: RestAssuredRequest):
         if not request.generatedTestCases or len(request.generatedTestCases) == 0:
             # Fallback to original fixed scenarios if no generated test cases
             print(">>> No generated test cases provided, falling back to default scenarios")
-            return await run_default_automation_scenarios(request)
+            return await run_default_automation_scenarios(request, task_id)
         
         # Check if generatedTestCases contains raw Karate strings (from frontend parsing)
         # or structured test case objects
         processed_test_cases = []
+        total_test_cases = 0
         
         for i, test_case in enumerate(request.generatedTestCases):
             if isinstance(test_case, str):
@@ -1732,26 +4727,28 @@ async def run_karate_automation_script(request: RestAssuredRequest):
                 # Join all raw strings to create a complete feature file
                 raw_feature_content = '\n'.join([str(tc) for tc in request.generatedTestCases])
                 
-                # Parse the raw Karate feature content into structured test cases
-                parsed_test_cases = parse_karate_feature_to_test_cases(raw_feature_content)
-                processed_test_cases = parsed_test_cases
-                print(f">>> Parsed {len(parsed_test_cases)} structured test cases from raw Karate content")
+                # Parse once; outline rows are expanded lazily while the runner executes them
+                feature = parse_karate_feature(raw_feature_content)
+                processed_test_cases = iter_karate_test_cases(feature)
+                total_test_cases = count_karate_test_cases(feature)
+                print(f">>> Parsed {total_test_cases} structured test cases from raw Karate content "
+                      f"({len(feature.scenarios)} scenario blocks)")
                 break  # We've processed all raw content at once
                 
             elif isinstance(test_case, dict):
                 # Already structured test case object
                 processed_test_cases.append(test_case)
+                total_test_cases += 1
             else:
                 print(f">>> Warning: Unknown test case format in position {i+1}: {type(test_case)}")
         
-        if not processed_test_cases:
+        if not total_test_cases:
             print(">>> No valid test cases could be processed, falling back to default scenarios")
-            return await run_default_automation_scenarios(request)
+            return await run_default_automation_scenarios(request, task_id)
         
-        print(f">>> Processing {len(processed_test_cases)} structured test cases for execution")
+        print(f">>> Processing {total_test_cases} structured test cases for execution")
         
-        # Generate Karate feature file for the processed test cases
-        # Create a temporary request object with the processed test cases
+        # Create a temporary request object; the executed test cases are attached after the run
         processed_request = RestAssuredRequest(
             apiEndpoint=request.apiEndpoint,
             method=request.method,
@@ -1761,82 +4758,24 @@ async def run_karate_automation_script(request: RestAssuredRequest):
             body=request.body,
             resourceId=request.resourceId,
             acceptHeader=request.acceptHeader,
-            generatedTestCases=processed_test_cases
+            generatedTestCases=[]
         )
         
-        feature_file = generate_dynamic_karate_feature_file(processed_request)
+        # Execute the processed test cases concurrently; results keep the scenario order
+        executed_test_cases = processed_request.generatedTestCases
+        test_results, cancelled = await execute_automation_test_cases(
+            task_id, processed_test_cases, processed_request, total_test_cases, executed_test_cases
+        )
+        if cancelled:
+            active_tasks.pop(task_id, None)
+            return JSONResponse({
+                "error": "Automation execution was cancelled", 
+                "task_id": task_id,
+                "partial_results": test_results
+            }, status_code=499)
         
-        # Execute each processed test case
-        test_results = []
-        
-        for i, test_case in enumerate(processed_test_cases):
-            # Check if task was cancelled before executing each test case
-            if active_tasks.get(task_id, {}).get("cancelled", False):
-                active_tasks.pop(task_id, None)
-                return JSONResponse({
-                    "error": "Automation execution was cancelled", 
-                    "task_id": task_id,
-                    "partial_results": test_results
-                }, status_code=499)
-            scenario_name = (
-                test_case.get('Test Scenario') or 
-                test_case.get('scenario') or 
-                test_case.get('Scenario') or 
-                f"Generated Test Case {i+1}"
-            )
-            
-            print(f">>> Executing test case {i+1}/{len(processed_test_cases)}: {scenario_name}")
-            print(f">>> Test case data preview: {json.dumps(test_case, indent=2)[:200]}...")
-            
-            try:
-                # Extract test case details
-                expected_status = extract_expected_status(test_case)
-                test_data = extract_test_data(test_case, processed_request)
-                
-                print(f">>> Expected status: {expected_status}")
-                print(f">>> Extracted test data: {json.dumps(test_data, indent=2)[:200]}...")
-                
-                # Create a custom request for this test case
-                test_request = create_test_request(processed_request, test_case, test_data)
-                
-                # Execute the test
-                print(f">>> Executing API call for test case {i+1}...")
-                result = await execute_generated_test_case(test_request, test_case, f"generated_test_{i+1}")
-                print(f">>> Test case {i+1} completed - Status: {result.get('statusCode', 'unknown')}")
-                
-                # Format the result
-                status_info = determine_test_status(result, expected_status)
-                test_results.append({
-                    "scenario": scenario_name,
-                    "status": status_info["status"],
-                    "justification": status_info["justification"],
-                    "expectedStatus": expected_status,
-                    "statusCode": result.get("statusCode", 0),
-                    "response": result.get("response", ""),
-                    "details": get_test_case_details(test_case),
-                    "expectedResult": test_case.get('Expected Result', 'Not specified'),
-                    "actualResult": result.get("response", ""),
-                    "karateStep": generate_karate_step(test_request, expected_status),
-                    "testData": test_data
-                })
-                
-                print(f">>> Test case {i+1} result: {determine_test_status(result, expected_status)}")
-                
-            except Exception as e:
-                print(f">>> Error executing test case {i+1}: {str(e)}")
-                test_results.append({
-                    "scenario": scenario_name,
-                    "status": "FAILED",
-                    "justification": f"Test execution failed with an exception: {str(e)}",
-                    "statusCode": 0,
-                    "expectedStatus": extract_expected_status(test_case),
-                    "response": f"Execution error: {str(e)}",
-                    "details": get_test_case_details(test_case),
-                    "expectedResult": test_case.get('Expected Result', 'Not specified'),
-                    "actualResult": f"Error: {str(e)}",
-                    "karateStep": f"# Test case execution failed: {str(e)}",
-                    "testData": {}
-                })
+        # Generate Karate feature file for the executed test cases
+        feature_file = generate_dynamic_karate_feature_file(processed_request)
         
         # Calculate summary
         total_tests = len(test_results)
@@ -1860,8 +4799,9 @@ async def run_karate_automation_script(request: RestAssuredRequest):
         # Mark task as completed and clean up
         active_tasks.pop(task_id, None)
         
-        # Add task_id to response
+        # Add task_id to response and keep the results for /download-report
         automation_result["task_id"] = task_id
+        await store_automation_result(task_id, automation_result, request)
         return JSONResponse(automation_result)
         
     except Exception as e:
@@ -1992,7 +4932,7 @@ def extract_test_data(test_case: Dict[str, Any], base_request: RestAssuredReques
                     break
     
     # If still no request body and this is a POST/PUT/PATCH request, create a default one
-    if not test_data['requestBody'] and base_request.httpMethod in ['POST', 'PUT', 'PATCH']:
+    if not test_data['requestBody'] and (base_request.method or 'GET').upper() in ['POST', 'PUT', 'PATCH']:
         test_data['requestBody'] = {
             'testCase': test_case.get('Test Scenario', 'Generated test case'),
             'timestamp': str(datetime.now().isoformat())
@@ -2063,7 +5003,7 @@ async def execute_generated_test_case(request: RestAssuredRequest, test_case: Di
         
         # Add test case specific information to the result
         result['testCaseInfo'] = {
-            'scenario': test_case.get('Test Scenario', f'Generated Test Case'),
+            'scenario': test_case.get('Test Scenario', 'Generated Test Case'),
             'description': test_case.get('Description', test_case.get('Test Description', '')),
             'objective': test_case.get('Test Objective', test_case.get('Objective', '')),
             'testData': test_data
@@ -2190,7 +5130,7 @@ Background:
         
         if test_request.body:
             feature_content += f"  * def requestBody = {test_request.body}\n"
-            feature_content += f"  * request requestBody\n"
+            feature_content += "  * request requestBody\n"
         
         feature_content += f"""  When method {test_request.method or 'GET'}
   Then status {expected_status}
@@ -2200,13 +5140,13 @@ Background:
     
     return feature_content
 
-async def run_default_automation_scenarios(request: RestAssuredRequest):
+async def run_default_automation_scenarios(request: RestAssuredRequest, task_id: str):
     """Fallback to original automation scenarios when no generated test cases are provided"""
     print(">>> Running default automation scenarios...")
     
     # This will contain the original automation logic as a fallback
     # For now, return a simple response
-    return JSONResponse({
+    automation_result = {
         "featureFile": generate_karate_feature_file(request),
         "summary": {
             "total": 1,
@@ -2222,8 +5162,12 @@ async def run_default_automation_scenarios(request: RestAssuredRequest):
             "details": "Fallback test when no generated test cases provided",
             "karateStep": f"* url '{request.apiEndpoint}'\n* method '{request.method or 'GET'}'\n* status 200"
         }],
-        "executionType": "default_scenarios"
-    })
+        "executionType": "default_scenarios",
+        "task_id": task_id
+    }
+    active_tasks.pop(task_id, None)
+    await store_automation_result(task_id, automation_result, request)
+    return JSONResponse(automation_result)
 
 def generate_karate_feature_file(request: RestAssuredRequest) -> str:
     """Generate a complete Karate DSL feature file"""
@@ -2327,10 +5271,7 @@ Scenario: Invalid Endpoint Test
     return feature_file
 
 async def execute_api_test(request: RestAssuredRequest, test_type: str) -> dict:
-    """Execute a single API test scenario"""
-    import requests
-    import json
-    
+    """Execute a single API test scenario without blocking the event loop"""
     try:
         # Prepare headers
         headers = {'Content-Type': 'application/json'}
@@ -2367,7 +5308,7 @@ async def execute_api_test(request: RestAssuredRequest, test_type: str) -> dict:
         endpoint = request.apiEndpoint
         
         # Log the full request details
-        print(f"=== REQUEST DETAILS ===")
+        print("=== REQUEST DETAILS ===")
         print(f"Method: {method}")
         print(f"Endpoint: {endpoint}")
         print(f"Headers: {headers}")
@@ -2375,22 +5316,18 @@ async def execute_api_test(request: RestAssuredRequest, test_type: str) -> dict:
             print(f"Request body: {data}")
         if auth:
             print(f"Using basic auth with user: {auth[0]}")
-        print(f"=== END REQUEST DETAILS ===")
-        
-        # Execute request based on method
-        if method == 'GET':
-            response = requests.get(endpoint, headers=headers, auth=auth, timeout=10)
-        elif method == 'POST':
-            response = requests.post(endpoint, headers=headers, json=data, auth=auth, timeout=10)
-        elif method == 'PUT':
-            response = requests.put(endpoint, headers=headers, json=data, auth=auth, timeout=10)
-        elif method == 'DELETE':
-            response = requests.delete(endpoint, headers=headers, auth=auth, timeout=10)
-        elif method == 'PATCH':
-            response = requests.patch(endpoint, headers=headers, json=data, auth=auth, timeout=10)
-        else:
+        print("=== END REQUEST DETAILS ===")
+        
+        if method not in ('GET', 'POST', 'PUT', 'DELETE', 'PATCH'):
             raise Exception(f"Unsupported HTTP method: {method}")
         
+        # Execute request - only methods with a body send the JSON payload
+        request_kwargs = {"headers": headers, "auth": auth}
+        if method in ('POST', 'PUT', 'PATCH'):
+            request_kwargs["json"] = data
+        await automation_rate_limiter.acquire(httpx.URL(endpoint).host)
+        response = await send_target_request(method, endpoint, AUTOMATION_REQUEST_TIMEOUT_SECONDS, **request_kwargs)
+        
         # Format response
         try:
             response_data = response.json()
@@ -2403,188 +5340,223 @@ async def execute_api_test(request: RestAssuredRequest, test_type: str) -> dict:
             "response": response_text
         }
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise Exception("Request timed out")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         raise Exception("Failed to connect to endpoint")
     except Exception as e:
         raise Exception(f"Test execution failed: {str(e)}")
 
 @app.post("/download-report")
-async def download_automation_report(request: RestAssuredRequest):
+async def download_automation_report(request: DownloadReportRequest):
     """
-    Generate and download automation execution report in Excel format
+    Generate and download automation execution report in Excel format.
+    Renders the stored results of the run identified by task_id; the suite is only
+    executed again when rerun is set.
     """
     try:
-        # Run the automation to get results
-        automation_result = await run_karate_automation_script(request)
-        
-        # Parse the automation result
-        result_data = automation_result.body.decode('utf-8') if hasattr(automation_result, 'body') else str(automation_result)
-        if isinstance(automation_result, JSONResponse):
-            import json
-            result_data = json.loads(result_data)
+        if request.rerun:
+            # Explicitly requested: run the automation again to get fresh results
+            automation_result = await run_karate_automation_script(request)
+            
+            # Parse the automation result
+            result_data = automation_result.body.decode('utf-8') if hasattr(automation_result, 'body') else str(automation_result)
+            if isinstance(automation_result, JSONResponse):
+                result_data = json.loads(result_data)
+            else:
+                result_data = {"testResults": [], "summary": {"total": 0, "passed": 0, "failed": 0}}
+            request_info = request
+        elif request.task_id:
+            loop = asyncio.get_running_loop()
+            stored = await loop.run_in_executor(task_executor, automation_results.get, request.task_id)
+            if stored is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No stored automation results for task {request.task_id} - run the automation again or set rerun=true"
+                )
+            print(f">>> Building report from stored results of task {request.task_id}")
+            result_data = stored["result"]
+            request_info = RestAssuredRequest(**stored["request"])
         else:
-            result_data = {"testResults": [], "summary": {"total": 0, "passed": 0, "failed": 0}}
+            raise HTTPException(status_code=400, detail="task_id of a finished automation run is required (or set rerun=true)")
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_file = None
+        if (request.format or "xlsx").lower() != "csv":
+            # Generate Excel report off the event loop; fall back to CSV if that fails
+            try:
+                loop = asyncio.get_running_loop()
+                report_file = await loop.run_in_executor(task_executor, generate_excel_report, result_data, request_info)
+            except Exception as e:
+                print(f"Excel generation error: {str(e)}")
         
-        # Generate Excel report
-        report_file = generate_excel_report(result_data, request)
+        if report_file is None:
+            return StreamingResponse(
+                iter_csv_report(result_data, request_info),
+                media_type='text/csv',
+                headers={"Content-Disposition": f"attachment; filename=automation_report_{timestamp}.csv"}
+            )
         
-        # Return file for download
+        # Return file for download and delete it once it has been sent
         return FileResponse(
             path=report_file,
             media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            filename=f"automation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            headers={"Content-Disposition": "attachment; filename=automation_report.xlsx"}
+            filename=f"automation_report_{timestamp}.xlsx",
+            headers={"Content-Disposition": "attachment; filename=automation_report.xlsx"},
+            background=BackgroundTask(os.remove, report_file)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f">>> Download report error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
-def generate_excel_report(automation_data, request_info):
-    """Generate Excel report from automation results"""
-    try:
-        import pandas as pd
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Border, Side
-        from openpyxl.utils.dataframe import dataframe_to_rows
-        
-        # Create workbook and worksheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Automation Report"
-        
-        # Add header information
-        ws['A1'] = "API Automation Test Report"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws['A2'] = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        ws['A3'] = f"API Endpoint: {request_info.apiEndpoint}"
-        ws['A4'] = f"Method: {request_info.method or 'GET'}"
-        ws['A5'] = f"Authentication: {'Token' if request_info.token else 'Basic' if request_info.username else 'None'}"
-        
-        # Add summary information
-        summary = automation_data.get("summary", {})
-        ws['A7'] = "Test Summary"
-        ws['A7'].font = Font(bold=True, size=14)
-        ws['A8'] = f"Total Tests: {summary.get('total', 0)}"
-        ws['A9'] = f"Passed: {summary.get('passed', 0)}"
-        ws['A10'] = f"Failed: {summary.get('failed', 0)}"
-        ws['A11'] = f"Success Rate: {summary.get('success_rate', '0%')}"
-        
-        # Add test results table
-        test_results = automation_data.get("testResults", [])
-        if test_results:
-            ws['A13'] = "Test Results"
-            ws['A13'].font = Font(bold=True, size=14)
-            
-            # Headers
-            headers = ['Scenario', 'Status', 'Status Code', 'Details', 'Response Preview']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=14, column=col)
-                cell.value = header
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            
-            # Data rows
-            for row, result in enumerate(test_results, 15):
-                ws.cell(row=row, column=1).value = result.get('scenario', '')
-                
-                # Status with color coding
-                status_cell = ws.cell(row=row, column=2)
-                status_cell.value = result.get('status', '')
-                if result.get('status') == 'PASSED':
-                    status_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                elif result.get('status') == 'FAILED':
-                    status_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                
-                ws.cell(row=row, column=3).value = result.get('statusCode', '')
-                ws.cell(row=row, column=4).value = result.get('details', '')
-                
-                # Truncate response for readability
-                response = result.get('response', '')
-                if len(response) > 200:
-                    response = response[:200] + "..."
-                ws.cell(row=row, column=5).value = response
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-        wb.save(temp_file.name)
-        temp_file.close()
-        
-        return temp_file.name
-        
-    except ImportError:
-        # Fallback to basic CSV if pandas/openpyxl not available
-        return generate_csv_report(automation_data, request_info)
-    except Exception as e:
-        print(f"Excel generation error: {str(e)}")
-        return generate_csv_report(automation_data, request_info)
+REPORT_COLUMNS = ['Scenario', 'Status', 'Status Code', 'Details', 'Response Preview']
+REPORT_MAX_COLUMN_WIDTH = 50
+REPORT_WIDTH_SAMPLE_ROWS = 200
+REPORT_CSV_FLUSH_ROWS = 500
 
-def generate_csv_report(automation_data, request_info):
-    """Generate CSV report as fallback"""
-    import csv
-    
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='w', newline='')
-    
-    writer = csv.writer(temp_file)
-    
-    # Header information
-    writer.writerow(['API Automation Test Report'])
-    writer.writerow([f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-    writer.writerow([f'API Endpoint: {request_info.apiEndpoint}'])
-    writer.writerow([f'Method: {request_info.method or "GET"}'])
-    writer.writerow([''])
-    
-    # Summary
+def report_header_lines(automation_data, request_info, include_auth: bool = True) -> List[str]:
+    """Report title block followed by the summary block, separated by a blank line"""
     summary = automation_data.get("summary", {})
-    writer.writerow(['Test Summary'])
-    writer.writerow([f'Total Tests: {summary.get("total", 0)}'])
-    writer.writerow([f'Passed: {summary.get("passed", 0)}'])
-    writer.writerow([f'Failed: {summary.get("failed", 0)}'])
-    writer.writerow([f'Success Rate: {summary.get("success_rate", "0%")}'])
-    writer.writerow([''])
-    
-    # Test results
-    writer.writerow(['Scenario', 'Status', 'Status Code', 'Details', 'Response Preview'])
-    
-    test_results = automation_data.get("testResults", [])
+    lines = [
+        "API Automation Test Report",
+        f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"API Endpoint: {request_info.apiEndpoint}",
+        f"Method: {request_info.method or 'GET'}"
+    ]
+    if include_auth:
+        lines.append(f"Authentication: {'Token' if request_info.token else 'Basic' if request_info.username else 'None'}")
+    return lines + [
+        "",
+        "Test Summary",
+        f"Total Tests: {summary.get('total', 0)}",
+        f"Passed: {summary.get('passed', 0)}",
+        f"Failed: {summary.get('failed', 0)}",
+        f"Success Rate: {summary.get('success_rate', '0%')}"
+    ]
+
+def iter_report_rows(test_results):
+    """Yield one report row per test result, truncating the response for readability"""
     for result in test_results:
         response = result.get('response', '')
         if len(response) > 200:
             response = response[:200] + "..."
-        
-        writer.writerow([
+        yield [
             result.get('scenario', ''),
             result.get('status', ''),
             result.get('statusCode', ''),
             result.get('details', ''),
             response
-        ])
+        ]
+
+def measure_report_columns(header_lines: List[str], sample_rows: List[list]) -> List[int]:
+    """
+    Column widths for the Excel report. A write-only worksheet writes its column widths
+    with the first row, so they come from the header block and the first rows only.
+    """
+    widths = [len(header) for header in REPORT_COLUMNS]
+    widths[0] = max([widths[0]] + [len(line) for line in header_lines])
+    for row in sample_rows:
+        for col, value in enumerate(row):
+            widths[col] = max(widths[col], len(str(value)))
+    return [min(width + 2, REPORT_MAX_COLUMN_WIDTH) for width in widths]
+
+def generate_excel_report(automation_data, request_info):
+    """Generate Excel report from automation results using a write-only (streaming) workbook"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Automation Report")
     
+    header_lines = report_header_lines(automation_data, request_info)
+    test_results = automation_data.get("testResults", [])
+    rows = iter_report_rows(test_results)
+    sample_rows = list(itertools.islice(rows, REPORT_WIDTH_SAMPLE_ROWS))
+    for col, width in enumerate(measure_report_columns(header_lines, sample_rows), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    
+    # Styles are shared by every cell that uses them
+    title_font = Font(bold=True, size=16)
+    section_font = Font(bold=True, size=14)
+    bold_font = Font(bold=True)
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    status_fills = {
+        "PASSED": PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid"),
+        "FAILED": PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
+    }
+    
+    def styled(value, font=None, fill=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        return cell
+    
+    # Header and summary information
+    for line in header_lines:
+        if line == header_lines[0]:
+            ws.append([styled(line, title_font)])
+        elif line == "Test Summary":
+            ws.append([styled(line, section_font)])
+        else:
+            ws.append([line] if line else [])
+    
+    # Test results table
+    if test_results:
+        ws.append([])
+        ws.append([styled("Test Results", section_font)])
+        ws.append([styled(header, bold_font, header_fill) for header in REPORT_COLUMNS])
+        for row in itertools.chain(sample_rows, rows):
+            fill = status_fills.get(row[1])
+            if fill is not None:
+                row[1] = styled(row[1], fill=fill)
+            ws.append(row)
+    
+    # Save to temporary file - the caller deletes it once the download has been sent
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
     temp_file.close()
+    wb.save(temp_file.name)
     return temp_file.name
 
+def iter_csv_report(automation_data, request_info):
+    """Stream the CSV report in chunks of REPORT_CSV_FLUSH_ROWS rows"""
+    import csv
+    import io
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    # Header information and summary
+    for line in report_header_lines(automation_data, request_info, include_auth=False):
+        writer.writerow([line])
+    writer.writerow([''])
+    
+    # Test results
+    writer.writerow(REPORT_COLUMNS)
+    for index, row in enumerate(iter_report_rows(automation_data.get("testResults", [])), 1):
+        writer.writerow(row)
+        if index % REPORT_CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
 # Server startup
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Test Case Generator Server...")
     print("📍 Server will be available at http://localhost:8000")
     print("📄 API documentation at http://localhost:8000/docs")
-    print("🔧 Local Llama model with Metal GPU acceleration loaded")
+    if model_path:
+        print(f"🔧 Local Llama model loads in the background - {llama_profile.describe()}, {LLAMA_POOL_SIZE} instance(s)")
+    else:
+        print("🔧 No local Llama model configured")
     print("🌐 OpenAI API ready (if configured)")
     print("=" * 50)
     
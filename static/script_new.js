@@ -106,6 +106,10 @@ class KarateTestGenerator {
             const response = await fetch('/api-status');
             this.apiStatus = await response.json();
             this.displayApiStatusNotification();
+            if (this.apiStatus.warming) {
+                // Generation tiers are still warming up on the server - check again shortly
+                setTimeout(() => this.checkApiStatus(), 3000);
+            }
         } catch (error) {
             console.error('Failed to check API status:', error);
             this.showAlert('Unable to check API status. Using local generation.', 'warning');
@@ -148,6 +152,11 @@ class KarateTestGenerator {
                 alertClass = 'alert-success';
                 icon = 'bi-check-circle';
             }
+        } else if (openai.status === 'warming') {
+            alertClass = 'alert-info';
+            icon = 'bi-hourglass-split';
+            message = `<strong>⏳ Warming Up:</strong> ${openai.message}<br>
+                      <small>Using ${primary_method} until warm-up finishes.</small>`;
         } else if (openai.status === 'inactive') {
             alertClass = 'alert-warning';
             icon = 'bi-exclamation-triangle';
@@ -397,22 +406,24 @@ class KarateTestGenerator {
             // Add task ID to form data for server tracking
             formData.append('task_id', this.currentTaskId);
 
-            const response = await fetch('/generate-test-cases', {
+            const response = await fetch('/generate-test-cases/stream', {
                 method: 'POST',
                 body: formData
             });
 
-            const data = await response.json();
-
-            if (response.ok) {
-                // Reset UI and state only after successful generation
-                this.resetWorkflowUI();
-                this.displayTestCases(data.output || data.test_cases);
-                this.showAlert('Karate test cases generated successfully!', 'success');
-            } else {
+            if (!response.ok) {
+                // Validation errors are returned as plain JSON before any streaming starts
+                const data = await response.json();
                 this.updateRoadmapStep(2, 'error');
                 throw new Error(data.error || 'Failed to generate test cases');
             }
+
+            // Clear the previous run (test cases, automation results, report task) before new scenarios render
+            this.resetWorkflowUI();
+            this.updateRoadmapStep(2, 'active');
+            const data = await this.readGenerationStream(response);
+            this.displayTestCases(data.output);
+            this.showAlert('Karate test cases generated successfully!', 'success');
         } catch (error) {
             this.updateRoadmapStep(2, 'error');
             let errorMsg = `Error: ${error.message}`;
@@ -430,6 +441,73 @@ class KarateTestGenerator {
         }
     }
 
+    async readGenerationStream(response) {
+        // Parse the Server-Sent Events emitted by /generate-test-cases/stream and render scenarios as they arrive
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let streamedText = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventType = 'message';
+                let payload = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        eventType = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        payload += line.slice(5).trim();
+                    }
+                });
+                const data = payload ? JSON.parse(payload) : {};
+
+                if (eventType === 'chunk') {
+                    if (!streamedText) {
+                        // First tokens have arrived - swap the loading modal for the live output
+                        this.hideLoading();
+                    }
+                    streamedText += data.text;
+                    this.renderStreamingTestCases(streamedText, data.scenario_count);
+                } else if (eventType === 'reset') {
+                    streamedText = '';
+                    this.renderStreamingTestCases(streamedText, 0);
+                } else if (eventType === 'completed') {
+                    return data;
+                } else if (eventType === 'failed' || eventType === 'cancelled') {
+                    this.updateRoadmapStep(2, 'error');
+                    throw new Error(data.error || `Generation ${eventType}`);
+                }
+            }
+        }
+        throw new Error('Generation stream ended unexpectedly');
+    }
+
+    renderStreamingTestCases(text, scenarioCount) {
+        // Show partial output while the model is still generating
+        document.getElementById('testCaseCountNumber').textContent = scenarioCount;
+        const section = document.getElementById('testCasesSection');
+        const content = document.getElementById('testCasesContent');
+        section.style.display = 'block';
+
+        let pre = content.querySelector('pre.streaming-output');
+        if (!pre) {
+            content.innerHTML = '<pre class="bg-light p-3 rounded border streaming-output" style="max-height: 500px; overflow-y: auto;"></pre>';
+            pre = content.querySelector('pre.streaming-output');
+        }
+        pre.textContent = text;
+        pre.scrollTop = pre.scrollHeight;
+    }
+
     displayTestCases(testCases) {
         // Count the number of test scenarios - handle both "Scenario:" and "Scenario N:" patterns
         const scenarioMatches = testCases.match(/Scenario(\s+\d+)?:/g) || [];
@@ -659,8 +737,9 @@ class KarateTestGenerator {
             // Show loading modal for report generation
             this.showLoading('Creating comprehensive automation report...', 'Generating Report');
             
-            // Get form data
+            // Get form data; the report is built from the stored results of the last run
             const formData = this.getFormData();
+            formData.task_id = this.currentResults ? this.currentResults.task_id : null;
             
             // Make request to download endpoint
             const response = await fetch('/download-report', {
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed generation cache (memory LRU + SQLite layer)
+"""
+
+import os
+import tempfile
+import time
+
+from main import GenerationCache
+
+def make_cache(tmp_dir, **overrides):
+    settings = {
+        "memory_entries": 2,
+        "db_path": os.path.join(tmp_dir, "cache.sqlite3"),
+        "ttl_seconds": 3600,
+        "max_disk_bytes": 1024 * 1024
+    }
+    settings.update(overrides)
+    return GenerationCache(**settings)
+
+def test_key_normalization():
+    """Whitespace-only differences share a key; tier and operation changes do not"""
+    key = GenerationCache.make_key("The API must  return users\n", "Both", "", "openai:gpt-4o")
+    assert key == GenerationCache.make_key("  The API must return users", "both ", "", "openai:gpt-4o")
+    assert key != GenerationCache.make_key("The API must return users", "both", "", "enhanced-mock")
+    assert key != GenerationCache.make_key("The API must return users", "negative", "", "openai:gpt-4o")
+    print("✅ Cache keys normalize requirement text and separate tiers")
+
+def test_memory_and_disk_hits():
+    """Entries evicted from the LRU are still served from SQLite"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = make_cache(tmp_dir)
+        for name in ("a", "b", "c"):
+            cache.put(name, f"Feature: {name}", "OpenAI API (Tier 1)")
+
+        assert cache.get("c")["output"] == "Feature: c"
+        assert cache.get("a")["output"] == "Feature: a"  # evicted from memory, served from disk
+        assert cache.get("missing") is None
+
+        status = cache.status()
+        assert status["memory_hits"] == 1
+        assert status["disk_hits"] == 1
+        assert status["misses"] == 1
+        assert status["disk_entries"] == 3
+        print(f"✅ Cache status: {status}")
+
+def test_ttl_and_size_eviction():
+    """Expired entries miss, and the disk layer is trimmed to its byte budget"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = make_cache(tmp_dir, ttl_seconds=0)
+        cache.put("old", "Feature: old", "Enhanced Local Generation (Tier 3 - Primary)")
+        time.sleep(0.01)
+        assert cache.get("old") is None
+
+        cache = make_cache(tmp_dir, db_path=os.path.join(tmp_dir, "small.sqlite3"), max_disk_bytes=100)
+        for i in range(5):
+            cache.put(f"k{i}", "x" * 40, "OpenAI API (Tier 1)")
+        assert cache.status()["disk_bytes"] <= 100
+        print("✅ TTL and size-based eviction applied")
+
+if __name__ == "__main__":
+    test_key_normalization()
+    test_memory_and_disk_hits()
+    test_ttl_and_size_eviction()
+    print("\n🎉 Generation cache tests passed!")
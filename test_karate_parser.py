@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the Karate feature parser: AST cache and Background scoping
+"""
+
+from main import parse_karate_feature, parse_karate_feature_to_test_cases
+
+TWO_FEATURES = """Feature: first
+Background:
+  * url 'http://a'
+  * header X = 'a'
+
+Scenario: one
+  Given path '/one'
+  When method GET
+  Then status 200
+
+Feature: second
+Background:
+  * url 'http://b'
+  * header X = 'b'
+
+Scenario: two
+  Given path '/two'
+  When method POST
+  Then status 201
+"""
+
+def test_background_scoped_to_its_feature():
+    """Concatenated features keep their own Background, even when both have the same number of steps"""
+    feature = parse_karate_feature(TWO_FEATURES)
+    one, two = feature.scenarios
+    assert [step.text for step in one.background] == ["* url 'http://a'", "* header X = 'a'"]
+    assert [step.text for step in two.background] == ["* url 'http://b'", "* header X = 'b'"]
+    assert feature.background == one.background
+
+    cases = parse_karate_feature_to_test_cases(TWO_FEATURES)
+    assert [case["Test Data"]["headers"]["X"] for case in cases] == ["a", "b"]
+    print("✅ Each feature's Background applies only to its own scenarios")
+
+def test_feature_without_background_after_one_with():
+    """A Feature line resets the Background even when the next feature declares none"""
+    text = TWO_FEATURES.replace("Background:\n  * url 'http://b'\n  * header X = 'b'\n", "")
+    one, two = parse_karate_feature(text).scenarios
+    assert len(one.background) == 2
+    assert two.background == ()
+    print("✅ A feature without Background does not inherit the previous one")
+
+def test_ast_cache_reuse():
+    """The same text parses to the same cached AST object"""
+    assert parse_karate_feature(TWO_FEATURES) is parse_karate_feature(TWO_FEATURES)
+    assert parse_karate_feature(TWO_FEATURES + "\n") is not parse_karate_feature(TWO_FEATURES)
+    print("✅ Parsed features are cached by content")
+
+if __name__ == "__main__":
+    test_background_scoped_to_its_feature()
+    test_feature_without_background_after_one_with()
+    test_ast_cache_reuse()
+    print("\n🎉 Karate parser tests passed!")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the local repair of generated Karate features
+"""
+
+from main import repair_karate_locally, validate_karate_syntax
+
+def test_json_request_with_existing_path():
+    """A JSON request object keeps its body but does not repeat the scenario's own path"""
+    text = """Feature: orders
+Background:
+  * url 'https://api.example.com'
+
+Scenario: create order
+  Given path '/orders'
+  * request {"method": "POST", "path": "/orders", "body": {"item": "book"}, "expectedStatus": 201}
+"""
+    repaired, fixes = repair_karate_locally(text)
+    lines = [line.strip() for line in repaired.split("\n")]
+    assert lines.count("Given path '/orders'") == 1
+    assert not any(line.startswith("Given url") for line in lines[3:])
+    assert 'And request {"item": "book"}' in lines
+    assert lines.index("When method POST") < lines.index("Then status 201")
+    assert len(fixes) == 2
+    assert validate_karate_syntax(repaired)["is_valid"]
+    print("✅ Existing path kept once, JSON body rewritten as a request step")
+
+def test_json_request_without_path():
+    """The path from the JSON request object is used when the scenario has none"""
+    text = """Feature: orders
+Background:
+  * url 'https://api.example.com'
+
+Scenario: delete order
+  * request {"method": "DELETE", "path": "/orders/1", "expectedStatus": 204}
+"""
+    repaired, _ = repair_karate_locally(text)
+    lines = [line.strip() for line in repaired.split("\n")]
+    assert "Given path '/orders/1'" in lines
+    assert lines[-3:-1] == ["When method DELETE", "Then status 204"]
+    assert validate_karate_syntax(repaired)["is_valid"]
+    print("✅ Path taken from the JSON request object")
+
+def test_missing_status_added():
+    """A scenario without a status check gets one after its method, inferred from the title"""
+    text = """Feature: orders
+
+Scenario: get missing order returns not found
+  Given url 'https://api.example.com/orders/999'
+  When method GET
+"""
+    repaired, fixes = repair_karate_locally(text)
+    assert repaired.rstrip().endswith("When method GET\n  Then status 404")
+    assert fixes == ["Line 5: added 'Then status 404'"]
+    print("✅ Missing status added after the method")
+
+if __name__ == "__main__":
+    test_json_request_with_existing_path()
+    test_json_request_without_path()
+    test_missing_status_added()
+    print("\n🎉 Karate repair tests passed!")
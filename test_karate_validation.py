@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the structural Karate validator
+"""
+
+from main import validate_karate_syntax
+
+FEATURE = """Feature: orders
+Background:
+  * url 'https://api.example.com'
+
+Scenario: list orders
+  Given path '/orders'
+  When method GET
+  Then status 200
+
+Scenario: no method
+  Given path '/orders'
+  Then status 200
+
+Scenario: fetch order
+  Given path '/orders/1'
+  When method FETCH
+  Then status 200
+
+Scenario Outline: get order <id>
+  Given path '/orders/<id>'
+  When method GET
+  Then status <status>
+  And match response.name == '<missing>'
+
+  Examples:
+    | id | status |
+    | 1  | 200    |
+    | 2  | 404    |
+    | 3  | 404    |
+
+Scenario: unbalanced
+  Given path '/orders'
+  And request { "a": 1
+  When method POST
+  Then status 201
+"""
+
+def test_errors_have_line_numbers():
+    """Each error names its line, scenario and check"""
+    validation = validate_karate_syntax(FEATURE)
+    assert not validation["is_valid"]
+    found = [(d["line"], d["scenario"], d["code"]) for d in validation["diagnostics"] if d["severity"] == "error"]
+    assert found == [
+        (10, "no method", "missing_method"),
+        (12, "no method", "status_before_method"),
+        (16, "fetch order", "unknown_method"),
+        (23, "get order <id>", "unknown_placeholder"),
+        (33, "unbalanced", "unbalanced_body"),
+    ]
+    assert validation["errors"][0] == "Line 10 (Scenario: no method): No 'When method' step"
+    print("✅ Validation errors carry line numbers and scenario names")
+
+def test_valid_feature():
+    """A well-formed feature has no errors and the result is cached"""
+    text = FEATURE.split("Scenario: no method")[0]
+    validation = validate_karate_syntax(text)
+    assert validation["is_valid"]
+    assert validation["errors"] == []
+    assert validation["scenario_count"] == 1
+    assert validate_karate_syntax(text) is validation
+    print("✅ Valid feature passes and its result is cached")
+
+if __name__ == "__main__":
+    test_errors_have_line_numbers()
+    test_valid_feature()
+    print("\n🎉 Karate validation tests passed!")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test the AI response sanitizer: known inputs, idempotence and the SanitizedText marker
+"""
+
+import random
+
+from main import sanitize_ai_fragment, sanitize_ai_response, sanitize_ai_response_line, StreamingSanitizer, SanitizedText
+
+def test_known_cases():
+    """Garbage phrases, non-ASCII, stray @, spaces and blank lines"""
+    assert sanitize_ai_fragment("Given  path @ '/a' développement\n\n\n\nWhen method GET") == "Given path '/a' \n\nWhen method GET"
+    assert sanitize_ai_fragment("a \x0b b") == "a b"
+    assert sanitize_ai_response("a@@  b") == "ab"
+    assert sanitize_ai_response("x@\x0b ") == "x"
+    assert sanitize_ai_response("  @ neue Feature: x  \n") == "Feature: x"
+    assert sanitize_ai_response_line("  Given path 'é'\r") == " Given path ''"
+    print("✅ Known inputs sanitized")
+
+def test_idempotent():
+    """Sanitizing a sanitized text changes nothing, including control characters inside @/whitespace runs"""
+    pieces = ["@", "@@", " ", "  ", "\n", "\t", "\r", "\x0b", "\x0c", "é", "\xa0", "a", "neue", "@ neue",
+              "dév", "eloppement", "développement", "\n \n", "Given"]
+    rng = random.Random(25)
+    for _ in range(20000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+        once = str(sanitize_ai_response(text))
+        assert sanitize_ai_response(once) == once, repr(text)
+        line = sanitize_ai_response_line(text.replace("\n", ""))
+        assert sanitize_ai_response_line(line) == line, repr(text)
+    print("✅ Sanitizer is idempotent")
+
+def test_sanitized_text_not_sanitized_twice():
+    """A marked result is returned as is; streamed lines match the whole-text rules"""
+    once = sanitize_ai_response("Feature: x\n\n\n  Scenario: é one\n")
+    assert type(once) is SanitizedText
+    assert sanitize_ai_fragment(once) is once
+    assert sanitize_ai_response(once) == once
+
+    sanitizer = StreamingSanitizer()
+    raw = "Feature: x\n\n\n\nScenario:  one @ \nGiven path 'é'\n"
+    streamed = "".join(sanitizer.feed(chunk) for chunk in (raw[:7], raw[7:20], raw[20:])) + sanitizer.flush()
+    # Streamed lines also lose their trailing spaces
+    assert streamed.strip().split("\n") == [line.rstrip() for line in sanitize_ai_response(raw).split("\n")]
+    print("✅ Sanitized text is marked and streaming agrees")
+
+if __name__ == "__main__":
+    test_known_cases()
+    test_idempotent()
+    test_sanitized_text_not_sanitized_twice()
+    print("\n🎉 Response sanitizer tests passed!")
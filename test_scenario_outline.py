@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test Scenario Outline expansion into one test case per Examples row
+"""
+
+from main import parse_karate_feature, iter_karate_test_cases, count_karate_test_cases
+
+FEATURE = """Feature: orders
+Background:
+  * url 'https://api.example.com'
+
+Scenario: list orders
+  Given path '/orders'
+  When method GET
+  Then status 200
+
+Scenario Outline: get order <id>
+  Given path '/orders/<id>'
+  When method GET
+  Then status <status>
+
+  Examples:
+    | id | status |
+    | 1  | 200    |
+    | 2  | 404    |
+    | 3  | 404    |
+"""
+
+def test_outline_rows_expand():
+    """Each Examples row becomes its own test case with the placeholders filled in"""
+    feature = parse_karate_feature(FEATURE)
+    outline = feature.scenarios[1]
+    assert outline.outline and outline.example_count() == 3
+    assert [scenario.line for scenario in outline.expand()] == [17, 18, 19]
+
+    cases = list(iter_karate_test_cases(feature))
+    assert count_karate_test_cases(feature) == len(cases) == 4
+    expanded = [(case["Test Scenario"], case["API Path"], case["Expected Status"]) for case in cases[1:]]
+    assert expanded == [
+        ("get order 1", "/orders/1", 200),
+        ("get order 2", "/orders/2", 404),
+        ("get order 3", "/orders/3", 404),
+    ]
+    assert feature.scenario_count() == 4
+    print("✅ Scenario Outline rows expand into separate test cases")
+
+def test_outline_expands_lazily():
+    """Rows are substituted only as the runner asks for the next case"""
+    rows = parse_karate_feature(FEATURE).scenarios[1].expand()
+    first = next(rows)
+    assert first.name == "get order 1" and not first.outline
+    assert [step.text for step in first.steps][0] == "Given path '/orders/1'"
+    assert len(list(rows)) == 2
+    print("✅ Outline rows are expanded one at a time")
+
+if __name__ == "__main__":
+    test_outline_rows_expand()
+    test_outline_expands_lazily()
+    print("\n🎉 Scenario Outline tests passed!")